@@ -1,5 +1,8 @@
 import hashlib
 import os
+import shutil
+import StringIO
+import tempfile
 import time
 import unittest
 import urllib
@@ -7,11 +10,18 @@ import urllib
 import testbase
 
 from trrackspace.services.cloudfiles.errors import NoSuchContainer, \
-        NoSuchObject, ContainerNotEmpty
+        NoSuchObject, ContainerNotEmpty, PoolTimeoutError
 
+from trrackspace.services.cloudfiles.asynchronous import AsyncCloudfilesClient
+from trrackspace.services.cloudfiles.cache import ContainerCache
+from trrackspace.services.cloudfiles.cdn import CdnDirectory
 from trrackspace.services.cloudfiles.client import CloudfilesClient
 from trrackspace.services.cloudfiles.factory import CloudfilesClientFactory
+from trrackspace.services.cloudfiles.hedge import HedgePolicy
+from trrackspace.services.cloudfiles.index import ListingIndex
+from trrackspace.services.cloudfiles.retry import RetryPolicy
 from trrackspace.services.cloudfiles.storage_object import StorageObject
+from trrackspace.services.identity.catalog import ServiceCatalog
 
 class TestCloudfiles(unittest.TestCase):
     
@@ -44,6 +54,33 @@ class TestCloudfiles(unittest.TestCase):
         self.assertTrue("bytes" in container)
         self.assertTrue("name" in container)
 
+        self.assertListEqual(containers,
+                list(self.cloudfiles.list_containers(stream=True)))
+
+    def test_pool_timeout(self):
+        client = CloudfilesClient(
+                username="trdev",
+                password="B88mMJqh",
+                timeout=5,
+                retries=1,
+                servicenet=False,
+                pool_size=1,
+                pool_timeout=5,
+                debug_level=0)
+        try:
+            #unstarted streams should not hold pooled connections
+            generators = [client.list_containers(stream=True)
+                    for i in range(3)]
+            self.assertTrue(len(client.list_containers()) > 0)
+
+            generator = generators[0]
+            generator.next()
+            self.assertRaises(PoolTimeoutError, client.list_containers)
+            generator.close()
+            self.assertTrue(len(client.list_containers()) > 0)
+        finally:
+            client.close()
+
     def test_create_container(self):
         container_name = "trunittest_tmp_%s" % (int(time.time()))
         container = self.cloudfiles.create_container(container_name)
@@ -63,6 +100,48 @@ class TestCloudfiles(unittest.TestCase):
         with self.assertRaises(NoSuchContainer):
             self.cloudfiles.get_container("blahblahblah")
     
+    def test_container_cache(self):
+        container_cache = ContainerCache(ttl=60, max_size=1)
+        self.cloudfiles.container_cache = container_cache
+        try:
+            container = self.cloudfiles.get_container(self.container_name)
+            self.assertIs(container,
+                    self.cloudfiles.get_container(self.container_name))
+            self.assertEqual(container_cache.hits, 1)
+
+            #mutating calls should invalidate the cached container
+            container.update_metadata({"x-container-meta-test": "test"})
+            self.assertIsNot(container,
+                    self.cloudfiles.get_container(self.container_name))
+
+            #misses should not be cached
+            with self.assertRaises(NoSuchContainer):
+                self.cloudfiles.get_container("blahblahblah")
+            self.assertEqual(len(container_cache), 1)
+        finally:
+            self.cloudfiles.container_cache = None
+
+    def test_cdn_directory(self):
+        container = self.cloudfiles.get_container(self.container_name)
+        self.assertTrue(container.cdn_enabled)
+
+        cdn_directory = CdnDirectory(ttl=60, batch_size=1)
+        self.cloudfiles.cdn_directory = cdn_directory
+        try:
+            cached = self.cloudfiles.get_container(self.container_name)
+            self.assertTrue(cached.cdn_enabled)
+            self.assertEqual(cached.cdn_uri, container.cdn_uri)
+            self.assertEqual(cached.cdn_ssl_uri, container.cdn_ssl_uri)
+            self.assertEqual(cached.cdn_ttl, container.cdn_ttl)
+            self.assertIn(self.container_name, cdn_directory.containers)
+
+            container_name = "trunittest_tmp_%s" % (int(time.time()))
+            container = self.cloudfiles.create_container(container_name)
+            self.assertFalse(container.cdn_enabled)
+            container.delete()
+        finally:
+            self.cloudfiles.cdn_directory = None
+
     def test_expired_token(self):
         #make sure we're authenticated
         with self.assertRaises(NoSuchContainer):
@@ -75,6 +154,109 @@ class TestCloudfiles(unittest.TestCase):
         with self.assertRaises(NoSuchContainer):
             self.cloudfiles.get_container("blahblahblah")
 
+    def test_lazy(self):
+        client = CloudfilesClient(
+                username="trdev",
+                password="B88mMJqh",
+                timeout=30,
+                retries=2,
+                servicenet=False,
+                lazy=True,
+                debug_level=0)
+        self.assertIsNone(client._identity_client)
+        self.assertIsNone(client._cloudfiles)
+        self.assertIsNone(client._cloudfiles_cdn)
+
+        container = client.get_container(self.container_name, cdn_enabled=False)
+        self.assertEqual(container.name, self.container_name)
+        self.assertIsNone(client._cloudfiles_cdn)
+        self.assertFalse(client._account_loaded)
+
+        self.assertTrue(client.container_count > 0)
+        self.assertTrue(client._account_loaded)
+
+    def test_retry_policy(self):
+        retry_policy = RetryPolicy(max_retries=2, backoff=0.1)
+        client = CloudfilesClient(
+                username="trdev",
+                password="B88mMJqh",
+                timeout=30,
+                retries=2,
+                servicenet=False,
+                retry_policy=retry_policy,
+                debug_level=0)
+        self.assertIs(client.cloudfiles.retry_policy, retry_policy)
+        self.assertIs(client.cloudfiles_cdn.retry_policy, retry_policy)
+        client.list_containers()
+
+        #non-retryable errors should be raised immediately
+        with self.assertRaises(NoSuchContainer):
+            client.get_container("blahblahblah")
+
+    def test_failover(self):
+        #servicenet is unreachable from outside of Rackspace, so requests
+        #should fail over to the public endpoint.
+        client = CloudfilesClient(
+                username="trdev",
+                password="B88mMJqh",
+                timeout=5,
+                retries=1,
+                servicenet=True,
+                failover=True,
+                failover_probe_interval=None,
+                debug_level=0)
+        selector = client.cloudfiles.endpoint_selector
+        self.assertEqual(len(selector.endpoints), 2)
+
+        for i in range(3):
+            client.list_containers()
+        self.assertEqual(selector.current.url, selector.endpoints[1].url)
+        self.assertFalse(selector.endpoints[0].breaker.allow())
+        client.close()
+
+    def test_close(self):
+        with CloudfilesClient(
+                username="trdev",
+                password="B88mMJqh",
+                timeout=5,
+                retries=1,
+                servicenet=True,
+                failover=True,
+                failover_probe_interval=60,
+                debug_level=0) as client:
+            selector = client.cloudfiles.endpoint_selector
+            probe_thread = selector._probe_thread
+            self.assertTrue(probe_thread.is_alive())
+        self.assertFalse(probe_thread.is_alive())
+        self.assertEqual(len(selector.endpoints[1].pool.idle_rest_clients), 0)
+
+    def test_catalog_snapshot(self):
+        identity_client = self.cloudfiles.identity_client
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            identity_client.catalog.to_file(path)
+            catalog = ServiceCatalog.from_file(path)
+        finally:
+            os.unlink(path)
+
+        client = CloudfilesClient(
+                username="trdev",
+                catalog=catalog,
+                token=identity_client.token,
+                region=self.cloudfiles.region,
+                timeout=30,
+                retries=2,
+                servicenet=False,
+                debug_level=0)
+        self.assertEqual(client.cloudfiles.endpoint,
+                self.cloudfiles.cloudfiles.endpoint)
+        self.assertEqual(client.cloudfiles_cdn.endpoint,
+                self.cloudfiles.cloudfiles_cdn.endpoint)
+        self.assertEqual(client.identity_client.token.id,
+                identity_client.token.id)
+        client.list_containers()
+
 class TestCloudfilesContainer(unittest.TestCase):
     
     @classmethod
@@ -133,6 +315,10 @@ class TestCloudfilesContainer(unittest.TestCase):
         objects = self.container.list_objects(limit=1)
         self.assertEqual(len(objects), 1)
 
+        generator = self.container.list_objects(stream=True)
+        self.assertEqual(generator.next()["name"], object_names[0])
+        self.assertListEqual(object_names[1:], [o["name"] for o in generator])
+
         self.container.delete_objects(object_names)
 
     def test_list_dir_objects(self):
@@ -150,6 +336,37 @@ class TestCloudfilesContainer(unittest.TestCase):
         objects = self.container.list_objects(prefix="tmp/", delimiter="/")
         self.assertListEqual(["tmp/b.txt", "tmp/c.txt"], [o.get("name") for o in objects])
 
+        objects = self.container.list_all_objects(delimiter="/", batch_size=1)
+        self.assertListEqual(["a.txt", "tmp/", "tmp2/"],
+                [o.get("name") or o.get("subdir") for o in objects])
+
+        self.container.delete_objects(object_names)
+
+    def test_walk(self):
+        object_names = ["a.txt", "tmp/b.txt", "tmp/c.txt",
+                "tmp/sub/d.txt", "tmp2/e.txt"]
+        for name in object_names:
+            object = self.container.create_object(name)
+            object.write("test")
+
+        result = {}
+        for dirpath, subdirs, objects in self.container.walk(threads=2):
+            result[dirpath] = (subdirs, [o["name"] for o in objects])
+
+        self.assertDictEqual({
+            "": (["tmp/", "tmp2/"], ["a.txt"]),
+            "tmp/": (["tmp/sub/"], ["tmp/b.txt", "tmp/c.txt"]),
+            "tmp/sub/": ([], ["tmp/sub/d.txt"]),
+            "tmp2/": ([], ["tmp2/e.txt"])
+        }, result)
+
+        #pruned subdirs should not be walked
+        dirpaths = []
+        for dirpath, subdirs, objects in self.container.walk(prefix="tmp/"):
+            dirpaths.append(dirpath)
+            subdirs[:] = []
+        self.assertListEqual(["tmp/"], dirpaths)
+
         self.container.delete_objects(object_names)
 
     def test_list_all_objects(self):
@@ -170,9 +387,85 @@ class TestCloudfilesContainer(unittest.TestCase):
         self.assertEqual(len(objects), len(object_names))
         self.assertListEqual(object_names, [o["name"] for o in objects])
 
+        objects = [o for o in self.container.list_all_objects(
+            batch_size=1, prefetch=2)]
+        self.assertListEqual(object_names, [o["name"] for o in objects])
+
+        objects = [o for o in self.container.list_all_objects(
+            batch_size=1, threads=4)]
+        self.assertListEqual(object_names, [o["name"] for o in objects])
+
+        objects = [o for o in self.container.list_all_objects(
+            batch_size=1, threads=2, boundaries=["b.txt"])]
+        self.assertListEqual(object_names, [o["name"] for o in objects])
+
+        #abandoning a prefetching listing should not block
+        generator = self.container.list_all_objects(batch_size=1, prefetch=1)
+        self.assertEqual(generator.next()["name"], object_names[0])
+        generator.close()
+
         self.container.delete_objects(object_names)
 
     
+    def test_list_compact(self):
+        object_names = ["a.txt", "b.txt", "c.txt"]
+        for name in object_names:
+            object = self.container.create_object(name)
+            object.write("test")
+
+        infos = self.container.list_objects(compact=True)
+        self.assertListEqual(object_names, [i.name for i in infos])
+        self.assertEqual(infos[0].bytes, 4)
+        self.assertEqual(infos[0].etag, hashlib.md5("test").hexdigest())
+        self.assertEqual(len(infos[0].hash), 16)
+        self.assertIs(infos[0].content_type, infos[1].content_type)
+
+        infos = list(self.container.list_all_objects(
+            batch_size=2, compact=True))
+        self.assertListEqual(object_names, [i.name for i in infos])
+
+        batches = list(self.container.list_object_batches(batch_size=2))
+        self.assertListEqual([2, 1], [len(b) for b in batches])
+        self.assertListEqual(infos, list(batches[0]) + list(batches[1]))
+        self.assertListEqual(["b.txt"],
+                [i.name for i in batches[0].filter(prefix="b")])
+        self.assertEqual(len(batches[0].filter(min_bytes=5)), 0)
+
+        self.container.delete_objects(object_names)
+
+    def test_listing_index(self):
+        object_names = ["a/1.txt", "a/2.txt", "b/1.txt"]
+        for name in object_names:
+            object = self.container.create_object(name)
+            object.write("test")
+
+        index = ListingIndex(self.container, batch_size=2)
+        self.assertEqual(index.refresh(), 3)
+        self.assertEqual(index.refresh(), 0)
+        self.assertEqual(len(index), 3)
+        self.assertListEqual(["a/1.txt", "a/2.txt"],
+                [i.name for i in index.query(prefix="a/")])
+        self.assertEqual(index.get("b/1.txt").etag,
+                hashlib.md5("test").hexdigest())
+        self.assertEqual(len(index.query(min_bytes=5)), 0)
+        self.assertEqual(len(index.query(modified_after="2000-01-01")), 3)
+
+        self.container.delete_object("a/1.txt")
+        self.container.create_object("b/2.txt").write("test")
+        self.assertEqual(index.refresh(prefixes=["a/"]), 1)
+        self.assertIsNone(index.get("a/1.txt"))
+        self.assertEqual(index.refresh(), 1)
+        self.assertEqual(index.count(prefix="b/"), 2)
+
+        #overwrites which do not change the container's totals
+        self.container.create_object("b/1.txt").write("TEST")
+        self.assertEqual(index.refresh(), 1)
+        self.assertEqual(index.get("b/1.txt").etag,
+                hashlib.md5("TEST").hexdigest())
+        index.close()
+
+        self.container.delete_objects(["a/2.txt", "b/1.txt", "b/2.txt"])
+
     def test_create_object(self):
         object_name = "create.txt"
         object_data = "data"
@@ -236,6 +529,24 @@ class TestCloudfilesContainer(unittest.TestCase):
         with self.assertRaises(NoSuchObject):
             self.container.get_object(object_names[-1])
 
+    def test_delete_objects_result(self):
+        object_names = ["a.txt", "b.txt", "c.txt"]
+        object_data = "data"
+        for object_name in object_names:
+            obj = self.container.create_object(object_name)
+            obj.write(object_data)
+
+        result = self.container.delete_objects(object_names,
+                batch_size=2, threads=2)
+        self.assertTrue(result.succeeded)
+        self.assertEqual(result.number_deleted, 3)
+        self.assertEqual(sorted(result.deleted), object_names)
+
+        result = self.container.delete_objects(["missing.txt", "missing.txt"])
+        self.assertTrue(result.succeeded)
+        self.assertEqual(result.number_not_found, 1)
+        self.assertEqual(result.not_found, ["missing.txt"])
+
     
     def test_delete_all_objects(self):
         object_names = ["a.txt", "b.txt", "c.txt"]
@@ -249,7 +560,27 @@ class TestCloudfilesContainer(unittest.TestCase):
         for object_name in object_names:
             with self.assertRaises(NoSuchObject):
                 self.container.get_object(object_name)
-    
+
+    def test_delete_all_objects_prefix(self):
+        object_names = ["a/a.txt", "a/b.txt", "a/c.txt", "b/a.txt"]
+        object_data = "data"
+        for object_name in object_names:
+            obj = self.container.create_object(object_name)
+            obj.write(object_data)
+
+        result = self.container.delete_all_objects(
+                batch_size=1, threads=2, prefix="a/")
+        self.assertTrue(result.succeeded)
+        self.assertEqual(result.number_deleted, 3)
+        self.assertEqual(sorted(result.deleted), object_names[:3])
+
+        for object_name in object_names[:3]:
+            with self.assertRaises(NoSuchObject):
+                self.container.get_object(object_name)
+
+        obj = self.container.get_object(object_names[-1])
+        self.assertEqual(obj.read(), object_data)
+
     def test_delete(self):
         container_name = "trunittest_delete"
         container = self.cloudfiles.create_container(container_name)
@@ -386,6 +717,133 @@ class TestCloudfilesContainer(unittest.TestCase):
         self.assertListEqual(self.container.list(), files)
         self.container.delete_all_objects()
 
+    def test_extract_archive_entries(self):
+        path = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(path, "tmp"))
+            files = ["a.txt", "tmp/b.txt", "tmp/c.txt"]
+            for name in files:
+                with open(os.path.join(path, name), "w") as f:
+                    f.write(name)
+
+            result = self.container.extract_archive_entries(path,
+                    max_entries=2)
+            self.assertEqual(result.get("Number Files Created"), 3)
+            self.assertListEqual(self.container.list(), files)
+            obj = self.container.get_object("tmp/b.txt")
+            self.assertEqual(obj.read(), "tmp/b.txt")
+        finally:
+            shutil.rmtree(path)
+
+        entries = [("d.txt", StringIO.StringIO("d"), 1)]
+        result = self.container.extract_archive_entries(entries,
+                compress=False)
+        self.assertEqual(result.get("Number Files Created"), 1)
+        self.assertEqual(self.container.get_object("d.txt").read(), "d")
+        self.container.delete_all_objects()
+
+    def test_sync_directory(self):
+        path = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(path, "tmp"))
+            files = ["a.txt", "tmp/b.txt"]
+            for name in files:
+                with open(os.path.join(path, name), "w") as f:
+                    f.write(name)
+            obj = self.container.create_object("sync/orphan.txt")
+            obj.write("orphan")
+            obj = self.container.create_object("sync2/keep.txt")
+            obj.write("keep")
+
+            #prefix should be treated as a directory
+            result = self.container.sync_directory(path, prefix="sync",
+                    delete=True)
+            self.assertTrue(result.succeeded)
+            self.assertEqual(sorted(result.uploaded),
+                    ["sync/a.txt", "sync/tmp/b.txt"])
+            self.assertEqual(result.orphans, ["sync/orphan.txt"])
+            self.assertListEqual(self.container.list(prefix="sync/"),
+                    ["sync/a.txt", "sync/tmp/b.txt"])
+            self.assertListEqual(self.container.list(prefix="sync2/"),
+                    ["sync2/keep.txt"])
+
+            #only changed files should be uploaded
+            with open(os.path.join(path, "a.txt"), "w") as f:
+                f.write("changed")
+            result = self.container.sync_directory(path, prefix="sync/",
+                    use_mtime=True)
+            self.assertEqual(result.uploaded, ["sync/a.txt"])
+            self.assertEqual(result.unchanged, 1)
+            obj = self.container.get_object("sync/a.txt")
+            self.assertEqual(obj.read(), "changed")
+        finally:
+            shutil.rmtree(path)
+            self.container.delete_all_objects()
+
+    def test_mirror_directory(self):
+        files = ["mirror/a.txt", "mirror/tmp/b.txt"]
+        for name in files:
+            obj = self.container.create_object(name)
+            obj.write(name)
+
+        path = tempfile.mkdtemp()
+        try:
+            #partial download should be resumed
+            os.makedirs(os.path.join(path, "tmp"))
+            with open(os.path.join(path, "tmp/b.txt.part"), "w") as f:
+                f.write("mirror/")
+
+            result = self.container.mirror_directory(path, prefix="mirror/")
+            self.assertTrue(result.succeeded)
+            self.assertEqual(sorted(result.downloaded), files)
+            self.assertEqual(result.resumed, ["mirror/tmp/b.txt"])
+            for name in files:
+                with open(os.path.join(path, name[7:])) as f:
+                    self.assertEqual(f.read(), name)
+            self.assertFalse(os.path.exists(
+                os.path.join(path, "tmp/b.txt.part")))
+
+            #unchanged files should be skipped, and prefix should be
+            #treated as a directory
+            self.container.create_object("mirror2/c.txt").write("c")
+            result = self.container.mirror_directory(path, prefix="mirror")
+            self.assertEqual(result.downloaded, [])
+            self.assertEqual(result.unchanged, 2)
+            self.assertFalse(os.path.exists(os.path.join(path, "2")))
+        finally:
+            shutil.rmtree(path)
+            self.container.delete_all_objects()
+
+    def test_copy_prefix(self):
+        files = ["release/a.txt", "release/b.txt", "release/skip.txt"]
+        for name in files:
+            obj = self.container.create_object(name)
+            obj.write(name)
+
+        container_name = "trunittest_copy_%s" % (int(time.time()))
+        container = self.cloudfiles.create_container(container_name)
+        try:
+            def rename(name):
+                if name.endswith("skip.txt"):
+                    return None
+                return "current/" + name[len("release/"):]
+
+            result = self.container.copy_prefix(container,
+                    prefix="release/", rename_fn=rename, threads=2)
+            self.assertTrue(result.succeeded)
+            self.assertEqual(sorted(result.copied), [
+                ("release/a.txt", "current/a.txt"),
+                ("release/b.txt", "current/b.txt")])
+            self.assertEqual(result.skipped, ["release/skip.txt"])
+            self.assertListEqual(container.list(),
+                    ["current/a.txt", "current/b.txt"])
+            obj = container.get_object("current/a.txt")
+            self.assertEqual(obj.read(), "release/a.txt")
+        finally:
+            container.delete_all_objects()
+            container.delete()
+            self.container.delete_all_objects()
+
 class TestCloudfilesStorageObject(unittest.TestCase):
     
     @classmethod
@@ -513,6 +971,47 @@ class TestCloudfilesStorageObject(unittest.TestCase):
 
         obj.delete()
 
+    def test_chunks_concurrent_request(self):
+        obj = self.container.create_object("test.txt")
+        object_data = "abcdefghijklmnopqrstuvwxyz"
+        obj.write(object_data)
+        
+        #requests should be possible while chunks are being consumed
+        generator = obj.chunks(chunk_size=13)
+        chunks = [generator.next()]
+        obj.load()
+        self.assertEqual(obj.read(), object_data)
+        chunks.extend(generator)
+        self.assertListEqual([object_data[:13], object_data[13:]], chunks)
+
+        obj.delete()
+
+    def test_hedged_read(self):
+        obj = self.container.create_object("test.txt")
+        object_data = "abcdefghijklmnopqrstuvwxyz"
+        obj.write(object_data)
+
+        #zero delay hedges every request
+        hedge_policy = HedgePolicy(initial_delay=0, min_delay=0)
+        cloudfiles = self.cloudfiles.cloudfiles
+        cloudfiles.hedge_policy = hedge_policy
+        try:
+            self.assertEqual(obj.read(), object_data)
+            self.assertEqual(obj.read(size=3, offset=1), object_data[1:4])
+            self.assertListEqual([object_data[:13], object_data[13:]],
+                    list(obj.chunks(chunk_size=13)))
+            self.assertEqual(obj.read(hedge=False), object_data)
+        finally:
+            cloudfiles.hedge_policy = None
+            hedge_policy.shutdown()
+
+        self.assertEqual(hedge_policy.requests, 3)
+        self.assertEqual(hedge_policy.hedged, 3)
+        self.assertEqual(hedge_policy.hedge_rate, 1.0)
+        self.assertTrue(hedge_policy.hedge_wins <= 3)
+
+        obj.delete()
+
     def test_write(self):
         obj = self.container.create_object("test.txt")
         object_data = "data"
@@ -531,6 +1030,30 @@ class TestCloudfilesStorageObject(unittest.TestCase):
 
         self.container.delete_all_objects()
 
+    def test_write_compressed(self):
+        obj = self.container.create_object("test.json", compress=True)
+        object_data = '{"key": "value"}' * 1000
+        obj.write(object_data)
+        self.assertEqual(obj.content_encoding, "gzip")
+        self.assertTrue(obj.size < len(object_data))
+
+        self.assertEqual(obj.read(), object_data)
+        self.assertEqual("".join(obj.chunks(chunk_size=100)), object_data)
+        output = obj.read(output=StringIO.StringIO())
+        self.assertEqual(output.getvalue(), object_data)
+        self.assertNotEqual(obj.read(decompress=False), object_data)
+
+        obj = self.container.get_object("test.json")
+        self.assertEqual(obj.content_encoding, "gzip")
+
+        #incompressible content types should be written as is
+        obj = self.container.create_object("test.png", compress=True)
+        obj.write("data")
+        self.assertIsNone(obj.content_encoding)
+        self.assertEqual(obj.read(decompress=False), "data")
+
+        self.container.delete_objects(["test.json", "test.png"])
+
     def test_write_file_like(self):
         obj = self.container.create_object("test.txt")
         object_data = "data"
@@ -770,6 +1293,53 @@ class TestCloudfilesConnection(unittest.TestCase):
         self.container.delete_objects(object_names)
 
 
+class TestAsyncCloudfiles(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.cloudfiles = AsyncCloudfilesClient(
+                username="trdev",
+                password="B88mMJqh",
+                timeout=30,
+                retries=2,
+                servicenet=False,
+                num_threads=8,
+                debug_level=0)
+
+        cls.container_name = "tr_unittest_%s" % int(time.time())    
+        cls.container = cls.cloudfiles.create_container(
+                cls.container_name).result()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.container.delete_all_objects().result()
+        cls.container.delete().result()
+        cls.cloudfiles.shutdown()
+
+    def test_write_read(self):
+        object_names = ["%d.txt" % i for i in range(20)]
+        futures = []
+        for name in object_names:
+            obj = self.container.create_object(name)
+            futures.append(obj.write(name))
+        for future in futures:
+            future.result()
+
+        objects = [o for o in self.container.list_all_objects(batch_size=7)]
+        self.assertListEqual(sorted(object_names), [o["name"] for o in objects])
+
+        futures = [self.container.get_object(name) for name in object_names]
+        objects = [future.result() for future in futures]
+        futures = [obj.read() for obj in objects]
+        self.assertListEqual(object_names, [f.result() for f in futures])
+
+        chunks = [c for c in objects[0].chunks(chunk_size=1)]
+        self.assertListEqual(list(object_names[0]), chunks)
+
+        self.container.delete_objects(object_names).result()
+        self.assertListEqual([], self.container.list().result())
+
+
 class TestCloudfilesFactory(unittest.TestCase):
     
     @classmethod
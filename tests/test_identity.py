@@ -1,7 +1,11 @@
+import shutil
+import tempfile
+import threading
 import unittest
 import time
 
 import testbase
+from trrackspace.services.identity.cache import TokenCache
 from trrackspace.services.identity.client import IdentityServiceClient
 from trrackspace.services.identity.factory import IdentityServiceClientFactory
 
@@ -22,6 +26,89 @@ class TestIdentityService(unittest.TestCase):
     def test_list_users(self):
         users = self.identitysvc.list_users()
 
+    def test_concurrent_authenticate(self):
+        rest_client = self.identitysvc.rest_client
+        token_id = self.identitysvc.token.id
+        results = []
+
+        def authenticate():
+            headers = self.identitysvc.authenticate(rest_client, force=True)
+            results.append(headers["X-Auth-Token"])
+
+        threads = [threading.Thread(target=authenticate) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        #all callers should share the token from a single request
+        self.assertEqual(len(results), 10)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(results[0], self.identitysvc.token.id)
+
+class TestIdentityServiceTokenCache(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_directory = tempfile.mkdtemp()
+        cls.token_cache = TokenCache(cls.cache_directory)
+    
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.cache_directory)
+
+    def test_token_cache(self):
+        client = IdentityServiceClient(
+                username="trdev",
+                password="B88mMJqh",
+                timeout=5,
+                token_cache=self.token_cache,
+                debug_level=0)
+        self.assertIsNotNone(client.token.id)
+        self.assertFalse(client.token.is_expired())
+
+        access = self.token_cache.get(client.username, client.endpoint)
+        self.assertEqual(access["token"]["id"], client.token.id)
+
+        #cached token, user, and catalog should be reused
+        cached_client = IdentityServiceClient(
+                username="trdev",
+                password=None,
+                timeout=5,
+                token_cache=self.token_cache,
+                debug_level=0)
+        self.assertEqual(cached_client.token.id, client.token.id)
+        self.assertEqual(cached_client.user.id, client.user.id)
+        self.assertIsNotNone(cached_client.catalog.get_cloud_files())
+
+        self.token_cache.delete(client.username, client.endpoint)
+        self.assertIsNone(
+                self.token_cache.get(client.username, client.endpoint))
+
+class TestIdentityServiceTokenRefresh(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.identitysvc = IdentityServiceClient(
+                username="trdev",
+                password="B88mMJqh",
+                timeout=5,
+                token_refresh_margin=60,
+                debug_level=0)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.identitysvc.stop_refresh()
+
+    def test_refresh(self):
+        self.assertIsNotNone(self.identitysvc.token.expires_timestamp)
+        self.identitysvc.refresh()
+
+        rest_client = self.identitysvc.rest_client
+        self.assertEqual(rest_client.auth_headers["X-Auth-Token"],
+                self.identitysvc.token.id)
+        self.identitysvc.list_users()
+
 class TestIdentityServiceFacotry(unittest.TestCase):
     
     @classmethod
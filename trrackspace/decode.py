@@ -0,0 +1,104 @@
+import json
+
+class JSONArrayDecoder(object):
+    """Incremental decoder for JSON arrays.
+
+    Decodes the elements of a top level JSON array as they are read
+    from a file-like object, rather than reading and decoding the whole
+    document at once, so the first element is available as soon as it
+    has arrived, and memory use is bounded by the size of the largest
+    element rather than the size of the document.
+
+    Example usage:
+        for container in JSONArrayDecoder(response):
+            ...
+    """
+
+    WHITESPACE = " \t\n\r"
+    DELIMITERS = WHITESPACE + ",]"
+
+    def __init__(self, stream, chunk_size=65535, decoder=None):
+        """JSONArrayDecoder constructor
+
+        Args:
+            stream: file-like object of JSON data supporting read(size)
+            chunk_size: number of bytes to read at a time
+            decoder: optional json.JSONDecoder used to decode elements
+        """
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = decoder or json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def __iter__(self):
+        return self._decode()
+
+    def _read(self):
+        """Read more data into buffer, discarding consumed data.
+
+        Returns:
+            False if the stream is exhausted, True otherwise.
+        """
+        if self.eof:
+            return False
+
+        data = self.stream.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+
+        self.buffer = self.buffer[self.position:] + data
+        self.position = 0
+        return True
+
+    def _next_char(self):
+        """Skip whitespace and return next char without consuming it.
+
+        Returns:
+            next char, or None if the stream is exhausted.
+        """
+        while True:
+            while self.position < len(self.buffer) and \
+                    self.buffer[self.position] in self.WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._read():
+                return None
+
+    def _expect(self, chars):
+        char = self._next_char()
+        if char is None or char not in chars:
+            raise ValueError("Expecting one of %r at position %d: %r" % \
+                    (chars, self.position, char))
+        self.position += 1
+        return char
+
+    def _decode_value(self):
+        self._next_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                #a value not followed by a delimiter may be truncated,
+                #i.e. a number, so require the following data first.
+                if self.eof or (end < len(self.buffer) and
+                        self.buffer[end] in self.DELIMITERS):
+                    self.position = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            self._read()
+
+    def _decode(self):
+        self._expect("[")
+        if self._next_char() == "]":
+            self.position += 1
+            return
+
+        while True:
+            yield self._decode_value()
+            if self._expect(",]") == "]":
+                break
@@ -0,0 +1,297 @@
+import json
+import os
+import Queue
+import stat
+import sys
+import tarfile
+import threading
+import time
+
+from trpycore.chunk.basic import BasicChunker
+
+from trrackspace.threadpool import ThreadPool
+
+def directory_entries(path):
+    """Generator yielding (name, source) entries for a directory.
+
+    Args:
+        path: filesystem directory path
+    Returns:
+        Generator yielding (name, filesystem path) tuples for each file
+        below path, where name is the '/' separated path relative
+        to path.
+    """
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            file_path = os.path.join(dirpath, filename)
+            if not os.path.isfile(file_path):
+                continue
+            name = os.path.relpath(file_path, path)
+            yield name.replace(os.sep, "/"), file_path
+
+def entry_size(source, size=None):
+    """Returns size of entry source in bytes.
+
+    Args:
+        source: filesystem path or file-like object
+        size: optional size of source in bytes
+    Raises:
+        ValueError if size is not given and can not be determined,
+        i.e. for file-like objects which are not regular files read
+        from their start.
+    """
+    if size is not None:
+        return size
+    if isinstance(source, basestring):
+        return os.path.getsize(source)
+    try:
+        st = os.fstat(source.fileno())
+        if stat.S_ISREG(st.st_mode) and source.tell() == 0:
+            return st.st_size
+    except Exception:
+        pass
+    raise ValueError("size required for entry source: %r" % source)
+
+def normalize_entry(entry):
+    """Returns (name, source, size) tuple for a (name, source) or
+    (name, source, size) entry.
+
+    Raises:
+        ValueError if the entry's size can not be determined.
+    """
+    if len(entry) == 3:
+        name, source, size = entry
+    else:
+        name, source = entry
+        size = None
+    return name, source, entry_size(source, size)
+
+def split_entries(entries, max_entries=10000, max_bytes=1073741824):
+    """Generator splitting entries into groups, one per archive.
+
+    Args:
+        entries: iterable of (name, source) or (name, source, size)
+            entries
+        max_entries: max number of entries in each group
+        max_bytes: max number of source bytes in each group. A single
+            entry larger than max_bytes will be in a group of its own.
+    Returns:
+        Generator yielding lists of (name, source, size) entries
+    Raises:
+        ValueError if an entry's size can not be determined.
+    """
+    group, group_bytes = [], 0
+    for entry in entries:
+        name, source, size = normalize_entry(entry)
+        if group and (len(group) >= max_entries or
+                group_bytes + size > max_bytes):
+            yield group
+            group, group_bytes = [], 0
+        group.append((name, source, size))
+        group_bytes += size
+    if group:
+        yield group
+
+
+class _Pipe(object):
+    """Bounded in memory pipe from a writer thread to a reader thread."""
+
+    def __init__(self, max_chunks=16):
+        self.queue = Queue.Queue(max_chunks)
+        self.buffer = ""
+        self.eof = False
+        self.aborted = False
+
+    def write(self, data):
+        if self.aborted:
+            raise IOError("pipe closed by reader")
+        if data:
+            self.queue.put(data)
+
+    def close(self):
+        self.queue.put(None)
+
+    def read(self, size=-1):
+        while not self.eof and (size < 0 or len(self.buffer) < size):
+            data = self.queue.get()
+            if data is None:
+                self.eof = True
+            else:
+                self.buffer += data
+
+        if size < 0:
+            size = len(self.buffer)
+        result, self.buffer = self.buffer[:size], self.buffer[size:]
+        return result
+
+    def abort(self):
+        """Abort reading, unblocking the writer."""
+        self.aborted = True
+        while not self.eof:
+            try:
+                if self.queue.get_nowait() is None:
+                    self.eof = True
+            except Queue.Empty:
+                break
+
+
+class TarStream(object):
+    """File-like object of a tar archive built as it is read.
+
+    Entries are added to the archive by a background thread, which
+    writes it with tarfile in stream mode into a bounded pipe, so
+    memory use is bounded regardless of the number and size of the
+    entries, and the archive is never written to disk.
+
+    Entry sources may be filesystem paths or file-like objects, which
+    are streamed into the archive. The size of a file-like object is
+    taken from its file descriptor if it is a regular file read from
+    its start, otherwise it must be given as a (name, source, size)
+    entry.
+    """
+
+    def __init__(self, entries, compress=True, max_chunks=16):
+        """TarStream constructor
+
+        Args:
+            entries: iterable of (name, source) or (name, source, size)
+                entries
+            compress: boolean indicating if the archive should be
+                gzip compressed
+            max_chunks: max number of written, but not yet read,
+                chunks buffered in the pipe.
+        """
+        self.mode = "w|gz" if compress else "w|"
+        self.pipe = _Pipe(max_chunks)
+        self.exc_info = None
+        self.thread = threading.Thread(target=self._run, args=(entries,),
+                name="TarStream")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _add(self, tar, name, source, size):
+        if isinstance(name, unicode):
+            name = name.encode("utf-8")
+
+        if isinstance(source, basestring):
+            tarinfo = tar.gettarinfo(source, arcname=name)
+            tarinfo.size = size
+            with open(source, "rb") as fileobj:
+                tar.addfile(tarinfo, fileobj)
+            return
+
+        tarinfo = tarfile.TarInfo(name)
+        tarinfo.mtime = time.time()
+        tarinfo.size = size
+        tar.addfile(tarinfo, source)
+
+    def _run(self, entries):
+        try:
+            tar = tarfile.open(fileobj=self.pipe, mode=self.mode)
+            for entry in entries:
+                self._add(tar, *normalize_entry(entry))
+            tar.close()
+        except Exception:
+            self.exc_info = sys.exc_info()
+        finally:
+            self.pipe.close()
+
+    def read(self, size=-1):
+        """Read up to size bytes of the archive.
+
+        Raises:
+            Exception raised while building the archive, rather than
+            returning a truncated archive.
+        """
+        data = self.pipe.read(size)
+        if not data and self.exc_info is not None:
+            raise self.exc_info[0], self.exc_info[1], self.exc_info[2]
+        return data
+
+    def close(self):
+        """Stop building the archive."""
+        self.pipe.abort()
+
+
+class ArchiveUploader(object):
+    """Upload entries to a container through extract archive requests.
+
+    Entries are split into archives of up to max_entries entries and
+    max_bytes source bytes, which are built on the fly with TarStream
+    and uploaded by up to threads concurrent chunked PUT requests.
+    Entries are pulled from the given iterable as archives are started,
+    so it may be a generator.
+    """
+
+    def __init__(self, container, compress=True, max_entries=10000,
+            max_bytes=1073741824, threads=4, chunk_size=65535):
+        """ArchiveUploader constructor
+
+        Args:
+            container: Container object
+            compress: boolean indicating if archives should be
+                gzip compressed
+            max_entries: max number of entries in each archive
+            max_bytes: max number of source bytes in each archive
+            threads: max number of concurrent extract archive requests
+            chunk_size: chunk size to use in HTTP data xfer
+        """
+        self.container = container
+        self.compress = compress
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.threads = threads
+        self.chunk_size = chunk_size
+
+    def upload_archive(self, entries):
+        """Upload entries as a single archive.
+
+        Args:
+            entries: iterable of (name, source) or (name, source, size)
+                entries
+        Returns:
+            Extract archive result dict
+        Raises:
+            ResponseError, RackspaceError
+        """
+        headers = {"Accept": "application/json"}
+        params = {"extract-archive": ".tar.gz" if self.compress else ".tar"}
+
+        stream = TarStream(entries, compress=self.compress)
+        try:
+            response_context = self.container.client.cloudfiles.send_request(
+                    "PUT", self.container.path, data=BasicChunker(stream),
+                    headers=headers, params=params,
+                    chunk_size=self.chunk_size)
+            with response_context as response:
+                return json.loads(response.read())
+        finally:
+            stream.close()
+
+    def upload(self, entries):
+        """Upload entries.
+
+        Args:
+            entries: iterable of (name, source) or (name, source, size)
+                entries
+        Returns:
+            Extract archive result dict with the total
+            'Number Files Created' and all 'Errors' of each archive.
+        Raises:
+            ResponseError, RackspaceError
+        """
+        result = {"Number Files Created": 0, "Errors": []}
+        groups = split_entries(entries, self.max_entries, self.max_bytes)
+
+        thread_pool = ThreadPool(self.threads, name="ArchiveUploader")
+        try:
+            for group, future in thread_pool.imap_unordered(
+                    self.upload_archive, groups, max_pending=self.threads):
+                archive_result = future.result()
+                result["Number Files Created"] += \
+                        archive_result.get("Number Files Created", 0)
+                result["Errors"].extend(archive_result.get("Errors") or [])
+        finally:
+            thread_pool.shutdown(wait=False)
+        return result
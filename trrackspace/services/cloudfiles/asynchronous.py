@@ -0,0 +1,374 @@
+from trrackspace.threadpool import ThreadPool
+from trrackspace.services.cloudfiles.client import CloudfilesClient
+
+class AsyncCloudfilesClient(object):
+    """Asynchronous Rackspace Cloudfiles API Client
+
+    AsyncCloudfilesClient mirrors the CloudfilesClient, AsyncContainer,
+    and AsyncStorageObject method surface, but methods performing I/O
+    return a Future immediately rather than blocking. Requests are
+    executed by a shared pool of worker threads over the CloudfilesClient's
+    pooled connections, and share its IdentityServiceClient for token
+    handling, so a single client can drive many concurrent operations.
+
+    Example usage:
+        client = AsyncCloudfilesClient(username="user", api_key="...",
+                num_threads=64)
+        container = client.get_container("name").result()
+        futures = [container.create_object(n).write(d) for n, d in items]
+        for future in futures:
+            future.result()
+    """
+
+    def __init__(self, client=None, num_threads=32, **kwargs):
+        """AsyncCloudfilesClient constructor
+
+        Args:
+            client: optional CloudfilesClient to use. If not given one
+                will be created using kwargs, with a connection pool_size
+                matching num_threads unless otherwise specified.
+            num_threads: number of worker threads executing requests.
+            kwargs: CloudfilesClient constructor arguments
+        """
+        self.owns_client = client is None
+        if client is None:
+            kwargs.setdefault("pool_size", num_threads)
+            client = CloudfilesClient(**kwargs)
+
+        self.client = client
+        self.thread_pool = ThreadPool(num_threads,
+                name="AsyncCloudfilesClient")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def submit(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) in a worker thread.
+
+        Returns:
+            Future
+        """
+        return self.thread_pool.submit(func, *args, **kwargs)
+
+    def shutdown(self, wait=True):
+        """Stop worker threads once submitted requests are complete.
+
+        The CloudfilesClient is also closed if it was created by this
+        client and wait is True.
+        """
+        self.thread_pool.shutdown(wait)
+        if self.owns_client and wait:
+            self.client.close()
+
+    def list_containers(self, limit=None, marker=None):
+        """List Cloudfiles containers
+
+        Returns:
+            Future resolving to list of container info dicts
+        """
+        return self.submit(self.client.list_containers,
+                limit=limit, marker=marker)
+
+    def list_cdn_containers(self, limit=None, marker=None):
+        """List Cloudfiles containers with CDN access enabled
+
+        Returns:
+            Future resolving to list of cdn container info dicts
+        """
+        return self.submit(self.client.list_cdn_containers,
+                limit=limit, marker=marker)
+
+    def create_container(self, name):
+        """Create Cloudfiles Container
+
+        Returns:
+            Future resolving to AsyncContainer
+        """
+        def create_container():
+            return AsyncContainer(self, self.client.create_container(name))
+        return self.submit(create_container)
+
+    def get_container(self, name, cdn_enabled=True):
+        """Get Cloudfiles container
+
+        Returns:
+            Future resolving to AsyncContainer
+        """
+        def get_container():
+            container = self.client.get_container(
+                    name, cdn_enabled=cdn_enabled)
+            return AsyncContainer(self, container)
+        return self.submit(get_container)
+
+    def delete_container(self, name):
+        """Delete empty Cloudfiles container.
+
+        Returns:
+            Future
+        """
+        return self.submit(self.client.delete_container, name)
+
+
+class AsyncContainer(object):
+    """Asynchronous Cloudfiles Container object
+
+    Wraps a Container, executing its requests in the AsyncCloudfilesClient
+    worker threads. This class should not be constructed manually, instead
+    AsyncCloudfilesClient's create_container() or get_container() should
+    be used.
+    """
+
+    def __init__(self, async_client, container):
+        """AsyncContainer constructor.
+
+        Args:
+            async_client: AsyncCloudfilesClient object
+            container: Container object
+        """
+        self.async_client = async_client
+        self.container = container
+
+    @property
+    def name(self):
+        return self.container.name
+
+    def submit(self, func, *args, **kwargs):
+        return self.async_client.submit(func, *args, **kwargs)
+
+    def load(self):
+        """Load container data and metadata
+
+        Returns:
+            Future
+        """
+        return self.submit(self.container.load)
+
+    def list(self, prefix=None, limit=None,
+            marker=None, end_marker=None, delimiter=None):
+        """List container storage objects by name
+
+        Returns:
+            Future resolving to list of storage object names
+        """
+        return self.submit(self.container.list, prefix=prefix, limit=limit,
+                marker=marker, end_marker=end_marker, delimiter=delimiter)
+
+    def list_objects(self, prefix=None, limit=None,
+            marker=None, end_marker=None, delimiter=None):
+        """List container storage objects with info
+
+        Returns:
+            Future resolving to list of storage object info dicts
+        """
+        return self.submit(self.container.list_objects, prefix=prefix,
+                limit=limit, marker=marker, end_marker=end_marker,
+                delimiter=delimiter)
+
+    def list_all_objects(self, prefix=None, delimiter=None, batch_size=1000):
+        """List all container storage objects with info
+
+        Batches are fetched by a worker thread one batch ahead of the
+        consumer, so iteration does not stall on every batch boundary.
+
+        Returns:
+            Generator yielding storage object info dicts
+        """
+        return self.async_client.thread_pool.prefetch(
+                self.container.list_all_objects(prefix=prefix,
+                    delimiter=delimiter, batch_size=batch_size),
+                depth=batch_size)
+
+    def create_object(self, name, content_type=None,
+            metadata=None, cors=None, delete_at_timestamp=None,
+            compress=False):
+        """Create a Cloudfiles storage object.
+
+        Note that no request is made until AsyncStorageObject.write()
+        is invoked.
+
+        Returns:
+            AsyncStorageObject
+        """
+        storage_object = self.container.create_object(name,
+                content_type=content_type, metadata=metadata, cors=cors,
+                delete_at_timestamp=delete_at_timestamp, compress=compress)
+        return AsyncStorageObject(self, storage_object)
+
+    def get_object(self, name):
+        """Get storage object
+
+        Returns:
+            Future resolving to AsyncStorageObject
+        """
+        def get_object():
+            return AsyncStorageObject(self, self.container.get_object(name))
+        return self.submit(get_object)
+
+    def delete_object(self, name):
+        """Delete storage object
+
+        Returns:
+            Future
+        """
+        return self.submit(self.container.delete_object, name)
+
+    def delete_objects(self, names, batch_size=10000, threads=4, retries=2):
+        """Delete multiple storage objects using bulk delete
+
+        Returns:
+            Future
+        """
+        return self.submit(self.container.delete_objects, names,
+                batch_size=batch_size,
+                threads=threads,
+                retries=retries)
+
+    def delete_all_objects(self, batch_size=10000, threads=4, retries=2,
+            prefix=None):
+        """Delete all storage objects in the container
+
+        Returns:
+            Future
+        """
+        return self.submit(self.container.delete_all_objects,
+                batch_size=batch_size,
+                threads=threads,
+                retries=retries,
+                prefix=prefix)
+
+    def delete(self):
+        """Delete empty container.
+
+        Returns:
+            Future
+        """
+        return self.submit(self.container.delete)
+
+    def update_metadata(self, metadata):
+        """Update container metadata
+
+        Returns:
+            Future
+        """
+        return self.submit(self.container.update_metadata, metadata)
+
+
+class AsyncStorageObject(object):
+    """Asynchronous Cloudfiles storage object
+
+    Wraps a StorageObject, executing its requests in the
+    AsyncCloudfilesClient worker threads.
+    """
+
+    def __init__(self, async_container, storage_object):
+        """AsyncStorageObject constructor
+
+        Args:
+            async_container: AsyncContainer object
+            storage_object: StorageObject object
+        """
+        self.async_container = async_container
+        self.storage_object = storage_object
+
+    @property
+    def name(self):
+        return self.storage_object.name
+
+    def submit(self, func, *args, **kwargs):
+        return self.async_container.submit(func, *args, **kwargs)
+
+    def load(self):
+        """Load storage object data and metadata
+
+        Returns:
+            Future
+        """
+        return self.submit(self.storage_object.load)
+
+    def read(self, size=None, offset=0, output=None, output_chunk_size=65535):
+        """Read storage object data
+
+        Returns:
+            Future resolving to read data or output object if given.
+        """
+        return self.submit(self.storage_object.read, size=size,
+                offset=offset, output=output,
+                output_chunk_size=output_chunk_size)
+
+    def chunks(self, chunk_size=65535, size=None, offset=0, depth=1):
+        """Return generator yielding chunk_size buffers of read data.
+
+        Chunks are read by a worker thread up to depth chunks ahead
+        of the consumer.
+
+        Returns:
+            Generator yielding chunk_size buffers of data
+        """
+        return self.async_container.async_client.thread_pool.prefetch(
+                self.storage_object.chunks(chunk_size=chunk_size,
+                    size=size, offset=offset),
+                depth=depth)
+
+    def write(self, data, data_size=None, verify=True, chunk_size=65535):
+        """Write data to storage object.
+
+        Returns:
+            Future
+        """
+        return self.submit(self.storage_object.write, data,
+                data_size=data_size, verify=verify, chunk_size=chunk_size)
+
+    def update_metadata(self, metadata):
+        """Update storage object metadata
+
+        Returns:
+            Future
+        """
+        return self.submit(self.storage_object.update_metadata, metadata)
+
+    def copy_to(self, destination, container=None):
+        """Copy object's data to another storage object
+
+        Args:
+            destination: StorageObject, AsyncStorageObject or storage
+                object name of destination
+            container: optional destination Container or AsyncContainer
+                if different from current container
+        Returns:
+            Future
+        """
+        if isinstance(destination, AsyncStorageObject):
+            destination = destination.storage_object
+        if isinstance(container, AsyncContainer):
+            container = container.container
+        return self.submit(self.storage_object.copy_to,
+                destination, container=container)
+
+    def copy_from(self, source, container=None):
+        """Copy data to this object from another storage object
+
+        Args:
+            source: StorageObject, AsyncStorageObject or storage
+                object name of source
+            container: optional source Container or AsyncContainer
+                if different from current container
+        Returns:
+            Future
+        """
+        if isinstance(source, AsyncStorageObject):
+            source = source.storage_object
+        if isinstance(container, AsyncContainer):
+            container = container.container
+        return self.submit(self.storage_object.copy_from,
+                source, container=container)
+
+    def delete(self):
+        """Delete storage object.
+
+        Returns:
+            Future
+        """
+        return self.submit(self.storage_object.delete)
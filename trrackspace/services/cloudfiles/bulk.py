@@ -0,0 +1,237 @@
+import httplib
+import itertools
+import json
+import logging
+import socket
+import sys
+import threading
+import time
+import urllib
+
+from trhttp.errors import HttpError
+
+from trrackspace.threadpool import ThreadPool
+
+log = logging.getLogger(__name__)
+
+class BulkDeleteResult(object):
+    """Bulk delete result.
+
+    Cloudfiles bulk delete responses only include the number of deleted
+    and not found paths, along with the paths which failed. If a batch
+    contains both deleted and not found paths, it is unknown which were
+    which, so they are reported as ambiguous. Names are also reported as
+    ambiguous if the counts do not account for them, i.e. if an error
+    path could not be mapped back to its name. Either way, none of the
+    deleted, not_found, or ambiguous objects exist following the delete.
+    """
+
+    def __init__(self):
+        self.deleted = []
+        self.not_found = []
+        self.ambiguous = []
+        self.errors = []
+        self.number_deleted = 0
+        self.number_not_found = 0
+
+    def __repr__(self):
+        return "%s(deleted=%d, not_found=%d, errors=%d)" % \
+                (self.__class__, self.number_deleted,
+                 self.number_not_found, len(self.errors))
+
+    @property
+    def succeeded(self):
+        """Returns True if no paths failed to be deleted."""
+        return not self.errors
+
+    def update(self, other):
+        """Merge other BulkDeleteResult into this one."""
+        self.deleted.extend(other.deleted)
+        self.not_found.extend(other.not_found)
+        self.ambiguous.extend(other.ambiguous)
+        self.errors.extend(other.errors)
+        self.number_deleted += other.number_deleted
+        self.number_not_found += other.number_not_found
+
+
+class BulkDeleter(object):
+    """Delete container storage objects with concurrent bulk deletes.
+
+    Names are split into batches of up to batch_size, which are deleted
+    by up to threads concurrent bulk delete requests. Names are pulled
+    from the given iterable as batches are sent, so it may be a
+    generator, i.e. a container listing.
+
+    Paths failing with a retryable status, as well as batches whose
+    request failed entirely, are retried with exponential backoff.
+    """
+
+    MAX_BATCH_SIZE = 10000
+    RETRY_STATUSES = frozenset([409, 429, 498, 500, 502, 503, 504])
+    RETRY_EXCEPTIONS = (socket.error, httplib.HTTPException)
+
+    def __init__(self, container, batch_size=10000, threads=4,
+            retries=2, backoff=0.5):
+        """BulkDeleter constructor
+
+        Args:
+            container: Container object
+            batch_size: max number of paths in each bulk delete request.
+                The number cannot exceed 10,000.
+            threads: max number of concurrent bulk delete requests
+            retries: number of times failed paths will be retried
+            backoff: base retry backoff in seconds
+        """
+        self.container = container
+        self.batch_size = min(batch_size, self.MAX_BATCH_SIZE)
+        self.threads = threads
+        self.retries = retries
+        self.backoff = backoff
+
+    def _path(self, name):
+        container_name = self.container.name
+        if isinstance(container_name, unicode):
+            container_name = container_name.encode("utf-8")
+        if isinstance(name, unicode):
+            name = name.encode("utf-8")
+        return "%s/%s" % (container_name, name)
+
+    def _status(self, status):
+        """Returns integer status from a bulk delete status string,
+        i.e. '409 Conflict'."""
+        try:
+            return int(str(status).split()[0])
+        except (ValueError, IndexError):
+            return None
+
+    def delete_batch(self, names):
+        """Delete a single batch of names with a bulk delete request.
+
+        Args:
+            names: list of storage object names
+        Returns:
+            BulkDeleteResult
+        Raises:
+            ResponseError, RackspaceError
+        """
+        paths = dict((self._path(name), name) for name in names)
+        data = "\n".join(urllib.quote(path) for path in paths)
+        headers = {"Accept": "application/json"}
+        params = {"bulk-delete": "True"}
+
+        response_context = self.container.client.cloudfiles.send_request(
+                "DELETE", self.container.path, data=data,
+                headers=headers, params=params)
+        with response_context as response:
+            response_data = json.loads(response.read())
+
+        result = BulkDeleteResult()
+        errors = response_data.get("Errors") or []
+        response_status = response_data.get("Response Status")
+        status = self._status(response_status)
+
+        result.number_deleted = response_data.get("Number Deleted", 0)
+        result.number_not_found = response_data.get("Number Not Found", 0)
+
+        #a request failing as a whole, i.e. 413 or 5xx, is reported in
+        #the response body without per path errors, so fail every path.
+        if status is not None and not 200 <= status < 300 and not errors:
+            result.errors = [(name, response_status) for name in names]
+            return result
+
+        failed = set()
+        for path, status in errors:
+            if isinstance(path, unicode):
+                path = path.encode("utf-8")
+            name = paths.get(urllib.unquote(path).lstrip("/"), path)
+            result.errors.append((name, status))
+            failed.add(name)
+
+        #only report names as deleted or not found if the counts account
+        #for them, i.e. not if an error path could not be mapped back.
+        succeeded = [name for name in names if name not in failed]
+        if not result.number_not_found and \
+                len(succeeded) == result.number_deleted:
+            result.deleted = succeeded
+        elif not result.number_deleted and \
+                len(succeeded) == result.number_not_found:
+            result.not_found = succeeded
+        else:
+            result.ambiguous = succeeded
+        return result
+
+    def _delete_batch_with_retries(self, names):
+        result = BulkDeleteResult()
+        attempt = 0
+        while True:
+            try:
+                batch_result = self.delete_batch(names)
+            except (HttpError,) + self.RETRY_EXCEPTIONS as error:
+                status = getattr(error, "status", None)
+                if attempt >= self.retries or \
+                        (status is not None and
+                         status not in self.RETRY_STATUSES):
+                    raise
+                log.warning("retrying bulk delete: %r" % error)
+                batch_result = None
+
+            if batch_result is not None:
+                retry = [(name, status) for name, status in batch_result.errors
+                        if self._status(status) in self.RETRY_STATUSES]
+                if attempt >= self.retries or not retry:
+                    result.update(batch_result)
+                    return result
+
+                batch_result.errors = [error for error in batch_result.errors
+                        if error not in retry]
+                result.update(batch_result)
+                names = [name for name, status in retry]
+                log.warning("retrying bulk delete of %d paths" % len(names))
+
+            time.sleep(self.backoff * (2 ** attempt))
+            attempt += 1
+
+    def _batches(self, names):
+        names = iter(names)
+        while True:
+            batch = list(itertools.islice(names, self.batch_size))
+            if not batch:
+                break
+            yield batch
+
+    def delete(self, names):
+        """Delete names.
+
+        Args:
+            names: iterable of storage object names
+        Returns:
+            BulkDeleteResult
+        Raises:
+            ResponseError, RackspaceError if a bulk delete request
+            failed after retries. Batches in flight are completed,
+            and batches not yet started are skipped, before raising.
+        """
+        result = BulkDeleteResult()
+        aborted = threading.Event()
+
+        def delete_batch(batch):
+            if aborted.is_set():
+                return None
+            return self._delete_batch_with_retries(batch)
+
+        thread_pool = ThreadPool(self.threads, name="BulkDeleter")
+        try:
+            for batch, future in thread_pool.imap_unordered(
+                    delete_batch,
+                    self._batches(names),
+                    max_pending=self.threads):
+                result.update(future.result())
+        except:
+            #no deletes may happen after the caller sees the error
+            exc_info = sys.exc_info()
+            aborted.set()
+            thread_pool.shutdown(wait=True)
+            raise exc_info[0], exc_info[1], exc_info[2]
+        finally:
+            thread_pool.shutdown(wait=False)
+        return result
@@ -0,0 +1,89 @@
+import collections
+import threading
+import time
+
+class ContainerCache(object):
+    """TTL and size bounded LRU cache of Container objects.
+
+    Caching containers saves the storage and CDN HEAD requests made
+    by CloudfilesClient.get_container(). Entries expire ttl seconds
+    after they are cached, and the least recently used entry is evicted
+    once max_size entries are cached. CloudfilesClient and Container
+    invalidate entries on their own mutating calls, but changes made by
+    other clients, as well as object counts and bytes used, may be up
+    to ttl seconds stale.
+
+    Note that cached Container objects are shared by all callers.
+
+    Example usage:
+        client = CloudfilesClient(username="user", api_key="...",
+                container_cache=ContainerCache(ttl=60))
+    """
+
+    def __init__(self, ttl=60, max_size=1000):
+        """ContainerCache constructor
+
+        Args:
+            ttl: number of seconds containers are cached for
+            max_size: max number of cached containers
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+        #counters
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, name, cdn_enabled=True):
+        """Get cached container.
+
+        Args:
+            name: Container name
+            cdn_enabled: cdn_enabled flag the container was fetched with
+        Returns:
+            Container or None if not cached or expired.
+        """
+        key = (name, cdn_enabled)
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is None or entry[0] <= time.time():
+                self.misses += 1
+                return None
+            #reinsert as most recently used
+            self.entries[key] = entry
+            self.hits += 1
+            return entry[1]
+
+    def put(self, container, cdn_enabled=True):
+        """Cache container.
+
+        Args:
+            container: Container object
+            cdn_enabled: cdn_enabled flag the container was fetched with
+        """
+        key = (container.name, cdn_enabled)
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (time.time() + self.ttl, container)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, name):
+        """Remove container from cache.
+
+        Args:
+            name: Container name
+        """
+        with self.lock:
+            self.entries.pop((name, True), None)
+            self.entries.pop((name, False), None)
+
+    def clear(self):
+        """Remove all containers from cache."""
+        with self.lock:
+            self.entries.clear()
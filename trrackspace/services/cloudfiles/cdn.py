@@ -0,0 +1,80 @@
+import threading
+import time
+
+class CdnDirectory(object):
+    """Directory of CDN container attributes indexed by container name.
+
+    The directory is built by paging through
+    CloudfilesClient.list_cdn_containers(), and is refreshed lazily once
+    it is older than ttl seconds, so that Container.load() can resolve
+    cdn_uri, cdn_ssl_uri, cdn_streaming_uri, ttl and log retention
+    without a CDN HEAD request per container. Containers whose CDN status
+    is changed by other clients may be up to ttl seconds stale.
+
+    Example usage:
+        client = CloudfilesClient(username="user", api_key="...",
+                cdn_directory=CdnDirectory(ttl=300))
+    """
+
+    def __init__(self, ttl=300, batch_size=10000):
+        """CdnDirectory constructor
+
+        Args:
+            ttl: number of seconds after which the directory is refreshed
+            batch_size: number of cdn containers to list with each
+                request. The number cannot exceed 10,000.
+        """
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.containers = {}
+        self.expires = 0
+        self.lock = threading.Lock()
+
+    def refresh(self, client):
+        """Rebuild directory from the cdn container listing.
+
+        Args:
+            client: CloudfilesClient
+        Raises:
+            ResponseError, RackspaceError
+        """
+        containers = {}
+        marker = None
+        while True:
+            infos = client.list_cdn_containers(
+                    limit=self.batch_size, marker=marker)
+            for info in infos:
+                containers[info["name"]] = info
+            if len(infos) < self.batch_size:
+                break
+            marker = infos[-1]["name"].encode("utf-8")
+
+        self.containers = containers
+        self.expires = time.time() + self.ttl
+
+    def invalidate(self):
+        """Force a refresh on the next lookup."""
+        self.expires = 0
+
+    def get(self, client, name):
+        """Get cdn container info, refreshing the directory if needed.
+
+        Args:
+            client: CloudfilesClient
+            name: Container name, unicode or utf-8 encoded str
+        Returns:
+            cdn container info dict, as returned from
+            CloudfilesClient.list_cdn_containers(), or None if the
+            container has never been cdn enabled.
+        Raises:
+            ResponseError, RackspaceError
+        """
+        if self.expires <= time.time():
+            with self.lock:
+                if self.expires <= time.time():
+                    self.refresh(client)
+
+        #listing names are decoded from json as unicode
+        if isinstance(name, str):
+            name = name.decode("utf-8")
+        return self.containers.get(name)
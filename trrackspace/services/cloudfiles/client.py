@@ -1,10 +1,16 @@
+import functools
 import json
+import threading
 
 from trhttp.rest.client import RestClient
 
+from trrackspace.decode import JSONArrayDecoder
 from trrackspace.errors import to_error
 from trrackspace.services.identity.client import IdentityServiceClient
 from trrackspace.services.cloudfiles.container import Container
+from trrackspace.services.cloudfiles.failover import CircuitBreaker, \
+        Endpoint, EndpointSelector
+from trrackspace.services.cloudfiles.pool import RestClientPool
 
 class CloudfilesClient(object):
     """Rackspace Cloudfiles API Client
@@ -21,8 +27,14 @@ class CloudfilesClient(object):
         or
         identity_client = IdentityServiceClient(username="user", password="...")
         client = CloudfilesClient(identity_client=identity_client)
+        or
+        client = CloudfilesClient(username="user", api_key="...", lazy=True)
     """
 
+    #account attributes set by load()
+    ACCOUNT_ATTRIBUTES = ["object_count", "bytes_used", "container_count",
+            "metadata"]
+
     def __init__(self,
             username=None,
             api_key=None,
@@ -36,6 +48,20 @@ class CloudfilesClient(object):
             keepalive=True,
             proxy=None,
             rest_client_class=RestClient,
+            token_cache=None,
+            token_refresh_margin=None,
+            catalog=None,
+            token=None,
+            lazy=False,
+            pool_size=10,
+            pool_max_idle=None,
+            pool_timeout=None,
+            retry_policy=None,
+            failover=False,
+            failover_probe_interval=30,
+            hedge_policy=None,
+            container_cache=None,
+            cdn_directory=None,
             debug_level=0):
         """CloudfilesClient constructor
 
@@ -74,53 +100,198 @@ class CloudfilesClient(object):
             proxy: (host, port) tuple specifying proxy for connection
             rest_client_class: optional RestClient class. If not 
                 specified sensible default will be used.
+            token_cache: optional TokenCache object used by the
+                IdentityServiceClient to persist and reuse tokens across
+                processes. This argument is ignored if an identity_client
+                argument is used.
+            token_refresh_margin: optional number of seconds prior to
+                token expiration at which the IdentityServiceClient
+                should renew the token in a background thread. This
+                argument is ignored if an identity_client argument is used.
+            catalog: optional ServiceCatalog, i.e. loaded from a
+                snapshot with ServiceCatalog.from_file(), used by the
+                IdentityServiceClient for endpoint lookups. If provided
+                along with token and region, no identity request will be
+                made until the token is expired or rejected. This argument
+                is ignored if an identity_client argument is used.
+            token: optional Token object or token id to be used by the
+                IdentityServiceClient. This argument is ignored if an
+                identity_client argument is used.
+            lazy: boolean indicating that authentication, rest client
+                setup, and loading of account data should be deferred
+                until first use. By default, all of these are done
+                upon construction.
+            pool_size: maximum number of concurrent connections to each
+                of the cloudfiles and cloudfiles CDN servers. Connections
+                are created on demand, so this only needs to be raised
+                when sharing the client between multiple threads.
+            pool_max_idle: optional number of seconds after which idle
+                pooled connections are closed rather than reused.
+            pool_timeout: optional number of seconds to wait for a
+                pooled connection when all are in use, after which
+                PoolTimeoutError is raised. By default requests wait
+                indefinitely.
+            retry_policy: optional RetryPolicy used to retry throttled
+                and failed cloudfiles and cloudfiles CDN requests with
+                backoff. Without a policy, requests are only retried
+                immediately by the RestClient, as determined by retries.
+                Each attempt of the policy is also retried by the
+                RestClient, so retries=0 should usually be used with it.
+            failover: boolean indicating that both the servicenet and
+                public cloudfiles endpoints should be used, routing requests
+                to the healthy, faster one and failing over automatically
+                when one becomes unavailable. The endpoint selected by
+                servicenet is preferred.
+            failover_probe_interval: number of seconds between background
+                endpoint health and latency probes when failover is
+                enabled. If None, no probes will be sent.
+            hedge_policy: optional HedgePolicy used to hedge storage
+                object reads, sending a duplicate GET on another pooled
+                connection when a response is slow to arrive. Reads
+                are only hedged if this is set.
+            container_cache: optional ContainerCache used by
+                get_container() to reuse recently fetched Container
+                objects rather than issuing HEAD requests.
+            cdn_directory: optional CdnDirectory used by Container
+                objects to resolve their CDN attributes from a periodic
+                cdn container listing rather than a CDN HEAD request.
             debug_level: httplib debug level. Setting this to 1 will log
                 http requests and responses which is very useful for 
                 debugging.
         """
         
-        self.identity_client = identity_client
-        self.object_count = 0
-        self.bytes_used = 0
-        self.container_count = 0
-        self.metadata = {}
+        self._identity_client = identity_client
+        self._region = region
+        self._cloudfiles = None
+        self._cloudfiles_cdn = None
+        self._lock = threading.RLock()
+        self.lazy = lazy
+        self.hedge_policy = hedge_policy
+        self.container_cache = container_cache
+        self.cdn_directory = cdn_directory
         
-        if self.identity_client is None:
-            self.identity_client = identity_client_class(
-                    username=username,
-                    api_key=api_key,
-                    password=password,
-                    timeout=timeout,
-                    retries=retries,
-                    keepalive=keepalive,
-                    proxy=proxy,
-                    rest_client_class=rest_client_class,
-                    debug_level=debug_level)
+        #object_count, bytes_used, container_count and metadata are
+        #set by load(), which __getattr__ invokes on first access.
+        self._account_loaded = False
         
-        self.region = region or self.identity_client.user.default_region
+        self._create_identity_client = functools.partial(
+                identity_client_class,
+                username=username,
+                api_key=api_key,
+                password=password,
+                timeout=timeout,
+                retries=retries,
+                keepalive=keepalive,
+                proxy=proxy,
+                rest_client_class=rest_client_class,
+                token_cache=token_cache,
+                token_refresh_margin=token_refresh_margin,
+                catalog=catalog,
+                token=token,
+                debug_level=debug_level)
         
-        self.cloudfiles = Cloudfiles(
-                region=self.region,
+        self._create_cloudfiles = functools.partial(
+                Cloudfiles,
                 servicenet=servicenet,
-                identity_client=self.identity_client,
                 timeout=timeout,
                 retries=retries,
                 keepalive=keepalive,
                 proxy=proxy,
                 rest_client_class=rest_client_class,
+                pool_size=pool_size,
+                pool_max_idle=pool_max_idle,
+                pool_timeout=pool_timeout,
+                retry_policy=retry_policy,
+                failover=failover,
+                failover_probe_interval=failover_probe_interval,
+                hedge_policy=hedge_policy,
                 debug_level=debug_level)
 
-        self.cloudfiles_cdn = CloudfilesCdn(
-                region=self.region,
-                identity_client=self.identity_client,
+        self._create_cloudfiles_cdn = functools.partial(
+                CloudfilesCdn,
                 timeout=timeout,
                 retries=retries,
                 keepalive=keepalive,
                 proxy=proxy,
                 rest_client_class=rest_client_class,
+                pool_size=pool_size,
+                pool_max_idle=pool_max_idle,
+                pool_timeout=pool_timeout,
+                retry_policy=retry_policy,
                 debug_level=debug_level)
 
-        self.load()
+        if not self.lazy:
+            self.cloudfiles
+            self.cloudfiles_cdn
+            self.load()
+    
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Stop failover health probes and close pooled connections.
+
+        Clients created with failover run a background health probe
+        thread, so they should be closed once no longer needed.
+        """
+        with self._lock:
+            cloudfiles, self._cloudfiles = self._cloudfiles, None
+            cloudfiles_cdn, self._cloudfiles_cdn = self._cloudfiles_cdn, None
+        if cloudfiles is not None:
+            cloudfiles.close()
+        if cloudfiles_cdn is not None:
+            cloudfiles_cdn.close()
+
+    @property
+    def identity_client(self):
+        """Returns IdentityServiceClient, creating it if needed."""
+        if self._identity_client is None:
+            with self._lock:
+                if self._identity_client is None:
+                    self._identity_client = self._create_identity_client()
+        return self._identity_client
+
+    @property
+    def region(self):
+        """Returns datacenter region, authenticating if needed."""
+        if self._region is None:
+            self._region = self.identity_client.user.default_region
+        return self._region
+
+    @property
+    def cloudfiles(self):
+        """Returns Cloudfiles rest client, creating it if needed."""
+        if self._cloudfiles is None:
+            with self._lock:
+                if self._cloudfiles is None:
+                    self._cloudfiles = self._create_cloudfiles(
+                            region=self.region,
+                            identity_client=self.identity_client)
+        return self._cloudfiles
+
+    @property
+    def cloudfiles_cdn(self):
+        """Returns CloudfilesCdn rest client, creating it if needed."""
+        if self._cloudfiles_cdn is None:
+            with self._lock:
+                if self._cloudfiles_cdn is None:
+                    self._cloudfiles_cdn = self._create_cloudfiles_cdn(
+                            region=self.region,
+                            identity_client=self.identity_client)
+        return self._cloudfiles_cdn
+
+    def __getattr__(self, name):
+        #only invoked for missing attributes, i.e. account attributes
+        #which have not been loaded yet.
+        if name in self.ACCOUNT_ATTRIBUTES and \
+                not self.__dict__.get("_account_loaded"):
+            self.load()
+            return getattr(self, name)
+        raise AttributeError("%r object has no attribute %r" % \
+                (self.__class__.__name__, name))
 
     @to_error
     def load(self):
@@ -136,15 +307,22 @@ class CloudfilesClient(object):
         with response_context as response:
             response.read()
 
+            object_count = bytes_used = container_count = 0
+            metadata = {}
             for name, value in response.getheaders():
                 if name.lower() == "x-account-object-count":
-                    self.object_count = int(value)
+                    object_count = int(value)
                 elif name.lower() == "x-account-bytes-used":
-                    self.bytes_used = int(value)
+                    bytes_used = int(value)
                 elif name.lower() == "x-account-container-count":
-                    self.container_count = int(value)
+                    container_count = int(value)
                 elif name.lower().startswith("x-account-meta-"):
-                    self.metadata[name.lower()] =  value;
+                    metadata[name.lower()] =  value;
+            self.object_count = object_count
+            self.bytes_used = bytes_used
+            self.container_count = container_count
+            self.metadata = metadata
+            self._account_loaded = True
 
     @to_error
     def get_temp_url_key(self):
@@ -196,16 +374,24 @@ class CloudfilesClient(object):
         response_context = self.cloudfiles.send_request("PUT", path)
         with response_context as response:
             response.read()
+
+        if self.container_cache is not None:
+            self.container_cache.invalidate(name)
         return Container(self, name)
 
     @to_error
-    def list_containers(self, limit=None, marker=None):
+    def list_containers(self, limit=None, marker=None, stream=False):
         """List Cloudfiles containers
 
         Args:
             limit: max results to returns
             marker: container name marking the container after which
                 results whould be returned
+            stream: boolean indicating that a generator should be
+                returned, yielding results as they are received and
+                decoded, rather than a list. Note that the request's
+                pooled connection will not be available to other
+                requests until the generator is exhausted or closed.
         Returns:
             List of container info dicts, i.e.
             [ {u'bytes': 35515535291, u'count': 20, u'name': u'cloudservers'},
@@ -224,12 +410,27 @@ class CloudfilesClient(object):
         if marker:
             params["marker"] = marker
 
+        if stream:
+            return self._stream_containers(params)
+
         response_context = self.cloudfiles.send_request(
                 "GET", path="", params=params)
         with response_context as response:
             result = json.loads(response.read())
         return result
 
+    def _stream_containers(self, params):
+        """Generator yielding decoded listing entries.
+
+        The request is sent on the first next(), so that a generator
+        which is never started does not hold a pooled connection.
+        """
+        response_context = self.cloudfiles.send_request(
+                "GET", path="", params=params)
+        with response_context as response:
+            for info in JSONArrayDecoder(response):
+                yield info
+
     @to_error
     def list_cdn_containers(self, limit=None, marker=None):
         """List Cloudfiles containers with CDN access enabled
@@ -276,11 +477,20 @@ class CloudfilesClient(object):
                 which is NOT cdn enabled, will NOT result in an exception,
                 it's just slightly less efficient.
         Result:
-            Container object
+            Container object, which may be shared with other callers
+            if the client has a container_cache.
         Raises:
             NoSuchContainer, ResponseError, RackspaceError
         """
-        return Container(client=self, name=name, cdn_enabled=cdn_enabled)
+        if self.container_cache is None:
+            return Container(client=self, name=name, cdn_enabled=cdn_enabled)
+
+        container = self.container_cache.get(name, cdn_enabled)
+        if container is None:
+            container = Container(client=self, name=name,
+                    cdn_enabled=cdn_enabled)
+            self.container_cache.put(container, cdn_enabled)
+        return container
 
     @to_error
     def delete_container(self, name):
@@ -295,10 +505,23 @@ class CloudfilesClient(object):
         response_context = self.cloudfiles.send_request("DELETE", path)
         with response_context as response:
             response.read()
+
+        if self.container_cache is not None:
+            self.container_cache.invalidate(name)
                 
 
 class Cloudfiles(object):
-    """Cloudfiles Client"""
+    """Cloudfiles Client
+
+    Requests are sent through a bounded pool of RestClients, so a single
+    Cloudfiles object may be shared by multiple threads, and streaming
+    responses do not block other requests.
+
+    If failover is enabled, both the servicenet and public endpoints
+    are kept, and requests are routed to the healthy, faster one
+    by an EndpointSelector. Note that endpoint always refers to the
+    preferred endpoint, which is used to construct uri's.
+    """
     def __init__(self,
             region,
             identity_client,
@@ -308,21 +531,36 @@ class Cloudfiles(object):
             retries=1,
             keepalive=True,
             proxy=None,
-            rest_client_class=None,
+            rest_client_class=RestClient,
+            pool_size=10,
+            pool_max_idle=None,
+            pool_timeout=None,
+            retry_policy=None,
+            failover=False,
+            failover_probe_interval=30,
+            hedge_policy=None,
             debug_level=0):
 
         self.identity_client = identity_client
+        self.retry_policy = retry_policy
+        self.hedge_policy = hedge_policy
         
+        endpoints = [endpoint]
         if endpoint is None:
             service = self.identity_client.catalog.get_cloud_files()
             if service is None:
-                self.identity_client.authenticate()
+                self.identity_client.authenticate(
+                        self.identity_client.rest_client)
                 service = self.identity_client.catalog.get_cloud_files()
             
+            service_endpoint = service.endpoints.get_endpoint(region)
             if servicenet:
-                endpoint = service.endpoints.get_endpoint(region).internal_url
+                endpoints = [service_endpoint.internal_url,
+                        service_endpoint.public_url]
             else:
-                endpoint = service.endpoints.get_endpoint(region).public_url
+                endpoints = [service_endpoint.public_url,
+                        service_endpoint.internal_url]
+            endpoint = endpoints[0]
 
         self.endpoint = endpoint
         self.timeout = timeout
@@ -330,21 +568,85 @@ class Cloudfiles(object):
         self.keepalive = keepalive
         self.debug_level = debug_level
         
-        self.rest_client = rest_client_class( 
-                endpoint=endpoint,
-                timeout=timeout,
-                retries=retries,
-                keepalive=keepalive,
-                proxy=proxy,
-                authenticator=self.identity_client,
-                debug_level=debug_level)
+        create_pool = lambda url: RestClientPool(
+                create_rest_client=functools.partial(
+                    rest_client_class,
+                    endpoint=url,
+                    timeout=timeout,
+                    retries=retries,
+                    keepalive=keepalive,
+                    proxy=proxy,
+                    authenticator=self.identity_client,
+                    debug_level=debug_level),
+                size=pool_size,
+                max_idle=pool_max_idle,
+                timeout=pool_timeout)
+
+        self.pool = create_pool(endpoint)
+        
+        #create the initial rest client (and connection) up front
+        self.rest_client = self.pool.acquire()
+        self.pool.release(self.rest_client)
+
+        self.endpoint_selector = None
+        if failover and len(endpoints) > 1:
+            self.endpoint_selector = EndpointSelector(
+                    endpoints=[
+                        Endpoint(endpoint, self.pool, CircuitBreaker()),
+                        Endpoint(endpoints[1], create_pool(endpoints[1]),
+                            CircuitBreaker())
+                    ],
+                    probe_interval=failover_probe_interval)
+
+    def close(self):
+        """Stop failover health probes and hedging threads, and close
+        pooled connections."""
+        if self.hedge_policy is not None:
+            self.hedge_policy.shutdown()
+        if self.endpoint_selector is not None:
+            self.endpoint_selector.stop()
+            for endpoint in self.endpoint_selector.endpoints:
+                endpoint.pool.close()
+        else:
+            self.pool.close()
+
+    def _send_request(self, method, path, data=None, headers=None, **kwargs):
+        if self.endpoint_selector is None:
+            return self.pool.send_request(method, path, data, headers, **kwargs)
+        return self.endpoint_selector.send_request(
+                method, path, data, headers, **kwargs)
+
+    def send_request(self, method, path, data=None, headers=None, **kwargs):
+        if self.retry_policy is None:
+            return self._send_request(method, path, data, headers, **kwargs)
+        return self.retry_policy.send_request(self._send_request,
+                method, path, data, headers, **kwargs)
+
+    def send_hedged_request(self, method, path, data=None, headers=None,
+            **kwargs):
+        """Send idempotent request, hedging it if a hedge_policy is set.
+
+        Returns:
+            response context
+        """
+        if self.hedge_policy is None:
+            return self.send_request(method, path, data, headers, **kwargs)
 
-    def send_request(self, *args, **kwargs):
-        return self.rest_client.send_request(*args, **kwargs)
+        pool = self.pool
+        if self.endpoint_selector is not None:
+            pool = self.endpoint_selector.current.pool
+        return self.hedge_policy.send_request(
+                lambda: self.send_request(
+                    method, path, data, headers, **kwargs),
+                can_hedge=lambda: pool.available() > 0)
 
 
 class CloudfilesCdn(object):
-    """Cloudfiles CDN Client"""
+    """Cloudfiles CDN Client
+
+    Requests are sent through a bounded pool of RestClients, so a single
+    CloudfilesCdn object may be shared by multiple threads.
+    """
     def __init__(self,
             region,
             identity_client,
@@ -354,14 +656,20 @@ class CloudfilesCdn(object):
             keepalive=True,
             proxy=None,
             rest_client_class=RestClient,
+            pool_size=10,
+            pool_max_idle=None,
+            pool_timeout=None,
+            retry_policy=None,
             debug_level=0):
 
         self.identity_client = identity_client
+        self.retry_policy = retry_policy
         
         if endpoint is None:
             service = self.identity_client.catalog.get_cloud_files_cdn()
             if service is None:
-                self.identity_client.authenticate()
+                self.identity_client.authenticate(
+                        self.identity_client.rest_client)
                 service = self.identity_client.catalog.get_cloud_files_cdn()
             
             endpoint = service.endpoints.get_endpoint(region).public_url
@@ -372,14 +680,30 @@ class CloudfilesCdn(object):
         self.keepalive = keepalive
         self.debug_level = debug_level
         
-        self.rest_client = rest_client_class(
-                endpoint=endpoint,
-                timeout=timeout,
-                retries=retries,
-                keepalive=keepalive,
-                proxy=proxy,
-                authenticator=self.identity_client,
-                debug_level=debug_level)
-
-    def send_request(self, *args, **kwargs):
-        return self.rest_client.send_request(*args, **kwargs)
+        self.pool = RestClientPool(
+                create_rest_client=functools.partial(
+                    rest_client_class,
+                    endpoint=endpoint,
+                    timeout=timeout,
+                    retries=retries,
+                    keepalive=keepalive,
+                    proxy=proxy,
+                    authenticator=self.identity_client,
+                    debug_level=debug_level),
+                size=pool_size,
+                max_idle=pool_max_idle,
+                timeout=pool_timeout)
+        
+        #create the initial rest client (and connection) up front
+        self.rest_client = self.pool.acquire()
+        self.pool.release(self.rest_client)
+
+    def close(self):
+        """Close pooled connections."""
+        self.pool.close()
+
+    def send_request(self, method, path, data=None, headers=None, **kwargs):
+        if self.retry_policy is None:
+            return self.pool.send_request(method, path, data, headers, **kwargs)
+        return self.retry_policy.send_request(self.pool.send_request,
+                method, path, data, headers, **kwargs)
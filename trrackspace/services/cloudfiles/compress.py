@@ -0,0 +1,136 @@
+import zlib
+
+#zlib wbits producing / consuming gzip framing rather than raw zlib
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+#content types worth compressing. Media and archive types are
+#typically already compressed, so are not included.
+COMPRESSIBLE_CONTENT_TYPES = frozenset([
+    "application/atom+xml",
+    "application/ecmascript",
+    "application/javascript",
+    "application/json",
+    "application/ld+json",
+    "application/rss+xml",
+    "application/x-javascript",
+    "application/x-ndjson",
+    "application/x-sh",
+    "application/x-tar",
+    "application/xhtml+xml",
+    "application/xml",
+    "image/bmp",
+    "image/svg+xml",
+    "image/x-icon",
+])
+
+def is_compressible(content_type, allowlist=None):
+    """Check if content type is worth compressing.
+
+    Args:
+        content_type: content type, optionally including parameters,
+            i.e. "text/plain; charset=utf-8".
+        allowlist: optional set of compressible content types. If not
+            provided COMPRESSIBLE_CONTENT_TYPES will be used. All text/*
+            content types are considered compressible.
+    Returns:
+        True if content_type should be compressed, False otherwise.
+    """
+    if not content_type:
+        return False
+    allowlist = allowlist or COMPRESSIBLE_CONTENT_TYPES
+    content_type = content_type.split(";")[0].strip().lower()
+    return content_type.startswith("text/") or content_type in allowlist
+
+def is_gzip_encoded(headers):
+    """Check if response headers indicate gzip content encoding.
+
+    Args:
+        headers: list of (name, value) header tuples
+    Returns:
+        True if Content-Encoding is gzip, False otherwise.
+    """
+    for name, value in headers:
+        if name.lower() == "content-encoding":
+            return value.strip().lower() in ["gzip", "x-gzip"]
+    return False
+
+
+class GzipStream(object):
+    """File-like object gzip compressing data as it is read.
+
+    Compression is incremental, so memory use is bounded by the read
+    size regardless of the size of the underlying data, which allows
+    GzipStream to be passed to a Chunker for a chunked transfer.
+    """
+
+    def __init__(self, data, compresslevel=6, chunk_size=65535):
+        """GzipStream constructor
+
+        Args:
+            data: string, Chunker, or file-like object of data to compress
+            compresslevel: zlib compression level, 1-9
+            chunk_size: number of bytes to read from data at a time
+        """
+        if isinstance(data, basestring):
+            self.source = iter([data])
+        elif hasattr(data, "read"):
+            self.source = iter(lambda: data.read(chunk_size), "")
+        else:
+            self.source = data.chunks(chunk_size)
+
+        self.compressor = zlib.compressobj(
+                compresslevel, zlib.DEFLATED, GZIP_WBITS)
+        self.buffer = ""
+        self.finished = False
+
+    def _fill(self, size):
+        while not self.finished and (size < 0 or len(self.buffer) < size):
+            try:
+                self.buffer += self.compressor.compress(next(self.source))
+            except StopIteration:
+                self.buffer += self.compressor.flush()
+                self.finished = True
+
+    def read(self, size=-1):
+        """Read up to size bytes of compressed data.
+
+        Args:
+            size: max number of bytes to read. If negative, all
+                remaining data will be read.
+        Returns:
+            compressed data, or empty string at end of stream.
+        """
+        self._fill(size)
+        if size < 0:
+            result, self.buffer = self.buffer, ""
+        else:
+            result, self.buffer = self.buffer[:size], self.buffer[size:]
+        return result
+
+
+def gunzip(data):
+    """Decompress gzip encoded string.
+
+    Args:
+        data: gzip encoded string
+    Returns:
+        decompressed string
+    """
+    return zlib.decompress(data, GZIP_WBITS)
+
+def gunzip_chunks(chunks):
+    """Decompress gzip encoded chunks incrementally.
+
+    Args:
+        chunks: iterable of gzip encoded chunks
+    Returns:
+        Generator yielding decompressed chunks
+    """
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    data = decompressor.flush()
+    if data:
+        yield data
@@ -1,11 +1,23 @@
 import json
+import os
+import Queue
 import urllib
 
 from trhttp.errors import HttpError
+from trrackspace.decode import JSONArrayDecoder
 from trrackspace.errors import to_error
+from trrackspace.threadpool import ThreadPool
+from trrackspace.services.cloudfiles.archive import ArchiveUploader, \
+        directory_entries
+from trrackspace.services.cloudfiles.bulk import BulkDeleter
+from trrackspace.services.cloudfiles.copier import PrefixCopier
 from trrackspace.services.cloudfiles.errors import ContainerNotEmpty, \
-        NoSuchContainer, NoSuchObject, ExtractArchiveError
+        NoSuchContainer, NoSuchObject, ExtractArchiveError, BulkDeleteError
+from trrackspace.services.cloudfiles.listing import ObjectInfo, \
+        ObjectInfoBatch
+from trrackspace.services.cloudfiles.mirror import ContainerMirror
 from trrackspace.services.cloudfiles.storage_object import StorageObject
+from trrackspace.services.cloudfiles.sync import DirectorySync
 
 class Container(object):
     """Cloudfiles Container object
@@ -15,6 +27,11 @@ class Container(object):
     should be used.
     """
 
+    #default keyspace partition boundaries (following the prefix)
+    #for parallel listings.
+    PARTITION_ALPHABET = \
+        "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
     def __init__(self, client, name, cdn_enabled=True):
         """Container constructor.
 
@@ -24,7 +41,8 @@ class Container(object):
             cdn_enabled: optional flag indicated if the container is
                 cdn_enabled. Setting this flag to True will result
                 in an additional HEAD request to fetch the container's
-                CDN metadata. Setting this flag to True on a container
+                CDN metadata, unless the client has a cdn_directory.
+                Setting this flag to True on a container
                 which is NOT cdn enabled, will NOT result in an exception,
                 it's just slightly less efficient.
         """
@@ -48,6 +66,16 @@ class Container(object):
         """Returns container API request path"""
         return self.name
 
+    def _invalidate_cache(self):
+        """Remove container from the client's container cache."""
+        if self.client.container_cache is not None:
+            self.client.container_cache.invalidate(self.name)
+
+    def _invalidate_cdn_directory(self):
+        """Force a refresh of the client's cdn directory."""
+        if self.client.cdn_directory is not None:
+            self.client.cdn_directory.invalidate()
+
     @property
     def uri(self):
         """Returns container non-cdn uri"""
@@ -109,7 +137,20 @@ class Container(object):
             else:
                 raise
 
-        if self.cdn_enabled:
+        if self.cdn_enabled and self.client.cdn_directory is not None:
+            #refresh cdn container data from the cdn directory
+            info = self.client.cdn_directory.get(self.client, self.name)
+            if info is None:
+                #container has never been cdn enabled
+                self.cdn_enabled = False
+            else:
+                self.cdn_enabled = info.get("cdn_enabled", False)
+                self._cdn_uri = info.get("cdn_uri")
+                self._cdn_ssl_uri = info.get("cdn_ssl_uri")
+                self._cdn_streaming_uri = info.get("cdn_streaming_uri")
+                self.cdn_ttl = info.get("ttl")
+                self.cdn_log_retention = info.get("log_retention", False)
+        elif self.cdn_enabled:
             #refresh cdn container data
             try:
                 response_context = self.client.cloudfiles_cdn.send_request("HEAD", self.path)
@@ -131,9 +172,12 @@ class Container(object):
                             self.cdn_ttl = int(value)
                         elif key == "x-log-retention":
                             self.cdn_log_retention = True if value == "True" else False
-            except:
-                #container is not cdn enabled
-                self.cdn_enabled = False
+            except HttpError as e:
+                if e.status == 404:
+                    #container is not cdn enabled
+                    self.cdn_enabled = False
+                else:
+                    raise
 
     @to_error
     def list(self, prefix=None, limit=None,
@@ -183,7 +227,8 @@ class Container(object):
     
     @to_error
     def list_objects(self, prefix=None, limit=None,
-            marker=None, end_marker=None, delimiter=None): 
+            marker=None, end_marker=None, delimiter=None, compact=False,
+            stream=False):
         """List container storage objects with info
 
         Args:
@@ -196,6 +241,13 @@ class Container(object):
             delimiter: path delimiter for filesystem like object listing.
                 Setting delimiter='/' and prefix = 'static/' would list
                 all storage objects in the logical 'static' directory.
+            compact: boolean indicating that ObjectInfo objects
+                should be returned rather than info dicts.
+            stream: boolean indicating that a generator should be
+                returned, yielding results as they are received and
+                decoded, rather than a list. Note that the request's
+                pooled connection will not be available to other
+                requests until the generator is exhausted or closed.
         Returns:
             List of storage object info dicts (max 10,000), i.e.
             [ {u'bytes': 4, u'last_modified': u'2013-08-27T20:14:50.378200',
@@ -218,14 +270,195 @@ class Container(object):
         if delimiter:
             params["delimiter"] = delimiter
 
+        if stream:
+            return self._stream_objects(params, compact)
+
         response_context = self.client.cloudfiles.send_request(
                 "GET", self.path, params=params)
         with response_context as response:
             result = json.loads(response.read())
+
+        if compact:
+            result = [ObjectInfo.from_json(info) for info in result]
         return result
 
+    def _stream_objects(self, params, compact=False):
+        """Generator yielding decoded listing entries.
+
+        The request is sent on the first next(), so that a generator
+        which is never started does not hold a pooled connection.
+        """
+        response_context = self.client.cloudfiles.send_request(
+                "GET", self.path, params=params)
+        with response_context as response:
+            for info in JSONArrayDecoder(response):
+                if compact:
+                    info = ObjectInfo.from_json(info)
+                yield info
+
+    def _list_object_batches(self, prefix=None, delimiter=None,
+            batch_size=1000, marker=None, end_marker=None):
+        """Generator yielding non-empty lists of object info dicts
+        until the listing is exhausted."""
+        while True:
+            objects = self.list_objects(prefix=prefix,
+                    limit=batch_size,
+                    marker=marker,
+                    end_marker=end_marker,
+                    delimiter=delimiter)
+
+            if objects:
+                yield objects
+
+            if len(objects) < batch_size:
+                break
+
+            #logical directory entries have a subdir rather than a name
+            marker = objects[-1].get("name") or objects[-1]["subdir"]
+
+    def _sample_boundaries(self, prefix, objects, max_partitions):
+        """Choose partition boundaries for the keyspace following a
+        sampled first listing page.
+
+        The page's names vary after their common prefix, so the rest of
+        the keyspace is split at each PARTITION_ALPHABET character
+        following both it and the listing prefix, keeping at most
+        max_partitions - 1 evenly spaced boundaries after the page.
+        """
+        name = lambda o: o.get("name") or o.get("subdir")
+        prefix = prefix or u""
+        if isinstance(prefix, str):
+            prefix = prefix.decode("utf-8")
+
+        first, last = name(objects[0]), name(objects[-1])
+        common = os.path.commonprefix([first, last])
+        candidates = set()
+        for base in set([prefix, common]):
+            candidates.update(base + c for c in self.PARTITION_ALPHABET)
+        candidates = sorted(c for c in candidates if c > last)
+
+        if len(candidates) >= max_partitions:
+            step = float(len(candidates)) / max_partitions
+            candidates = [candidates[int(i * step)]
+                    for i in range(1, max_partitions)]
+        return candidates
+
+    def _partition_ranges(self, prefix=None, boundaries=None, marker=None):
+        """Split object name keyspace into (marker, end_marker) ranges.
+
+        Range i ends before boundary i (end_marker is exclusive), and
+        since marker is also exclusive, range i + 1 starts just before
+        boundary i rather than at it. Ranges may therefore overlap by
+        names falling between the two, which must be discarded when
+        merging. The first range starts after marker, if given, and
+        boundaries not after it are ignored.
+        """
+        if boundaries is None:
+            boundaries = [(prefix or "") + c for c in self.PARTITION_ALPHABET]
+
+        boundaries = sorted(set(
+            b.decode("utf-8") if isinstance(b, str) else b
+            for b in boundaries if b))
+        if marker is not None:
+            start = marker.decode("utf-8") \
+                    if isinstance(marker, str) else marker
+            boundaries = [b for b in boundaries if b > start]
+            marker = start.encode("utf-8")
+
+        ranges = []
+        for boundary in boundaries:
+            ranges.append((marker, boundary.encode("utf-8")))
+            if boundary[-1] > u"\x00":
+                predecessor = boundary[:-1] + \
+                        unichr(ord(boundary[-1]) - 1) + u"\uffff"
+            else:
+                predecessor = boundary[:-1]
+            marker = predecessor.encode("utf-8") or None
+        ranges.append((marker, None))
+        return ranges
+
+    def _list_partitioned_object_batches(self, thread_pool, prefix=None,
+            delimiter=None, batch_size=1000, boundaries=None):
+        """Generator yielding sorted, non-empty lists of object info dicts
+        listed concurrently from keyspace partitions.
+
+        Unless boundaries are given, the first page is listed on its
+        own, and the listing ends there if it is not full. Otherwise
+        the remaining keyspace is split at boundaries sampled from it.
+        Each partition is listed independently into an unbounded
+        buffer, so partitions are listed in parallel regardless of how
+        fast the merged listing is consumed.
+        """
+        name = lambda o: o.get("name") or o.get("subdir")
+        last_name = None
+
+        if boundaries is None:
+            objects = self.list_objects(prefix=prefix,
+                    limit=batch_size,
+                    delimiter=delimiter)
+            if objects:
+                yield objects
+            if len(objects) < batch_size:
+                return
+            last_name = name(objects[-1])
+            boundaries = self._sample_boundaries(prefix, objects,
+                    thread_pool.num_threads * 4)
+
+        prefetchers = []
+        try:
+            for marker, end_marker in self._partition_ranges(prefix,
+                    boundaries, marker=last_name):
+                batches = self._list_object_batches(prefix=prefix,
+                        delimiter=delimiter,
+                        batch_size=batch_size,
+                        marker=marker,
+                        end_marker=end_marker)
+                #depth 0 buffers without bound, so that the producer
+                #lists its whole partition without waiting on the merge.
+                prefetchers.append(thread_pool.prefetch(batches, depth=0))
+
+            for prefetcher in prefetchers:
+                for objects in prefetcher:
+                    if last_name is not None:
+                        objects = [o for o in objects if name(o) > last_name]
+                    if objects:
+                        last_name = name(objects[-1])
+                        yield objects
+        finally:
+            for prefetcher in prefetchers:
+                prefetcher.close()
+
+    def _list_all_object_batches(self, prefix=None, delimiter=None,
+            batch_size=1000, prefetch=0, threads=1, boundaries=None):
+        """Generator yielding non-empty lists of object info dicts,
+        optionally prefetched or listed in parallel."""
+        thread_pool = None
+        if threads > 1:
+            thread_pool = ThreadPool(threads, name="Container-list")
+            batches = self._list_partitioned_object_batches(thread_pool,
+                    prefix=prefix,
+                    delimiter=delimiter,
+                    batch_size=batch_size,
+                    boundaries=boundaries)
+        else:
+            batches = self._list_object_batches(prefix=prefix,
+                    delimiter=delimiter,
+                    batch_size=batch_size)
+            if prefetch:
+                thread_pool = ThreadPool(1, name="Container-list")
+                batches = thread_pool.prefetch(batches, depth=prefetch)
+
+        try:
+            for objects in batches:
+                yield objects
+        finally:
+            if thread_pool is not None:
+                batches.close()
+                thread_pool.shutdown(wait=False)
+
     @to_error
-    def list_all_objects(self, prefix=None, delimiter=None, batch_size=1000):
+    def list_all_objects(self, prefix=None, delimiter=None, batch_size=1000,
+            prefetch=0, threads=1, boundaries=None, compact=False):
         """List all container storage objects with info
         
         This is a convenience method which will invoke list_objects() as many
@@ -234,7 +467,19 @@ class Container(object):
 
         Note that a genrator will be returned which will yield object info
         dicts. After every batch_size info dicts, an additional request
-        will be made for the next batch of object info dicts.
+        will be made for the next batch of object info dicts, unless
+        prefetch is set, in which case up to prefetch batches will
+        be requested in a background thread ahead of the consumer.
+
+        If threads is greater than 1, the first batch is listed, and
+        if it is full, the rest of the object name keyspace is split
+        into ranges at boundaries, which are listed concurrently and
+        merged back in order. Boundaries default to PARTITION_ALPHABET
+        characters following the prefix and the common prefix of the
+        first batch, up to 4 ranges per thread, but names sampled from
+        the container, i.e. every 100,000th name of a previous listing,
+        will partition it more evenly. If boundaries are given, no
+        first batch is listed on its own.
 
         Args:
             prefix: storage object name prefix which results must match
@@ -244,6 +489,17 @@ class Container(object):
                 all storage objects in the logical 'static' directory.
             batch_size: number of object info dicts to fetch with each
                 api request. The number cannot exceed 10,000.
+            prefetch: max number of batches to fetch ahead of the
+                consumer. At most (prefetch + 1) * batch_size object
+                info dicts will be held in memory. Ignored if threads
+                is greater than 1, in which case ranges are listed
+                ahead of the consumer without bound, so that they are
+                listed in parallel.
+            threads: number of threads to list keyspace ranges with
+            boundaries: optional list of object names at which to split
+                the keyspace for a parallel listing.
+            compact: boolean indicating that ObjectInfo objects
+                should be yielded rather than info dicts.
         Returns:
             Generator yielding storage object info dicts, i.e.
             [ {u'bytes': 4, u'last_modified': u'2013-08-27T20:14:50.378200',
@@ -253,24 +509,122 @@ class Container(object):
         Raises:
             ResponseError, RackspaceError
         """
-        marker=None
-        while True:
-            objects = self.list_objects(prefix=prefix,
-                    limit=batch_size,
-                    marker=marker,
-                    delimiter=delimiter)
-            
-            for object in objects:
-                yield object
-            
-            if len(objects) < batch_size:
-                break
+        batches = self._list_all_object_batches(prefix=prefix,
+                delimiter=delimiter,
+                batch_size=batch_size,
+                prefetch=prefetch,
+                threads=threads,
+                boundaries=boundaries)
+
+        try:
+            for objects in batches:
+                for object in objects:
+                    if compact:
+                        object = ObjectInfo.from_json(object)
+                    yield object
+        finally:
+            batches.close()
+
+    @to_error
+    def list_object_batches(self, prefix=None, delimiter=None,
+            batch_size=1000, prefetch=0, threads=1, boundaries=None):
+        """List all container storage objects in columnar batches
 
-            marker = objects[-1]["name"]
+        This is the columnar form of list_all_objects(), yielding each
+        batch of listed objects as an ObjectInfoBatch.
+
+        Args:
+            prefix: storage object name prefix which results must match
+            delimiter: path delimiter for filesystem like object listing.
+            batch_size: max number of objects in each batch. The number
+                cannot exceed 10,000.
+            prefetch: max number of batches to fetch ahead of the consumer.
+                Ignored if threads is greater than 1.
+            threads: number of threads to list keyspace ranges with
+            boundaries: optional list of object names at which to split
+                the keyspace for a parallel listing.
+        Returns:
+            Generator yielding ObjectInfoBatch objects
+        Raises:
+            ResponseError, RackspaceError
+        """
+        batches = self._list_all_object_batches(prefix=prefix,
+                delimiter=delimiter,
+                batch_size=batch_size,
+                prefetch=prefetch,
+                threads=threads,
+                boundaries=boundaries)
+
+        try:
+            for objects in batches:
+                yield ObjectInfoBatch.from_json(objects)
+        finally:
+            batches.close()
+
+    @to_error
+    def walk(self, prefix=None, delimiter="/", threads=8, batch_size=1000):
+        """Walk logical directory tree, like os.walk().
+
+        Each directory is listed with prefix and delimiter, and its
+        subdirectories are listed concurrently by up to threads worker
+        threads. Directories are yielded in the order their listings
+        complete, which is not necessarily depth first, but a directory
+        is always yielded before its subdirectories. As with os.walk(),
+        subdirectories may be pruned by removing them from the yielded
+        subdirs list in place.
+
+        Args:
+            prefix: storage object name prefix of the top directory,
+                i.e. "static/".
+            delimiter: path delimiter
+            threads: max number of directories to list concurrently
+            batch_size: number of object info dicts to fetch with each
+                api request. The number cannot exceed 10,000.
+        Returns:
+            Generator yielding (dirpath, subdirs, objects) tuples, where
+            dirpath is the directory prefix, subdirs is a list of
+            subdirectory prefixes, i.e. "static/css/", and objects is a
+            list of object info dicts.
+        Raises:
+            ResponseError, RackspaceError
+        """
+        def list_directory(dirpath):
+            subdirs, objects = [], []
+            for object in self.list_all_objects(prefix=dirpath,
+                    delimiter=delimiter,
+                    batch_size=batch_size):
+                if "subdir" in object:
+                    subdirs.append(object["subdir"])
+                else:
+                    objects.append(object)
+            return subdirs, objects
+
+        thread_pool = ThreadPool(threads, name="Container-walk")
+        completed = Queue.Queue()
+
+        def submit(dirpath):
+            future = thread_pool.submit(list_directory, dirpath)
+            future.add_done_callback(lambda f: completed.put((dirpath, f)))
+
+        submit(prefix or "")
+        pending = 1
+        try:
+            while pending:
+                dirpath, future = completed.get()
+                pending -= 1
+                subdirs, objects = future.result()
+                yield dirpath, subdirs, objects
+
+                for subdir in subdirs:
+                    submit(subdir)
+                    pending += 1
+        finally:
+            thread_pool.shutdown(wait=False)
 
     @to_error
     def create_object(self, name, content_type=None,
-            metadata=None, cors=None, delete_at_timestamp=None):
+            metadata=None, cors=None, delete_at_timestamp=None,
+            compress=False):
         """Create a Cloudfiles storage object.
         
         Note that the storage object will not actually be created
@@ -283,6 +637,8 @@ class Container(object):
             metadata: dict of metadata headers
             cors: dict of CORS headers
             delete_at_timestamp: delete at timestamp
+            compress: boolean indicating that written data should
+                be gzip compressed if content_type is compressible.
         Returns:
             StorageObject
         Raises:
@@ -290,7 +646,8 @@ class Container(object):
         """
         return StorageObject(self, name, content_type=content_type,
                 metadata=metadata, cors=cors,
-                delete_at_timestamp=delete_at_timestamp, exists=False)
+                delete_at_timestamp=delete_at_timestamp, compress=compress,
+                exists=False)
     
     @to_error
     def extract_archive(self, archive_path, type=None):
@@ -318,7 +675,7 @@ class Container(object):
         headers = {"Accept": "application/json"}
         params = {"extract-archive": type}
 
-        with open(archive_path, "r") as data:
+        with open(archive_path, "rb") as data:
             response_context = self.client.cloudfiles.send_request(
                     "PUT", self.path, data=data, headers=headers, params=params)
             with response_context as response:
@@ -329,6 +686,135 @@ class Container(object):
 
         return result
     
+    @to_error
+    def extract_archive_entries(self, entries, compress=True,
+            max_entries=10000, max_bytes=1073741824, threads=4):
+        """Extract entries to the container without an archive file
+
+        The tar archive is built on the fly and streamed in a chunked
+        extract archive request, so no temporary archive is written
+        to disk. Once max_entries or max_bytes is reached a new archive
+        is started, and up to threads archives are uploaded concurrently.
+
+        Args:
+            entries: iterable of (name, source) or (name, source, size)
+                entries, where name is the storage object name and
+                source is a filesystem path or file-like object, or a
+                filesystem directory path whose files will be extracted
+                by relative path. size is required for file-like objects
+                which are not regular files read from their start.
+            compress: boolean indicating if archives should be
+                gzip compressed
+            max_entries: max number of entries in each archive
+            max_bytes: max number of source bytes in each archive
+            threads: max number of concurrent extract archive requests
+        Returns:
+            Extract archive result dict with the total
+            'Number Files Created' and 'Errors' of all archives.
+        Raises:
+            ExtractArchiveError, ResponseError, RackspaceError
+        """
+        if isinstance(entries, basestring):
+            entries = directory_entries(entries)
+
+        uploader = ArchiveUploader(self,
+                compress=compress,
+                max_entries=max_entries,
+                max_bytes=max_bytes,
+                threads=threads)
+        result = uploader.upload(entries)
+
+        if result.get("Errors"):
+            raise ExtractArchiveError(result)
+
+        return result
+
+    @to_error
+    def sync_directory(self, path, prefix=None, delete=False,
+            use_mtime=False, threads=8):
+        """Upload new and changed files of a local directory
+
+        See DirectorySync for details on how changed files are detected.
+
+        Args:
+            path: local directory path
+            prefix: optional storage object name prefix which local
+                relative paths are appended to. A trailing '/' is
+                added if missing.
+            delete: boolean indicating if objects below prefix without
+                a local file should be deleted.
+            use_mtime: boolean indicating that files whose mtime equals
+                their object's recorded mtime should be considered
+                unchanged if their size matches, without computing
+                their md5.
+            threads: number of concurrent uploads
+        Returns:
+            SyncResult
+        Raises:
+            ResponseError, RackspaceError
+        """
+        directory_sync = DirectorySync(self, path,
+                prefix=prefix,
+                delete=delete,
+                use_mtime=use_mtime,
+                threads=threads)
+        return directory_sync.sync()
+
+    @to_error
+    def mirror_directory(self, path, prefix=None, threads=8):
+        """Download storage objects to a local directory
+
+        See ContainerMirror for details on how unchanged files are
+        skipped and interrupted downloads are resumed.
+
+        Args:
+            path: local directory path
+            prefix: optional storage object name prefix. A trailing
+                '/' is added if missing. Objects are written to their
+                name relative to prefix below path.
+            threads: number of concurrent downloads
+        Returns:
+            MirrorResult
+        Raises:
+            ResponseError, RackspaceError
+        """
+        container_mirror = ContainerMirror(self, path,
+                prefix=prefix,
+                threads=threads)
+        return container_mirror.mirror()
+
+    @to_error
+    def copy_prefix(self, destination_container, prefix=None,
+            rename_fn=None, threads=8, retry_policy=None):
+        """Server side copy of storage objects to another container
+
+        Efficiently copy objects with concurrent COPY requests without
+        transfering data over the wire. Failed copies, i.e. throttled
+        ones, are retried according to a RetryPolicy.
+
+        Args:
+            destination_container: destination Container or container name
+            prefix: optional storage object name prefix of objects
+                to copy. If not given all objects are copied.
+            rename_fn: optional callable returning the destination name
+                for a source object name, or None if the object should
+                not be copied. Defaults to the source name.
+            threads: max number of concurrent COPY requests
+            retry_policy: optional RetryPolicy for COPY requests. If not
+                provided the client's retry_policy will be used, or a
+                default RetryPolicy if the client does not have one.
+        Returns:
+            CopyResult
+        Raises:
+            ResponseError, RackspaceError
+        """
+        copier = PrefixCopier(self, destination_container,
+                prefix=prefix,
+                rename_fn=rename_fn,
+                threads=threads,
+                retry_policy=retry_policy)
+        return copier.copy()
+
     @to_error
     def get_object(self, name):
         """Get storage object
@@ -362,46 +848,84 @@ class Container(object):
                 raise NoSuchObject(name)
     
     @to_error
-    def delete_objects(self, names):
+    def delete_objects(self, names, batch_size=10000, threads=4, retries=2):
         """Delete multiple storage objects using bulk delete
 
+        Duplicate names are removed, and the remaining names are split
+        into batches of up to batch_size, which are deleted by up to
+        threads concurrent bulk delete requests.
+
+        Note that Cloudfiles only reports the number of deleted and not
+        found objects in each batch, so names from a batch containing
+        both are reported in the result's ambiguous list. None of the
+        deleted, not_found, or ambiguous objects exist following the
+        delete.
+
         Args:
-            names: list of storage object names
+            names: iterable of storage object names
+            batch_size: maximum number of objects to delete
+                in each api request. The number cannot exceed 10,000.
+            threads: max number of concurrent bulk delete requests
+            retries: number of times objects failing with a retryable
+                status will be retried
+        Returns:
+            BulkDeleteResult with deleted, not_found, and ambiguous
+            names, and errors list of (name, status) tuples.
         Raises:
             ResponseError, RackspaceError
         """
-        object_paths = []
+        #duplicate names would be counted more than once in the result
+        unique_names, seen = [], set()
         for name in names:
-            object_path = "%s/%s" % (self.path, urllib.quote(name))
-            object_paths.append(object_path)
-        data = "\n".join(object_paths)
-        params = { "bulk-delete": "True" }
-
-        response_context = self.client.cloudfiles.send_request(
-                "DELETE", self.path, data=data, params=params)
-        with response_context as response:
-            response.read()
+            if name not in seen:
+                seen.add(name)
+                unique_names.append(name)
+
+        deleter = BulkDeleter(self,
+                batch_size=batch_size,
+                threads=threads,
+                retries=retries)
+        return deleter.delete(unique_names)
     
     @to_error
-    def delete_all_objects(self, batch_size=1000):
+    def delete_all_objects(self, batch_size=10000, threads=4, retries=2,
+            prefix=None):
         """Delete all storage objects in the container
 
-        This is a convenience method which will delete list_objects() as many
-        times as is necessary as determined by the batch_size to delete
-        all of the objects within the container.
+        This is a convenience method which will list the container in a
+        background thread, while up to threads bulk delete requests of
+        up to batch_size objects each are run concurrently. Objects
+        which fail to be deleted with a retryable status are retried
+        up to retries times.
 
         Args:
             batch_size: maximum number of objects to delete
-                in each api request
+                in each api request. The number cannot exceed 10,000.
+            threads: max number of concurrent bulk delete requests
+            retries: number of times failed objects will be retried
+            prefix: optional storage object name prefix objects must
+                match to be deleted.
+        Returns:
+            BulkDeleteResult
         Raises:
-            ResponseError, RackspaceError
+            BulkDeleteError, ResponseError, RackspaceError
         """
-        while True:
-            object_names = self.list(limit=batch_size)
-            if len(object_names):
-                self.delete_objects(object_names)
-            if len(object_names) < batch_size:
-                break
+        deleter = BulkDeleter(self,
+                batch_size=batch_size,
+                threads=threads,
+                retries=retries)
+
+        objects = self.list_all_objects(prefix=prefix,
+                batch_size=deleter.batch_size,
+                prefetch=1)
+        try:
+            result = deleter.delete(o["name"] for o in objects)
+        finally:
+            objects.close()
+
+        if result.errors:
+            raise BulkDeleteError(result)
+        return result
 
     @to_error
     def delete(self):
@@ -422,6 +946,8 @@ class Container(object):
             elif error.status == 409:
                 raise ContainerNotEmpty
 
+        self._invalidate_cache()
+
     @to_error
     def update_metadata(self, metadata):
         """Update container metadata
@@ -459,6 +985,8 @@ class Container(object):
             else:
                 self.metadata[key] = value
 
+        self._invalidate_cache()
+
     @to_error
     def enable_object_versioning(self, backup_container):
         """Enable Cloudfiles object versioning.
@@ -482,6 +1010,8 @@ class Container(object):
         with response_context as response:
             response.read()
 
+        self._invalidate_cache()
+
     @to_error
     def disable_object_versioning(self):
         """Disable Cloudfiles object versioning
@@ -494,7 +1024,9 @@ class Container(object):
                 "POST", self.path, headers=headers)
         with response_context as response:
             response.read()
-    
+
+        self._invalidate_cache()
+
     @to_error
     def enable_log_retention(self):
         """Enable Cloudfiles CDN log retention
@@ -509,6 +1041,9 @@ class Container(object):
             response.read()
         self.cdn_log_retention = True
 
+        self._invalidate_cdn_directory()
+        self._invalidate_cache()
+
     @to_error
     def disable_log_retention(self):
         """Disable Cloudfiles CDN log retention
@@ -523,6 +1058,9 @@ class Container(object):
             response.read()
         self.cdn_log_retention = False
 
+        self._invalidate_cdn_directory()
+        self._invalidate_cache()
+
     @to_error
     def enable_quota(self, max_bytes=None, max_object_count=None):
         """Enable Cloudfiles quota
@@ -546,7 +1084,9 @@ class Container(object):
                 response.read()
 
         self.metadata.update(headers)
-    
+
+        self._invalidate_cache()
+
     @to_error
     def disable_quota(self):
         """Disable Cloudfiles quota
@@ -563,6 +1103,7 @@ class Container(object):
         with response_context as response:
             response.read()
 
+        self._invalidate_cache()
 
     @to_error
     def enable_cdn(self, ttl=259200):
@@ -601,6 +1142,9 @@ class Container(object):
 
         self.cdn_enabled = True
 
+        self._invalidate_cdn_directory()
+        self._invalidate_cache()
+
     @to_error
     def disable_cdn(self):
         """Disabled Cloudfiles CDN access.
@@ -622,6 +1166,9 @@ class Container(object):
 
         self.cdn_enabled = False
 
+        self._invalidate_cdn_directory()
+        self._invalidate_cache()
+
     @to_error
     def purge_from_cdn(self, email=None):
         """Purge all objects from the CDN.
@@ -664,6 +1211,8 @@ class Container(object):
         with response_context as response:
             response.read()
 
+        self._invalidate_cache()
+
     @to_error
     def disable_cors(self):
         """Disable Cross Orign Resource Sharing on CDN
@@ -681,6 +1230,8 @@ class Container(object):
         with response_context as response:
             response.read()
 
+        self._invalidate_cache()
+
     @to_error
     def enable_static_web(self, index, error=None):
         """Enable static web on CDN
@@ -702,6 +1253,8 @@ class Container(object):
         with response_context as response:
             response.read()
 
+        self._invalidate_cache()
+
     @to_error
     def disable_static_web(self):
         """Disable static web on CDN
@@ -717,3 +1270,5 @@ class Container(object):
                 "POST", self.path, headers=headers)
         with response_context as response:
             response.read()
+
+        self._invalidate_cache()
@@ -0,0 +1,155 @@
+import logging
+import urllib
+
+from trrackspace.threadpool import ThreadPool
+from trrackspace.services.cloudfiles.retry import RetryPolicy
+
+log = logging.getLogger(__name__)
+
+class CopyResult(object):
+    """Prefix copy result."""
+
+    def __init__(self):
+        self.copied = []
+        self.skipped = []
+        self.errors = []
+
+    def __repr__(self):
+        return "%s(copied=%d, skipped=%d, errors=%d)" % \
+                (self.__class__, len(self.copied), len(self.skipped),
+                 len(self.errors))
+
+    @property
+    def succeeded(self):
+        """Returns True if all copies succeeded."""
+        return not self.errors
+
+
+class PrefixCopier(object):
+    """Server side copy of the objects below a prefix to another container.
+
+    The source listing is streamed into up to threads concurrent COPY
+    requests, so object data never passes through the client. Failed
+    copies, i.e. throttled ones, are retried according to a RetryPolicy.
+    If source and destination are the same container, the listing is
+    read in full before copying, so that copies are not listed and
+    copied again.
+
+    Example usage:
+        result = PrefixCopier(staging, production, prefix="release-42/",
+                rename_fn=lambda name: name[len("release-42/"):]).copy()
+    """
+
+    def __init__(self, container, destination_container, prefix=None,
+            rename_fn=None, threads=8, retry_policy=None, batch_size=10000):
+        """PrefixCopier constructor
+
+        Args:
+            container: source Container object
+            destination_container: destination Container object or name
+            prefix: optional storage object name prefix of objects
+                to copy. If not given all objects are copied.
+            rename_fn: optional callable returning the destination name
+                for a source object name, or None if the object should
+                not be copied. Defaults to the source name.
+            threads: max number of concurrent COPY requests
+            retry_policy: optional RetryPolicy for COPY requests. If not
+                provided the client's retry_policy will be used, or a
+                default RetryPolicy if the client does not have one.
+            batch_size: number of objects to list with each request
+        """
+        self.container = container
+        self.destination_container = destination_container
+        self.prefix = prefix
+        self.rename_fn = rename_fn or (lambda name: name)
+        self.threads = threads
+        self.retry_policy = retry_policy or \
+                container.client.cloudfiles.retry_policy or RetryPolicy()
+        self.batch_size = batch_size
+
+    def _quote(self, name):
+        if isinstance(name, unicode):
+            name = name.encode("utf-8")
+        return urllib.quote(name)
+
+    def _destination_container_name(self):
+        if isinstance(self.destination_container, basestring):
+            return self.destination_container
+        return self.destination_container.name
+
+    def copy_object(self, entry):
+        """Copy a single object with retries.
+
+        Args:
+            entry: (source name, destination name) tuple
+        Raises:
+            HttpError and other exceptions from the final attempt
+        """
+        source, destination = entry
+        destination_container = self._destination_container_name()
+
+        path = "%s/%s" % (self.container.path, self._quote(source))
+        headers = {"destination": "/%s/%s" % \
+                (self._quote(destination_container), self._quote(destination))}
+
+        #send through the retry policy, bypassing the client's own
+        #retry_policy, so that attempts are not multiplied.
+        cloudfiles = self.container.client.cloudfiles
+        response_context = self.retry_policy.send_request(
+                cloudfiles._send_request, "COPY", path, None, headers)
+        with response_context as response:
+            response.read()
+
+    def copy(self):
+        """Copy objects.
+
+        Failed copies are recorded in the result's errors, as
+        (source name, destination name, exception) tuples, rather
+        than aborting the copy.
+
+        Returns:
+            CopyResult with copied list of (source name, destination
+            name) tuples, and skipped list of source names for which
+            rename_fn returned None.
+        Raises:
+            ResponseError, RackspaceError if the source container could
+            not be listed.
+        """
+        result = CopyResult()
+        listing = self.container.list_all_objects(
+                prefix=self.prefix,
+                batch_size=self.batch_size,
+                prefetch=1,
+                compact=True)
+
+        objects = listing
+        if self._destination_container_name() == self.container.name:
+            #copies may sort after the listing's position, in which case
+            #they would be listed and copied again.
+            try:
+                objects = list(listing)
+            finally:
+                listing.close()
+
+        def entries():
+            for info in objects:
+                destination = self.rename_fn(info.name)
+                if destination is None:
+                    result.skipped.append(info.name)
+                else:
+                    yield info.name, destination
+
+        thread_pool = ThreadPool(self.threads, name="PrefixCopier")
+        try:
+            for entry, future in thread_pool.imap_unordered(
+                    self.copy_object, entries(), max_pending=self.threads):
+                error = future.exception()
+                if error is not None:
+                    log.warning("copy of %s failed: %s" % (entry[0], error))
+                    result.errors.append((entry[0], entry[1], error))
+                else:
+                    result.copied.append(entry)
+        finally:
+            listing.close()
+            thread_pool.shutdown(wait=False)
+        return result
@@ -21,3 +21,16 @@ class ExtractArchiveError(RackspaceError):
         self.errors = result.get("Errors")
         message = "extract archive failed: %s" % self.errors
         super(ExtractArchiveError, self).__init__(message)
+
+class BulkDeleteError(RackspaceError):
+    def __init__(self, result):
+        self.result = result
+        self.errors = result.errors
+        message = "bulk delete failed: %s" % self.errors[:10]
+        super(BulkDeleteError, self).__init__(message)
+
+class PoolTimeoutError(RackspaceError):
+    def __init__(self, timeout):
+        self.timeout = timeout
+        message = "no pooled connection available within %ss" % timeout
+        super(PoolTimeoutError, self).__init__(message)
@@ -20,6 +20,20 @@ class CloudfilesClientFactory(Factory):
             keepalive=True,
             proxy=None,
             rest_client_class=RestClient,
+            token_cache=None,
+            token_refresh_margin=None,
+            catalog=None,
+            token=None,
+            lazy=False,
+            pool_size=10,
+            pool_max_idle=None,
+            pool_timeout=None,
+            retry_policy=None,
+            failover=False,
+            failover_probe_interval=30,
+            hedge_policy=None,
+            container_cache=None,
+            cdn_directory=None,
             debug_level=0):
         """CloudfilesClientFactory constructor
 
@@ -58,6 +72,60 @@ class CloudfilesClientFactory(Factory):
             proxy: (host, port) tuple specifying proxy for connection
             rest_client_class: optional RestClient class. If not 
                 specified sensible default will be used.
+            token_cache: optional TokenCache object used by the
+                IdentityServiceClient to persist and reuse tokens across
+                processes. This argument is ignored if an identity_client
+                argument is used.
+            token_refresh_margin: optional number of seconds prior to
+                token expiration at which the IdentityServiceClient
+                should renew the token in a background thread. This
+                argument is ignored if an identity_client argument is used.
+            catalog: optional ServiceCatalog, i.e. loaded from a
+                snapshot with ServiceCatalog.from_file(), used by the
+                IdentityServiceClient for endpoint lookups. If provided
+                along with token and region, no identity request will be
+                made until the token is expired or rejected. This argument
+                is ignored if an identity_client argument is used.
+            token: optional Token object or token id to be used by the
+                IdentityServiceClient. This argument is ignored if an
+                identity_client argument is used.
+            lazy: boolean indicating that authentication, rest client
+                setup, and loading of account data should be deferred
+                until first use of created clients.
+            pool_size: maximum number of concurrent connections to each
+                of the cloudfiles and cloudfiles CDN servers. Connections
+                are created on demand, so this only needs to be raised
+                when sharing the client between multiple threads.
+            pool_max_idle: optional number of seconds after which idle
+                pooled connections are closed rather than reused.
+            pool_timeout: optional number of seconds to wait for a
+                pooled connection when all are in use, after which
+                PoolTimeoutError is raised. By default requests wait
+                indefinitely.
+            retry_policy: optional RetryPolicy used to retry throttled
+                and failed cloudfiles and cloudfiles CDN requests with
+                backoff. Without a policy, requests are only retried
+                immediately by the RestClient, as determined by retries.
+                Each attempt of the policy is also retried by the
+                RestClient, so retries=0 should usually be used with it.
+            failover: boolean indicating that both the servicenet and
+                public cloudfiles endpoints should be used, routing requests
+                to the healthy, faster one and failing over automatically
+                when one becomes unavailable. The endpoint selected by
+                servicenet is preferred.
+            failover_probe_interval: number of seconds between background
+                endpoint health and latency probes when failover is
+                enabled. If None, no probes will be sent.
+            hedge_policy: optional HedgePolicy used to hedge storage
+                object reads, sending a duplicate GET on another pooled
+                connection when a response is slow to arrive. Reads
+                are only hedged if this is set.
+            container_cache: optional ContainerCache used by
+                get_container() to reuse recently fetched Container
+                objects rather than issuing HEAD requests.
+            cdn_directory: optional CdnDirectory used by Container
+                objects to resolve their CDN attributes from a periodic
+                cdn container listing rather than a CDN HEAD request.
             debug_level: httplib debug level. Setting this to 1 will log
                 http requests and responses which is very useful for 
                 debugging.
@@ -74,6 +142,20 @@ class CloudfilesClientFactory(Factory):
         self.keepalive = keepalive
         self.proxy = proxy
         self.rest_client_class = rest_client_class
+        self.token_cache = token_cache
+        self.token_refresh_margin = token_refresh_margin
+        self.catalog = catalog
+        self.token = token
+        self.lazy = lazy
+        self.pool_size = pool_size
+        self.pool_max_idle = pool_max_idle
+        self.pool_timeout = pool_timeout
+        self.retry_policy = retry_policy
+        self.failover = failover
+        self.failover_probe_interval = failover_probe_interval
+        self.hedge_policy = hedge_policy
+        self.container_cache = container_cache
+        self.cdn_directory = cdn_directory
         self.debug_level = debug_level
         self.username = username
 
@@ -92,4 +174,18 @@ class CloudfilesClientFactory(Factory):
                 keepalive=self.keepalive,
                 proxy=self.proxy,
                 rest_client_class=self.rest_client_class,
+                token_cache=self.token_cache,
+                token_refresh_margin=self.token_refresh_margin,
+                catalog=self.catalog,
+                token=self.token,
+                lazy=self.lazy,
+                pool_size=self.pool_size,
+                pool_max_idle=self.pool_max_idle,
+                pool_timeout=self.pool_timeout,
+                retry_policy=self.retry_policy,
+                failover=self.failover,
+                failover_probe_interval=self.failover_probe_interval,
+                hedge_policy=self.hedge_policy,
+                container_cache=self.container_cache,
+                cdn_directory=self.cdn_directory,
                 debug_level=self.debug_level)
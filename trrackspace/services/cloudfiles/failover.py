@@ -0,0 +1,253 @@
+import logging
+import threading
+import time
+
+from trhttp.errors import HttpError
+from trrackspace.services.cloudfiles.pool import RequestAborted
+
+log = logging.getLogger(__name__)
+
+class CircuitBreaker(object):
+    """Per endpoint circuit breaker.
+
+    The breaker opens after failure_threshold consecutive failures,
+    rejecting requests for reset_timeout seconds. It then becomes half
+    open, allowing trial requests: a success closes the breaker, and a
+    failure opens it again for another reset_timeout seconds.
+    """
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30):
+        """CircuitBreaker constructor
+
+        Args:
+            failure_threshold: number of consecutive failures after
+                which the breaker opens.
+            reset_timeout: number of seconds the breaker stays open
+                before allowing trial requests.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        """Returns CLOSED, OPEN, or HALF_OPEN"""
+        opened_at = self.opened_at
+        if opened_at is None:
+            return self.CLOSED
+        elif time.time() - opened_at < self.reset_timeout:
+            return self.OPEN
+        else:
+            return self.HALF_OPEN
+
+    def allow(self):
+        """Check if a request may be sent.
+
+        Returns:
+            True if the breaker is closed or half open, False otherwise.
+        """
+        return self.state != self.OPEN
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.opened_at is not None or \
+                    self.failures >= self.failure_threshold:
+                self.opened_at = time.time()
+
+
+class Endpoint(object):
+    """Api endpoint with its own connection pool, circuit breaker,
+    and latency estimate."""
+
+    def __init__(self, url, pool, breaker, latency_weight=0.3):
+        """Endpoint constructor
+
+        Args:
+            url: endpoint url
+            pool: RestClientPool for url
+            breaker: CircuitBreaker for url
+            latency_weight: weight of new samples in the exponentially
+                weighted moving average latency.
+        """
+        self.url = url
+        self.pool = pool
+        self.breaker = breaker
+        self.latency_weight = latency_weight
+        self.latency = None
+
+    def __repr__(self):
+        return "%s(url=%r, state=%s, latency=%r)" % \
+                (self.__class__, self.url, self.breaker.state, self.latency)
+
+    def record_success(self, latency=None):
+        if latency is None:
+            pass
+        elif self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.latency_weight * (latency - self.latency)
+        self.breaker.record_success()
+
+    def record_failure(self):
+        self.breaker.record_failure()
+
+
+class EndpointSelector(object):
+    """Route requests between equivalent endpoints.
+
+    Requests are routed to the endpoint with the lowest latency among
+    those whose circuit breaker allows requests, preferring endpoints
+    in the given order until latencies are known. Health is measured
+    from requests and, if probe_interval is set, from background HEAD
+    probes, which also measure latency and detect recovered endpoints
+    without sacrificing user requests.
+
+    Requests failing with connection errors (as opposed to HTTP error
+    responses) are failed over to the next endpoint if they are
+    idempotent and their body can be replayed.
+    """
+
+    IDEMPOTENT_METHODS = frozenset(
+            ["GET", "HEAD", "PUT", "DELETE", "OPTIONS", "COPY"])
+
+    def __init__(self, endpoints, probe_interval=30, probe_path=""):
+        """EndpointSelector constructor
+
+        Args:
+            endpoints: list of Endpoint objects in order of preference
+            probe_interval: optional number of seconds between background
+                health probes. If None, no probes will be sent.
+            probe_path: path to send HEAD probes to
+        """
+        self.endpoints = endpoints
+        self.probe_interval = probe_interval
+        self.probe_path = probe_path
+        self._probe_thread = None
+        self._probe_stop = threading.Event()
+
+        if self.probe_interval:
+            self.start()
+
+    def start(self):
+        """Start background health probes."""
+        if self._probe_thread is None:
+            self._probe_stop.clear()
+            self._probe_thread = threading.Thread(
+                    target=self._probe_loop,
+                    name="EndpointSelector-probe")
+            self._probe_thread.daemon = True
+            self._probe_thread.start()
+
+    def stop(self):
+        """Stop background health probes."""
+        thread, self._probe_thread = self._probe_thread, None
+        self._probe_stop.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _probe_loop(self):
+        while not self._probe_stop.is_set():
+            for endpoint in self.endpoints:
+                self.probe(endpoint)
+            self._probe_stop.wait(self.probe_interval)
+
+    def probe(self, endpoint):
+        """Probe endpoint health and latency with a HEAD request.
+
+        Args:
+            endpoint: Endpoint to probe
+        """
+        start = time.time()
+        try:
+            response_context = endpoint.pool.send_request(
+                    "HEAD", self.probe_path)
+            with response_context as response:
+                response.read()
+            endpoint.record_success(time.time() - start)
+        except HttpError as error:
+            if error.status >= 500:
+                endpoint.record_failure()
+            else:
+                endpoint.record_success(time.time() - start)
+        except Exception as error:
+            log.warning("endpoint probe failed: %s: %r" % (endpoint.url, error))
+            endpoint.record_failure()
+
+    def select(self, exclude=None):
+        """Select endpoint for the next request.
+
+        Args:
+            exclude: optional list of endpoints to exclude
+        Returns:
+            Endpoint, or None if all endpoints are excluded.
+        """
+        candidates = [e for e in self.endpoints if e not in (exclude or [])]
+        if not candidates:
+            return None
+
+        allowed = [e for e in candidates if e.breaker.allow()]
+        if not allowed:
+            #every breaker is open, so try the one open the longest
+            return min(candidates, key=lambda e: e.breaker.opened_at)
+
+        measured = [e for e in allowed if e.latency is not None]
+        if len(measured) == len(allowed):
+            return min(allowed, key=lambda e: e.latency)
+        return allowed[0]
+
+    @property
+    def current(self):
+        """Returns the Endpoint requests are currently routed to."""
+        return self.select()
+
+    def _is_replayable(self, data):
+        return data is None or isinstance(data, basestring)
+
+    def send_request(self, method, path, data=None, headers=None, **kwargs):
+        """Send request to the selected endpoint, failing over to the
+        remaining endpoints on connection errors.
+
+        Returns:
+            response context
+        Raises:
+            HttpError and other exceptions from the final attempt
+        """
+        can_failover = method.upper() in self.IDEMPOTENT_METHODS and \
+                self._is_replayable(data)
+
+        tried = []
+        while True:
+            endpoint = self.select(exclude=tried)
+            tried.append(endpoint)
+            try:
+                response_context = endpoint.pool.send_request(
+                        method, path, data, headers, **kwargs)
+                endpoint.record_success()
+                return response_context
+            except RequestAborted:
+                #aborted by the client, i.e. a losing hedged request
+                raise
+            except HttpError as error:
+                if error.status >= 500:
+                    endpoint.record_failure()
+                else:
+                    endpoint.record_success()
+                raise
+            except Exception as error:
+                endpoint.record_failure()
+                if not can_failover or \
+                        len(tried) >= len(self.endpoints):
+                    raise
+                log.warning("failing over from %s: %r" % (endpoint.url, error))
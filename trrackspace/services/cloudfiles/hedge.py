@@ -0,0 +1,259 @@
+import collections
+import Queue
+import threading
+import time
+
+from trrackspace.threadpool import ThreadPool
+from trrackspace.services.cloudfiles.pool import RequestTracker
+
+class HedgeCancelled(Exception):
+    """Raised into the response context of a losing hedged request."""
+    pass
+
+class OpenResponseContext(object):
+    """Response context wrapping an already entered response context."""
+
+    def __init__(self, response_context, response):
+        self.response_context = response_context
+        self.response = response
+
+    def __enter__(self):
+        return self.response
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self.response_context.__exit__(exc_type, exc_value, traceback)
+
+
+class HedgePolicy(object):
+    """Hedged request policy for tail latency reduction.
+
+    A hedged request is sent, and if its response has not started
+    arriving within delay seconds, a duplicate request is sent on another
+    pooled connection. Whichever responds first is used, and the other
+    is aborted by shutting down its connection, or closed if it has
+    already responded, discarding its connection.
+
+    The delay is the given percentile of recently observed response
+    times, bounded by min_delay and max_delay, so that roughly
+    (100 - percentile) percent of requests are hedged. Only idempotent
+    requests, i.e. storage object GETs, should be hedged.
+
+    Hedging adds load, so it is skipped when it would have to wait:
+    if all num_threads threads are busy, or if the caller's can_hedge
+    check, i.e. for an available pooled connection, fails. The fraction
+    of recent requests which are hedged is also capped at max_hedge_rate,
+    so that a slow service does not see its load doubled.
+
+    Example usage:
+        client = CloudfilesClient(username="user", api_key="...",
+                hedge_policy=HedgePolicy(percentile=95))
+        ...
+        client.hedge_policy.hedge_rate
+    """
+
+    def __init__(self,
+            percentile=95,
+            initial_delay=0.1,
+            min_delay=0.01,
+            max_delay=2.0,
+            window=1000,
+            min_samples=20,
+            num_threads=16,
+            max_hedge_rate=0.1):
+        """HedgePolicy constructor
+
+        Args:
+            percentile: response time percentile after which
+                a hedged request is sent.
+            initial_delay: delay in seconds to use until min_samples
+                response times have been observed.
+            min_delay: min delay in seconds
+            max_delay: max delay in seconds
+            window: number of recent response times to keep
+            min_samples: number of response times required before
+                the percentile delay is used.
+            num_threads: number of threads used to send requests
+            max_hedge_rate: max fraction of the last window requests
+                which may be hedged, once min_samples requests have
+                been sent.
+        """
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.max_hedge_rate = max_hedge_rate
+        self.samples = collections.deque(maxlen=window)
+        self.thread_pool = ThreadPool(num_threads, name="HedgePolicy")
+        self.lock = threading.Lock()
+
+        self._delay = initial_delay
+        self._samples_since_update = 0
+        self._in_flight = 0
+
+        #hedge decisions of the last window requests
+        self._recent = collections.deque(maxlen=window)
+        self._recent_hedged = 0
+
+        #counters
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.skipped = 0
+        self.errors = 0
+
+    @property
+    def hedge_rate(self):
+        """Returns fraction of requests which were hedged"""
+        return float(self.hedged) / self.requests if self.requests else 0.0
+
+    @property
+    def hedge_win_rate(self):
+        """Returns fraction of hedged requests won by the hedge"""
+        return float(self.hedge_wins) / self.hedged if self.hedged else 0.0
+
+    def stats(self):
+        """Returns dict of hedging counters"""
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "delay": self.delay()
+        }
+
+    def delay(self):
+        """Returns current hedge delay in seconds"""
+        return self._delay
+
+    def record(self, latency):
+        """Record response time.
+
+        Args:
+            latency: response time in seconds
+        """
+        with self.lock:
+            self.samples.append(latency)
+            self._samples_since_update += 1
+            #recomputing the percentile is O(n log n), so only do it
+            #periodically rather than on every sample.
+            if len(self.samples) >= self.min_samples and \
+                    self._samples_since_update >= self.min_samples:
+                self._samples_since_update = 0
+                samples = sorted(self.samples)
+                index = int(len(samples) * self.percentile / 100.0)
+                delay = samples[min(index, len(samples) - 1)]
+                self._delay = max(self.min_delay, min(self.max_delay, delay))
+
+    def _open(self, send, tracker):
+        start = time.time()
+        with tracker:
+            response_context = send()
+            response = response_context.__enter__()
+        return response_context, response, time.time() - start
+
+    def _close(self, future):
+        """Close the response of a losing request once it completes."""
+        try:
+            response_context, response, latency = future.result()
+            response_context.__exit__(HedgeCancelled, HedgeCancelled(), None)
+        except Exception:
+            pass
+
+    def _submit(self, send, completed):
+        """Submit request, returning (future, tracker) tuple."""
+        tracker = RequestTracker()
+        future = self.thread_pool.submit(self._open, send, tracker)
+        with self.lock:
+            self._in_flight += 1
+        future.add_done_callback(self._done)
+        future.add_done_callback(completed.put)
+        return future, tracker
+
+    def _done(self, future):
+        with self.lock:
+            self._in_flight -= 1
+
+    def _record_hedged(self, hedged):
+        with self.lock:
+            if len(self._recent) == self._recent.maxlen:
+                self._recent_hedged -= self._recent[0]
+            self._recent.append(hedged)
+            self._recent_hedged += hedged
+            if hedged:
+                self.hedged += 1
+
+    def _can_hedge(self, can_hedge):
+        """Check if a hedged request should be sent."""
+        with self.lock:
+            saturated = self._in_flight >= self.thread_pool.num_threads
+            capped = len(self._recent) >= self.min_samples and \
+                    self._recent_hedged >= \
+                    self.max_hedge_rate * len(self._recent)
+        if saturated or capped or (can_hedge is not None and not can_hedge()):
+            with self.lock:
+                self.skipped += 1
+            return False
+        return True
+
+    def send_request(self, send, can_hedge=None):
+        """Send hedged request.
+
+        Args:
+            send: callable sending the request and returning
+                a response context.
+            can_hedge: optional callable returning False if a hedged
+                request should not be sent, i.e. because the connection
+                pool is exhausted.
+        Returns:
+            response context
+        Raises:
+            exception raised by send if all requests fail
+        """
+        with self.lock:
+            self.requests += 1
+
+        completed = Queue.Queue()
+        try:
+            future, tracker = self._submit(send, completed)
+        except RuntimeError:
+            #policy shut down, i.e. by Cloudfiles.close()
+            return send()
+        futures, trackers = [future], [tracker]
+
+        try:
+            winner = completed.get(timeout=self.delay())
+            self._record_hedged(False)
+        except Queue.Empty:
+            hedged = self._can_hedge(can_hedge)
+            self._record_hedged(hedged)
+            if hedged:
+                future, tracker = self._submit(send, completed)
+                futures.append(future)
+                trackers.append(tracker)
+            winner = completed.get()
+
+        #if the first completed request failed, wait for the other
+        if winner.exception() is not None and len(futures) > 1:
+            with self.lock:
+                self.errors += 1
+            winner = completed.get()
+
+        for future, tracker in zip(futures, trackers):
+            if future is not winner and not future.cancel():
+                tracker.abort()
+                future.add_done_callback(self._close)
+
+        response_context, response, latency = winner.result()
+        self.record(latency)
+        if winner is not futures[0]:
+            with self.lock:
+                self.hedge_wins += 1
+
+        return OpenResponseContext(response_context, response)
+
+    def shutdown(self):
+        """Stop hedging threads. Requests sent after shutdown are
+        not hedged."""
+        self.thread_pool.shutdown(wait=False)
@@ -0,0 +1,323 @@
+import datetime
+import hashlib
+import itertools
+import sqlite3
+import threading
+
+from trrackspace.threadpool import ThreadPool
+from trrackspace.services.cloudfiles.listing import ObjectInfo
+
+class ListingIndex(object):
+    """SQLite backed local index of a container's object listing.
+
+    The index is populated from Container.list_object_batches() and
+    answers prefix, size, and last modified queries locally.
+
+    refresh() re-lists the given prefixes, i.e. the key ranges an
+    application knows to have changed, or the whole container, applying
+    added, modified, and deleted objects to the index.
+
+    Re-listed prefixes are split into ranges of about batch_size indexed
+    names, which are listed concurrently by up to threads threads. Each
+    range's listing is staged in a temporary table and checksummed, and
+    only ranges whose checksum differs from the index's are applied.
+
+    Example usage:
+        index = ListingIndex(container, "/var/tmp/container.db")
+        index.refresh(prefixes=["logs/2013-08-27/"])
+        for info in index.query(prefix="logs/",
+                modified_after="2013-08-27T00:00:00"):
+            ...
+    """
+
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS objects (
+            name TEXT PRIMARY KEY,
+            bytes INTEGER,
+            hash BLOB,
+            last_modified TEXT,
+            content_type TEXT)""",
+        """CREATE INDEX IF NOT EXISTS objects_last_modified
+            ON objects (last_modified)""",
+        """CREATE INDEX IF NOT EXISTS objects_bytes
+            ON objects (bytes)"""
+    ]
+
+    COLUMNS = "name, bytes, hash, last_modified, content_type"
+
+    def __init__(self, container, path=":memory:", batch_size=10000,
+            threads=1):
+        """ListingIndex constructor
+
+        Args:
+            container: Container object to index
+            path: SQLite database path. Defaults to an in memory database.
+            batch_size: number of objects to list with each request,
+                and approximate number of indexed objects in each
+                range which is listed and compared as a unit.
+            threads: number of threads to list ranges with
+        """
+        self.container = container
+        self.path = path
+        self.batch_size = batch_size
+        self.threads = threads
+        self.lock = threading.RLock()
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.text_factory = unicode
+        with self.connection:
+            for statement in self.SCHEMA:
+                self.connection.execute(statement)
+
+    def __len__(self):
+        return self.count()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def _prefix_range(self, prefix):
+        """Return (where, params) clause matching names with prefix."""
+        prefix = prefix.decode("utf-8") if isinstance(prefix, str) else prefix
+        if prefix[-1] < u"\uffff":
+            successor = prefix[:-1] + unichr(ord(prefix[-1]) + 1)
+            return "name >= ? AND name < ?", [prefix, successor]
+        return "name >= ? AND substr(name, 1, ?) = ?", \
+                [prefix, len(prefix), prefix]
+
+    def _row_to_object_info(self, row):
+        name, bytes, hash, last_modified, content_type = row
+        return ObjectInfo(name=name,
+                bytes=bytes,
+                hash=str(hash) if hash is not None else None,
+                last_modified=last_modified,
+                content_type=content_type)
+
+    def _timestamp(self, value):
+        if isinstance(value, datetime.datetime):
+            return value.isoformat()
+        return value
+
+    def refresh(self, prefixes=None, force=False):
+        """Refresh index from the container listing.
+
+        Args:
+            prefixes: optional list of name prefixes to re-list. If not
+                given the whole container is re-listed.
+            force: boolean indicating that listed ranges should be
+                applied to the index even if their checksums match.
+        Returns:
+            number of added, modified, and deleted objects
+        Raises:
+            ResponseError, RackspaceError
+        """
+        with self.lock:
+            changes = 0
+            for prefix in prefixes or [None]:
+                changes += self._rescan(prefix, force)
+            return changes
+
+    def _where(self, prefix=None, lower=None, upper=None):
+        """Return (where, params) clause matching names with prefix
+        in the [lower, upper) range."""
+        clauses, params = [], []
+        if prefix:
+            where, params = self._prefix_range(prefix)
+            clauses.append(where)
+        if lower is not None:
+            clauses.append("name >= ?")
+            params.append(lower)
+        if upper is not None:
+            clauses.append("name < ?")
+            params.append(upper)
+        return " AND ".join(clauses) or "1", params
+
+    def _boundaries(self, prefix=None):
+        """Returns every batch_size'th indexed name with prefix."""
+        where, params = self._where(prefix)
+        cursor = self.connection.execute(
+                "SELECT name FROM objects WHERE %s ORDER BY name" % where,
+                params)
+        return [row[0] for i, row in enumerate(cursor)
+                if i and i % self.batch_size == 0]
+
+    def _list_range(self, prefix, marker, end_marker):
+        """Generator yielding lists of ObjectInfo in a listing range."""
+        while True:
+            objects = self.container.list_objects(prefix=prefix,
+                    limit=self.batch_size,
+                    marker=marker,
+                    end_marker=end_marker,
+                    compact=True)
+            if objects:
+                yield objects
+            if len(objects) < self.batch_size:
+                break
+            marker = objects[-1].name.encode("utf-8")
+
+    def _checksum(self, rows):
+        md5 = hashlib.md5()
+        for name, bytes, hash, last_modified, content_type in rows:
+            md5.update(repr((name, bytes, str(hash or ""), last_modified,
+                content_type)))
+        return md5.digest()
+
+    def _rescan(self, prefix=None, force=False):
+        """Re-list objects with prefix, applying changed ranges to
+        the index.
+
+        Returns:
+            number of added, modified, and deleted objects
+        """
+        boundaries = self._boundaries(prefix)
+        ranges = self.container._partition_ranges(prefix, boundaries)
+        bounds = zip([None] + boundaries, boundaries + [None])
+
+        def list_range(index):
+            marker, end_marker = ranges[index]
+            return list(self._list_range(prefix, marker, end_marker))
+
+        if self.threads > 1 and len(ranges) > 1:
+            thread_pool = ThreadPool(self.threads, name="ListingIndex")
+            listings = thread_pool.map(list_range, range(len(ranges)),
+                    max_pending=self.threads * 2)
+        else:
+            thread_pool = None
+            listings = (self._list_range(prefix, *r) for r in ranges)
+
+        changes = 0
+        try:
+            for (lower, upper), batches in itertools.izip(bounds, listings):
+                changes += self._apply_range(prefix, lower, upper,
+                        batches, force)
+        finally:
+            if thread_pool is not None:
+                thread_pool.shutdown(wait=False)
+        return changes
+
+    def _apply_range(self, prefix, lower, upper, batches, force=False):
+        """Apply listing of names with prefix in [lower, upper) range
+        to the index, if its checksum differs from the index's.
+
+        Returns:
+            number of added, modified, and deleted objects
+        """
+        connection = self.connection
+        changes = 0
+
+        with connection:
+            connection.execute("CREATE TEMP TABLE IF NOT EXISTS listing ("
+                    "name TEXT PRIMARY KEY, bytes INTEGER, hash BLOB, "
+                    "last_modified TEXT, content_type TEXT)")
+            connection.execute("DELETE FROM listing")
+
+            #ranges overlap by names listed before lower, see
+            #Container._partition_ranges()
+            for batch in batches:
+                rows = [(i.name, i.bytes,
+                    sqlite3.Binary(i.hash) if i.hash else None,
+                    i.last_modified, i.content_type) for i in batch
+                    if (lower is None or i.name >= lower) and
+                       (upper is None or i.name < upper)]
+                connection.executemany("INSERT OR REPLACE INTO listing "
+                        "(%s) VALUES (?, ?, ?, ?, ?)" % self.COLUMNS, rows)
+
+            where, params = self._where(prefix, lower, upper)
+            listed = self._checksum(connection.execute(
+                    "SELECT %s FROM listing ORDER BY name" % self.COLUMNS))
+            indexed = self._checksum(connection.execute(
+                    "SELECT %s FROM objects WHERE %s ORDER BY name" % \
+                    (self.COLUMNS, where), params))
+
+            if force or listed != indexed:
+                changes += connection.execute("INSERT OR REPLACE INTO "
+                        "objects (%s) SELECT l.name, l.bytes, l.hash, "
+                        "l.last_modified, l.content_type FROM listing l "
+                        "JOIN objects o ON o.name = l.name WHERE "
+                        "o.bytes IS NOT l.bytes OR o.hash IS NOT l.hash OR "
+                        "o.last_modified IS NOT l.last_modified OR "
+                        "o.content_type IS NOT l.content_type" % \
+                        self.COLUMNS).rowcount
+                changes += connection.execute("INSERT OR IGNORE INTO "
+                        "objects (%s) SELECT %s FROM listing" % \
+                        (self.COLUMNS, self.COLUMNS)).rowcount
+                changes += connection.execute("DELETE FROM objects WHERE "
+                        "%s AND name NOT IN (SELECT name FROM listing)" % \
+                        where, params).rowcount
+            connection.execute("DELETE FROM listing")
+
+        return changes
+
+    def count(self, prefix=None):
+        """Returns number of indexed objects, optionally with prefix."""
+        where, params = "1", []
+        if prefix:
+            where, params = self._prefix_range(prefix)
+        with self.lock:
+            return self.connection.execute(
+                    "SELECT COUNT(*) FROM objects WHERE %s" % where,
+                    params).fetchone()[0]
+
+    def get(self, name):
+        """Get indexed object.
+
+        Args:
+            name: storage object name
+        Returns:
+            ObjectInfo or None if not indexed.
+        """
+        name = name.decode("utf-8") if isinstance(name, str) else name
+        with self.lock:
+            row = self.connection.execute("SELECT name, bytes, hash, "
+                    "last_modified, content_type FROM objects WHERE name = ?",
+                    (name,)).fetchone()
+        return self._row_to_object_info(row) if row else None
+
+    def query(self, prefix=None, min_bytes=None, max_bytes=None,
+            modified_after=None, modified_before=None, content_type=None,
+            limit=None):
+        """Query indexed objects.
+
+        Args:
+            prefix: object name prefix
+            min_bytes: min object size in bytes, inclusive
+            max_bytes: max object size in bytes, inclusive
+            modified_after: datetime or last modified timestamp string,
+                i.e. 2013-08-27T20:14:50, objects must be modified after.
+            modified_before: datetime or last modified timestamp string
+                objects must be modified before.
+            content_type: content type
+            limit: max number of results
+        Returns:
+            list of ObjectInfo objects ordered by name
+        """
+        clauses, params = [], []
+        if prefix:
+            where, where_params = self._prefix_range(prefix)
+            clauses.append(where)
+            params.extend(where_params)
+        if min_bytes is not None:
+            clauses.append("bytes >= ?")
+            params.append(min_bytes)
+        if max_bytes is not None:
+            clauses.append("bytes <= ?")
+            params.append(max_bytes)
+        if modified_after is not None:
+            clauses.append("last_modified > ?")
+            params.append(self._timestamp(modified_after))
+        if modified_before is not None:
+            clauses.append("last_modified < ?")
+            params.append(self._timestamp(modified_before))
+        if content_type is not None:
+            clauses.append("content_type = ?")
+            params.append(content_type)
+
+        sql = "SELECT name, bytes, hash, last_modified, content_type " \
+                "FROM objects WHERE %s ORDER BY name" % \
+                (" AND ".join(clauses) or "1")
+        if limit:
+            sql += " LIMIT %d" % int(limit)
+
+        with self.lock:
+            rows = self.connection.execute(sql, params).fetchall()
+        return [self._row_to_object_info(row) for row in rows]
@@ -0,0 +1,225 @@
+import array
+import binascii
+import json
+
+#interned content types. Containers typically hold few distinct content
+#types, so sharing a single string per type saves one string per object.
+_content_types = {}
+
+def intern_content_type(content_type):
+    """Return shared instance of content_type string."""
+    if content_type is None:
+        return None
+    return _content_types.setdefault(content_type, content_type)
+
+
+class ObjectInfo(object):
+    """Compact storage object listing record.
+
+    ObjectInfo is a memory efficient alternative to the object info dicts
+    returned from Container.list_objects(), using __slots__, a 16 byte
+    binary md5 hash, and interned content types.
+
+    Logical directory entries, returned for listings with a delimiter,
+    have a name, but no bytes, hash, last_modified, or content_type.
+    """
+
+    __slots__ = ("name", "bytes", "hash", "last_modified", "content_type")
+
+    @classmethod
+    def from_json(cls, json):
+        if "subdir" in json:
+            return cls(name=json["subdir"])
+
+        hash = json.get("hash")
+        return cls(
+                name=json.get("name"),
+                bytes=json.get("bytes"),
+                hash=binascii.unhexlify(hash) if hash else None,
+                last_modified=json.get("last_modified"),
+                content_type=intern_content_type(json.get("content_type")))
+
+    def __init__(self, name, bytes=None, hash=None,
+            last_modified=None, content_type=None):
+        """ObjectInfo constructor
+
+        Args:
+            name: storage object name
+            bytes: storage object size in bytes
+            hash: 16 byte binary md5 hash of storage object data
+            last_modified: last modified timestamp string, i.e.
+                2013-08-27T20:14:50.378200
+            content_type: storage object content type
+        """
+        self.name = name
+        self.bytes = bytes
+        self.hash = hash
+        self.last_modified = last_modified
+        self.content_type = content_type
+
+    def __repr__(self):
+        return "%s(name=%r, bytes=%r, etag=%r)" % \
+                (self.__class__, self.name, self.bytes, self.etag)
+
+    def __str__(self):
+        return json.dumps(self.to_json())
+
+    def __eq__(self, other):
+        if not isinstance(other, ObjectInfo):
+            return NotImplemented
+        return self.to_tuple() == other.to_tuple()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    @property
+    def is_subdir(self):
+        """Returns True if this is a logical directory entry."""
+        return self.bytes is None
+
+    @property
+    def etag(self):
+        """Returns hex md5 hash as found in listings and etags."""
+        return binascii.hexlify(self.hash) if self.hash else None
+
+    def to_tuple(self):
+        return (self.name, self.bytes, self.hash,
+                self.last_modified, self.content_type)
+
+    def to_json(self):
+        if self.is_subdir:
+            return { "subdir": self.name }
+        return {
+            "name": self.name,
+            "bytes": self.bytes,
+            "hash": self.etag,
+            "last_modified": self.last_modified,
+            "content_type": self.content_type
+        }
+
+
+class ObjectInfoBatch(object):
+    """Columnar batch of storage object listing records.
+
+    Each field is stored as a column: sizes in an array of longs,
+    md5 hashes concatenated in a single bytearray, and content types
+    interned, which allows filtering a batch with a single pass
+    over the relevant column rather than over per object records.
+    Logical directory entries have a size of -1 and an all zero hash.
+
+    Example usage:
+        for batch in container.list_object_batches(prefix="logs/"):
+            large = batch.filter(min_bytes=1024**3)
+            for info in large:
+                ...
+    """
+
+    EMPTY_HASH = "\x00" * 16
+
+    @classmethod
+    def from_json(cls, json):
+        batch = cls()
+        for info in json:
+            batch.append(ObjectInfo.from_json(info))
+        return batch
+
+    def __init__(self, object_infos=None):
+        """ObjectInfoBatch constructor
+
+        Args:
+            object_infos: optional iterable of ObjectInfo objects
+        """
+        self.names = []
+        self.sizes = array.array("l")
+        self.hashes = bytearray()
+        self.last_modified = []
+        self.content_types = []
+
+        for object_info in object_infos or []:
+            self.append(object_info)
+
+    def __repr__(self):
+        return "%s(len=%d)" % (self.__class__, len(self))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        size = self.sizes[index]
+        if size < 0:
+            return ObjectInfo(name=self.names[index])
+        return ObjectInfo(
+                name=self.names[index],
+                bytes=size,
+                hash=str(self.hashes[index * 16:(index + 1) * 16]),
+                last_modified=self.last_modified[index],
+                content_type=self.content_types[index])
+
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield self[index]
+
+    def append(self, object_info):
+        """Append ObjectInfo to batch."""
+        self.names.append(object_info.name)
+        self.sizes.append(-1 if object_info.is_subdir else object_info.bytes)
+        self.hashes.extend(object_info.hash or self.EMPTY_HASH)
+        self.last_modified.append(object_info.last_modified)
+        self.content_types.append(
+                intern_content_type(object_info.content_type))
+
+    def select(self, indices):
+        """Return new batch containing the records at indices."""
+        result = ObjectInfoBatch()
+        for index in indices:
+            result.names.append(self.names[index])
+            result.sizes.append(self.sizes[index])
+            result.hashes.extend(self.hashes[index * 16:(index + 1) * 16])
+            result.last_modified.append(self.last_modified[index])
+            result.content_types.append(self.content_types[index])
+        return result
+
+    def filter(self, prefix=None, min_bytes=None, max_bytes=None,
+            modified_after=None, modified_before=None, content_type=None):
+        """Return new batch of records matching all given criteria.
+
+        Args:
+            prefix: object name prefix
+            min_bytes: min object size in bytes, inclusive
+            max_bytes: max object size in bytes, inclusive
+            modified_after: last modified timestamp string, i.e.
+                2013-08-27T20:14:50, records must be modified after.
+            modified_before: last modified timestamp string records
+                must be modified before.
+            content_type: content type
+        Returns:
+            ObjectInfoBatch. Logical directory entries are excluded if
+            any criteria other than prefix is given.
+        """
+        indices = xrange(len(self))
+        if prefix is not None:
+            names = self.names
+            indices = [i for i in indices if names[i].startswith(prefix)]
+        if min_bytes is not None:
+            sizes = self.sizes
+            indices = [i for i in indices if sizes[i] >= min_bytes]
+        if max_bytes is not None:
+            sizes = self.sizes
+            indices = [i for i in indices if 0 <= sizes[i] <= max_bytes]
+        if modified_after is not None:
+            last_modified = self.last_modified
+            indices = [i for i in indices
+                    if last_modified[i] is not None and
+                    last_modified[i] > modified_after]
+        if modified_before is not None:
+            last_modified = self.last_modified
+            indices = [i for i in indices
+                    if last_modified[i] is not None and
+                    last_modified[i] < modified_before]
+        if content_type is not None:
+            content_types = self.content_types
+            indices = [i for i in indices if content_types[i] == content_type]
+        return self.select(indices)
@@ -0,0 +1,272 @@
+import hashlib
+import logging
+import os
+
+from trrackspace.errors import ResponseError
+from trrackspace.threadpool import ThreadPool
+from trrackspace.services.cloudfiles.storage_object import StorageObject
+
+log = logging.getLogger(__name__)
+
+class _HashingWriter(object):
+    """File-like wrapper updating an md5 hash with written data."""
+
+    def __init__(self, fileobj, md5):
+        self.fileobj = fileobj
+        self.md5 = md5
+
+    def write(self, data):
+        self.md5.update(data)
+        self.fileobj.write(data)
+
+
+class MirrorResult(object):
+    """Container mirror result."""
+
+    def __init__(self):
+        self.downloaded = []
+        self.resumed = []
+        self.unchanged = 0
+        self.errors = []
+
+    def __repr__(self):
+        return "%s(downloaded=%d, resumed=%d, unchanged=%d, errors=%d)" % \
+                (self.__class__, len(self.downloaded), len(self.resumed),
+                 self.unchanged, len(self.errors))
+
+    @property
+    def succeeded(self):
+        """Returns True if all downloads succeeded."""
+        return not self.errors
+
+
+class ContainerMirror(object):
+    """Mirror a container, or the objects below a prefix, to a directory.
+
+    Objects are downloaded by up to threads concurrent workers. Local
+    files whose size and md5 match the listing are skipped. Each object
+    is downloaded to a '.part' file next to its destination, which is
+    renamed into place once its md5 has been verified, so destination
+    files are never partially written. A '.part' file left by an
+    interrupted mirror is resumed with a Range request, and downloaded
+    from scratch if the resumed file does not match the listing hash,
+    i.e. because the object has since been replaced.
+
+    The listing hash of a large object manifest is not the md5 of its
+    data, so if a local file or download does not match the listing
+    the object is checked with a HEAD request, and large objects are
+    verified by size only.
+
+    Object data is written as stored, so gzip encoded objects are not
+    decompressed. Directory marker objects, whose names end with '/',
+    are not mirrored.
+
+    Example usage:
+        result = ContainerMirror(container, "/var/restore",
+                prefix="backups/", threads=16).mirror()
+    """
+
+    PART_SUFFIX = ".part"
+
+    def __init__(self, container, path, prefix=None, threads=8,
+            batch_size=10000, chunk_size=65535):
+        """ContainerMirror constructor
+
+        Args:
+            container: Container object
+            path: local directory path
+            prefix: optional storage object name prefix, i.e.
+                'backups/'. A trailing '/' is added if missing. Objects
+                are written to their name relative to prefix below path.
+            threads: number of concurrent downloads
+            batch_size: number of objects to list with each request
+            chunk_size: chunk size to use when writing data
+        """
+        self.container = container
+        self.path = path
+        self.prefix = prefix.rstrip("/") + "/" if prefix else ""
+        self.threads = threads
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+
+    def local_path(self, name):
+        """Returns local file path for storage object name.
+
+        Raises:
+            ValueError if name is not below prefix, or would be written
+            outside of path.
+        """
+        if not name.startswith(self.prefix):
+            raise ValueError("object not below prefix: %r" % name)
+        relative_name = name[len(self.prefix):]
+        if isinstance(relative_name, unicode):
+            relative_name = relative_name.encode("utf-8")
+        parts = [part for part in relative_name.split("/") if part]
+        if not parts or any(part in [".", ".."] for part in parts):
+            raise ValueError("invalid object path: %r" % name)
+        return os.path.join(self.path, *parts)
+
+    def _md5(self, path, md5=None):
+        md5 = md5 or hashlib.md5()
+        with open(path, "rb") as f:
+            for data in iter(lambda: f.read(self.chunk_size), ""):
+                md5.update(data)
+        return md5
+
+    def is_unchanged(self, file_path, info):
+        """Check if local file matches storage object listing info.
+
+        Args:
+            file_path: local file path
+            info: ObjectInfo
+        Returns:
+            True if the object does not need to be downloaded.
+        """
+        try:
+            if os.path.getsize(file_path) != info.bytes:
+                return False
+        except OSError:
+            return False
+        return self._md5(file_path).digest() == info.hash
+
+    def _large_object_size(self, name):
+        """Returns size of object if it is a large object manifest,
+        or None otherwise."""
+        storage_object = StorageObject(self.container, name)
+        storage_object.load()
+        if storage_object.manifest or storage_object.static_large_object:
+            return storage_object.content_length
+        return None
+
+    def _fetch(self, info, part_path, resume, size):
+        """Download object to part_path, resuming if possible.
+
+        Returns:
+            (md5 digest of part file, resumed boolean) tuple. The digest
+            is None if the part file could not be resumed, i.e. because
+            it is longer than the object.
+        """
+        offset = 0
+        md5 = hashlib.md5()
+        if resume and os.path.exists(part_path):
+            offset = os.path.getsize(part_path)
+            if offset <= size:
+                self._md5(part_path, md5)
+            else:
+                offset = 0
+                md5 = hashlib.md5()
+
+        storage_object = StorageObject(self.container, info.name)
+        with open(part_path, "ab" if offset else "wb") as f:
+            if offset == 0 or offset < size:
+                try:
+                    storage_object.read(offset=offset,
+                            output=_HashingWriter(f, md5),
+                            output_chunk_size=self.chunk_size,
+                            decompress=False)
+                except ResponseError as error:
+                    #range not satisfiable, the object has shrunk
+                    if offset == 0 or error.status != 416:
+                        raise
+                    return None, True
+        return md5.digest(), offset > 0
+
+    def _verify(self, info, part_path, digest, large_object_size):
+        if large_object_size is not None:
+            return os.path.getsize(part_path) == large_object_size
+        return digest == info.hash
+
+    def download(self, info):
+        """Download a single object.
+
+        Args:
+            info: ObjectInfo
+        Returns:
+            (downloaded, resumed) tuple of booleans, where downloaded
+            is False if the local file is unchanged.
+        Raises:
+            ValueError, IOError, ResponseError, RackspaceError
+        """
+        file_path = self.local_path(info.name)
+        large_object_size, checked = None, False
+        if os.path.exists(file_path):
+            if self.is_unchanged(file_path, info):
+                return False, False
+            large_object_size = self._large_object_size(info.name)
+            checked = True
+            if large_object_size == os.path.getsize(file_path):
+                return False, False
+
+        directory = os.path.dirname(file_path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                #created concurrently by another worker
+                if not os.path.isdir(directory):
+                    raise
+
+        part_path = file_path + self.PART_SUFFIX
+        size = info.bytes if large_object_size is None else large_object_size
+        digest, resumed = self._fetch(info, part_path, True, size)
+        if digest is not None and digest != info.hash and not checked:
+            large_object_size = self._large_object_size(info.name)
+            checked = True
+
+        if resumed and \
+                not self._verify(info, part_path, digest, large_object_size):
+            log.info("restarting download of %s" % info.name)
+            digest, resumed = self._fetch(info, part_path, False, size)
+            if digest != info.hash and not checked:
+                large_object_size = self._large_object_size(info.name)
+
+        if not self._verify(info, part_path, digest, large_object_size):
+            raise IOError("%s mismatch for %s" % \
+                    ("size" if large_object_size is not None else "md5",
+                     info.name))
+
+        os.rename(part_path, file_path)
+        return True, resumed
+
+    def mirror(self):
+        """Mirror the container to the directory.
+
+        Failed downloads are recorded in the result's errors, as
+        (name, exception) tuples, rather than aborting the mirror.
+
+        Returns:
+            MirrorResult
+        Raises:
+            ResponseError, RackspaceError if the container could not
+            be listed.
+        """
+        result = MirrorResult()
+        objects = self.container.list_all_objects(
+                prefix=self.prefix or None,
+                batch_size=self.batch_size,
+                prefetch=1,
+                compact=True)
+        files = (info for info in objects if not info.name.endswith("/"))
+
+        thread_pool = ThreadPool(self.threads, name="ContainerMirror")
+        try:
+            for info, future in thread_pool.imap_unordered(
+                    self.download, files):
+                error = future.exception()
+                if error is not None:
+                    log.warning("download of %s failed: %s" % \
+                            (info.name, error))
+                    result.errors.append((info.name, error))
+                    continue
+
+                downloaded, resumed = future.result()
+                if downloaded:
+                    result.downloaded.append(info.name)
+                    if resumed:
+                        result.resumed.append(info.name)
+                else:
+                    result.unchanged += 1
+        finally:
+            objects.close()
+            thread_pool.shutdown(wait=False)
+        return result
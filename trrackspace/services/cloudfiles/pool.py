@@ -0,0 +1,345 @@
+import select
+import socket
+import threading
+import time
+
+from trhttp.errors import HttpError
+from trrackspace.services.cloudfiles.errors import PoolTimeoutError
+
+#per thread RequestTracker, see RequestTracker.__enter__()
+_local = threading.local()
+
+class RequestAborted(Exception):
+    """Raised by RestClientPool.send_request() for an aborted request."""
+    pass
+
+
+class RequestTracker(object):
+    """Tracks the RestClients a thread uses to send requests, so that
+    its in-flight requests can be aborted from another thread.
+
+    While a tracker is entered, RestClientPool.send_request() registers
+    the RestClient sending the request until its response context exits.
+    abort() shuts down the connections of registered RestClients, which
+    fails blocked requests with RequestAborted, and fails subsequent
+    requests of the thread immediately.
+
+    Example usage:
+        tracker = RequestTracker()
+        with tracker:
+            response_context = cloudfiles.send_request("GET", path)
+        ...
+        #in another thread
+        tracker.abort()
+    """
+
+    def __init__(self):
+        self.rest_clients = []
+        self.aborted = False
+        self.lock = threading.Lock()
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = getattr(_local, "tracker", None)
+        _local.tracker = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.tracker, self._previous = self._previous, None
+
+    def track(self, rest_client):
+        """Register RestClient sending a request.
+
+        Returns:
+            False if the tracker was aborted, True otherwise.
+        """
+        with self.lock:
+            if self.aborted:
+                return False
+            self.rest_clients.append(rest_client)
+            return True
+
+    def untrack(self, rest_client):
+        """Unregister RestClient before it is returned to the pool."""
+        with self.lock:
+            if rest_client in self.rest_clients:
+                self.rest_clients.remove(rest_client)
+
+    def abort(self):
+        """Abort in-flight and subsequent requests."""
+        with self.lock:
+            self.aborted = True
+            for rest_client in self.rest_clients:
+                connection = getattr(rest_client, "connection", None)
+                sock = getattr(connection, "sock", None)
+                if sock is None:
+                    continue
+                try:
+                    #unlike close(), shutdown() wakes a blocked recv()
+                    sock.shutdown(socket.SHUT_RDWR)
+                except (socket.error, AttributeError):
+                    pass
+
+
+class RestClientPool(object):
+    """Bounded, thread-safe pool of RestClient objects.
+
+    Each RestClient maintains a single (keepalive) connection, so the
+    pool allows up to size requests to be in flight concurrently,
+    including streaming responses which hold their connection until
+    they are fully consumed. RestClients are created on demand, reused
+    most recently released first to maximize keepalive reuse, and
+    discarded if a request fails with a non-HTTP error, if they have
+    been idle longer than max_idle seconds, or if their connection
+    was closed by the server while idle. Once the pool is closed,
+    RestClients are closed as they are released.
+    """
+
+    def __init__(self, create_rest_client, size=10, max_idle=None,
+            timeout=None):
+        """RestClientPool constructor
+
+        Args:
+            create_rest_client: callable returning a new RestClient
+            size: maximum number of RestClients (connections)
+            max_idle: optional number of seconds after which idle
+                RestClients are discarded rather than reused.
+            timeout: optional default number of seconds acquire()
+                waits for a RestClient when the pool is at capacity.
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+
+        self.create_rest_client = create_rest_client
+        self.size = size
+        self.max_idle = max_idle
+        self.timeout = timeout
+
+        #stack of idle (rest_client, idle_since) tuples
+        self._idle = []
+        self._num_rest_clients = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def idle_rest_clients(self):
+        """Returns list of currently idle RestClients"""
+        with self._condition:
+            return [rest_client for rest_client, _ in self._idle]
+
+    def available(self):
+        """Returns number of RestClients which can be acquired
+        without waiting."""
+        with self._condition:
+            return len(self._idle) + self.size - self._num_rest_clients
+
+    def _is_healthy(self, rest_client, idle_since):
+        """Check if an idle RestClient can be reused.
+
+        Args:
+            rest_client: idle RestClient
+            idle_since: timestamp at which rest_client was released
+        Returns:
+            True if rest_client can be reused, False otherwise.
+        """
+        if self.max_idle is not None and \
+                time.time() - idle_since > self.max_idle:
+            return False
+        return not self._is_connection_dropped(rest_client)
+
+    def _is_connection_dropped(self, rest_client):
+        """Check if an idle RestClient's connection was closed.
+
+        An idle keepalive socket should never be readable. If it is,
+        the server has either closed the connection or sent unexpected
+        data, and the connection can not be reused.
+        """
+        connection = getattr(rest_client, "connection", None)
+        sock = getattr(connection, "sock", None)
+        if sock is None:
+            return False
+        try:
+            readable, _, _ = select.select([sock], [], [], 0.0)
+            return bool(readable)
+        except (select.error, ValueError, TypeError):
+            return True
+
+    def _close(self, rest_client):
+        close = getattr(rest_client, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+
+    def acquire(self, timeout=None):
+        """Acquire a RestClient, waiting for one to be released if
+        the pool is at capacity.
+
+        Args:
+            timeout: optional max number of seconds to wait. Defaults
+                to the pool's timeout, or waits indefinitely if neither
+                is set.
+        Returns:
+            RestClient
+        Raises:
+            PoolTimeoutError if no RestClient became available
+            within timeout.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        deadline = None if timeout is None else time.time() + timeout
+
+        discarded = []
+        timed_out = False
+        with self._condition:
+            while True:
+                rest_client = None
+                while self._idle:
+                    rest_client, idle_since = self._idle.pop()
+                    if self._is_healthy(rest_client, idle_since):
+                        break
+                    discarded.append(rest_client)
+                    self._num_rest_clients -= 1
+                    rest_client = None
+
+                if rest_client is not None:
+                    break
+                elif self._num_rest_clients < self.size:
+                    self._num_rest_clients += 1
+                    break
+                elif deadline is None:
+                    self._condition.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        timed_out = True
+                        break
+                    self._condition.wait(remaining)
+
+        for client in discarded:
+            self._close(client)
+
+        if timed_out:
+            raise PoolTimeoutError(timeout)
+
+        if rest_client is None:
+            try:
+                rest_client = self.create_rest_client()
+            except:
+                with self._condition:
+                    self._num_rest_clients -= 1
+                    self._condition.notify()
+                raise
+
+        return rest_client
+
+    def release(self, rest_client, healthy=True):
+        """Return a RestClient to the pool.
+
+        Args:
+            rest_client: RestClient previously returned from acquire()
+            healthy: boolean indicating the RestClient's connection
+                can be reused. Unhealthy RestClients are discarded.
+        """
+        with self._condition:
+            #a closed pool closes clients in use as they are released
+            healthy = healthy and not self._closed
+            if healthy:
+                self._idle.append((rest_client, time.time()))
+            else:
+                self._num_rest_clients -= 1
+            self._condition.notify()
+
+        if not healthy:
+            self._close(rest_client)
+
+    def close(self):
+        """Close and discard idle RestClients.
+
+        RestClients which are in use are closed once they are released.
+        The pool remains usable, but RestClients acquired after close()
+        are also closed on release rather than reused.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._num_rest_clients -= len(idle)
+            self._condition.notify_all()
+
+        for rest_client, _ in idle:
+            self._close(rest_client)
+
+    def send_request(self, *args, **kwargs):
+        """Send request using a pooled RestClient.
+
+        Takes the same arguments as RestClient.send_request(). The
+        RestClient is returned to the pool when the returned response
+        context exits.
+
+        Returns:
+            response context
+        Raises:
+            HttpError, RequestAborted
+        """
+        tracker = getattr(_local, "tracker", None)
+        rest_client = self.acquire()
+        if tracker is not None and not tracker.track(rest_client):
+            self.release(rest_client)
+            raise RequestAborted()
+
+        try:
+            response_context = rest_client.send_request(*args, **kwargs)
+        except HttpError:
+            self._release(rest_client, tracker)
+            raise
+        except:
+            self._release(rest_client, tracker, healthy=False)
+            if tracker is not None and tracker.aborted:
+                raise RequestAborted()
+            raise
+        return PooledResponseContext(self, rest_client, response_context,
+                tracker)
+
+    def _release(self, rest_client, tracker, healthy=True):
+        if tracker is not None:
+            tracker.untrack(rest_client)
+        self.release(rest_client, healthy=healthy)
+
+
+class PooledResponseContext(object):
+    """Response context which returns its RestClient to the pool on exit."""
+
+    def __init__(self, pool, rest_client, response_context, tracker=None):
+        self.pool = pool
+        self.rest_client = rest_client
+        self.response_context = response_context
+        self.tracker = tracker
+        self.released = False
+
+    def __enter__(self):
+        try:
+            return self.response_context.__enter__()
+        except HttpError:
+            self.release()
+            raise
+        except:
+            self.release(healthy=False)
+            raise
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            return self.response_context.__exit__(
+                    exc_type, exc_value, traceback)
+        finally:
+            #a response abandoned before being fully read (i.e. a partially
+            #consumed chunks() generator) leaves unread data on the
+            #connection, so it can only be reused after a clean exit.
+            healthy = exc_type is None or issubclass(exc_type, HttpError)
+            self.release(healthy=healthy)
+
+    def release(self, healthy=True):
+        if not self.released:
+            self.released = True
+            self.pool._release(self.rest_client, self.tracker,
+                    healthy=healthy)
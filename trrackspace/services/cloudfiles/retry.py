@@ -0,0 +1,260 @@
+import email.utils
+import httplib
+import logging
+import random
+import socket
+import sys
+import threading
+import time
+
+from trhttp.errors import HttpError
+
+log = logging.getLogger(__name__)
+
+class RetryBudget(object):
+    """Token bucket limiting retries relative to requests.
+
+    Every request deposits ratio tokens and every retry withdraws one,
+    so retries are bounded to roughly ratio * requests. In addition,
+    min_per_second tokens are deposited every second so that a lightly
+    loaded client can still retry. Balance never exceeds capacity.
+    """
+
+    def __init__(self, ratio=0.1, min_per_second=1.0, capacity=20):
+        """RetryBudget constructor
+
+        Args:
+            ratio: retry tokens deposited per request
+            min_per_second: retry tokens deposited per second
+            capacity: max retry token balance
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self.balance = capacity
+        self.last_update = time.time()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.time()
+        elapsed = max(0, now - self.last_update)
+        self.last_update = now
+        self.balance = min(self.capacity,
+                self.balance + elapsed * self.min_per_second)
+
+    def deposit(self):
+        """Record a request."""
+        with self.lock:
+            self._refill()
+            self.balance = min(self.capacity, self.balance + self.ratio)
+
+    def withdraw(self):
+        """Attempt to spend a retry.
+
+        Returns:
+            True if the retry is within budget, False otherwise.
+        """
+        with self.lock:
+            self._refill()
+            if self.balance >= 1:
+                self.balance -= 1
+                return True
+            return False
+
+
+class RetryPolicy(object):
+    """Retry policy for Cloudfiles and CloudfilesCdn requests.
+
+    Failed requests are retried with exponential backoff and full jitter,
+    i.e. after sleeping a random duration between 0 and
+    min(max_backoff, backoff * 2**attempt) seconds. If the response
+    includes a Retry-After header its value is used instead.
+
+    Throttled requests (throttle_statuses) were rejected before being
+    processed and are retried regardless of method. Other retryable
+    failures (retry_statuses and connection errors) are only retried
+    for idempotent methods. Requests whose body is a stream which can
+    not be rewound are never retried.
+
+    Retries are also bounded by a RetryBudget, shared by all clients
+    using the policy, so that a struggling service is not overwhelmed
+    with retries.
+
+    Note that each attempt is sent by a RestClient, which retries
+    failures itself as determined by its retries setting, so a request
+    may be sent up to (max_retries + 1) * (retries + 1) times. Clients
+    using a policy should usually be created with retries=0.
+
+    Example usage:
+        client = CloudfilesClient(username="user", api_key="...",
+                retries=0, retry_policy=RetryPolicy(max_retries=5))
+    """
+
+    IDEMPOTENT_METHODS = frozenset(
+            ["GET", "HEAD", "PUT", "DELETE", "OPTIONS", "COPY"])
+    THROTTLE_STATUSES = frozenset([429, 498, 503])
+    RETRY_STATUSES = frozenset([500, 502, 504])
+    RETRY_EXCEPTIONS = (socket.error, httplib.HTTPException)
+
+    def __init__(self,
+            max_retries=3,
+            backoff=0.5,
+            max_backoff=30,
+            max_retry_after=60,
+            jitter=True,
+            idempotent_methods=None,
+            throttle_statuses=None,
+            retry_statuses=None,
+            budget=None):
+        """RetryPolicy constructor
+
+        Args:
+            max_retries: max number of times a request will be retried
+            backoff: base backoff in seconds
+            max_backoff: max backoff in seconds
+            max_retry_after: max Retry-After value in seconds which will
+                be honored. Requests asking for a longer delay are not
+                retried.
+            jitter: boolean indicating if backoff should be randomized
+            idempotent_methods: optional set of HTTP methods which are
+                safe to retry following a possibly processed request.
+            throttle_statuses: optional set of HTTP statuses indicating
+                the request was throttled and not processed.
+            retry_statuses: optional set of HTTP statuses to retry
+                for idempotent methods.
+            budget: optional RetryBudget. If not provided a default
+                RetryBudget will be used.
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.jitter = jitter
+        self.idempotent_methods = idempotent_methods or self.IDEMPOTENT_METHODS
+        self.throttle_statuses = throttle_statuses or self.THROTTLE_STATUSES
+        self.retry_statuses = retry_statuses or self.RETRY_STATUSES
+        self.budget = budget or RetryBudget()
+
+    def _get_header(self, headers, name):
+        if not headers:
+            return None
+        if isinstance(headers, dict):
+            headers = headers.items()
+        for key, value in headers:
+            if key.lower() == name:
+                return value
+        return None
+
+    def retry_after(self, error):
+        """Get Retry-After delay from error response.
+
+        Args:
+            error: HttpError
+        Returns:
+            delay in seconds or None if not present.
+        """
+        value = self._get_header(
+                getattr(error, "response_headers", None), "retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0, float(value))
+        except ValueError:
+            parsed = email.utils.parsedate_tz(value)
+            if parsed is None:
+                return None
+            return max(0, email.utils.mktime_tz(parsed) - time.time())
+
+    def delay(self, attempt):
+        """Compute backoff delay.
+
+        Args:
+            attempt: zero based retry attempt
+        Returns:
+            delay in seconds
+        """
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def is_retryable(self, method, error):
+        """Check if a request failure is retryable.
+
+        Args:
+            method: HTTP method
+            error: exception raised by request
+        Returns:
+            True if the request should be retried, False otherwise.
+        """
+        idempotent = method.upper() in self.idempotent_methods
+        if isinstance(error, HttpError):
+            if error.status in self.throttle_statuses:
+                return True
+            return idempotent and error.status in self.retry_statuses
+        elif isinstance(error, self.RETRY_EXCEPTIONS):
+            return idempotent
+        return False
+
+    def _rewind(self, data):
+        """Return a callable which rewinds data for a retry, or None
+        if data can not be replayed."""
+        if data is None or isinstance(data, basestring):
+            return lambda: None
+        seek = getattr(data, "seek", None)
+        tell = getattr(data, "tell", None)
+        if seek is not None and tell is not None:
+            try:
+                position = tell()
+                return lambda: seek(position)
+            except Exception:
+                pass
+        return None
+
+    def send_request(self, send, method, path, data=None, headers=None,
+            **kwargs):
+        """Send request, retrying according to policy.
+
+        Args:
+            send: send_request callable to use for each attempt
+            method: HTTP method
+            path: request path
+            data: optional request data
+            headers: optional request headers
+            kwargs: additional send_request arguments
+        Returns:
+            response context
+        Raises:
+            HttpError and other exceptions from the final attempt
+        """
+        self.budget.deposit()
+        rewind = self._rewind(data)
+
+        attempt = 0
+        while True:
+            try:
+                return send(method, path, data, headers, **kwargs)
+            except Exception as error:
+                exc_info = sys.exc_info()
+                if attempt >= self.max_retries or rewind is None or \
+                        not self.is_retryable(method, error):
+                    raise exc_info[0], exc_info[1], exc_info[2]
+
+                delay = None
+                if isinstance(error, HttpError):
+                    delay = self.retry_after(error)
+                if delay is None:
+                    delay = self.delay(attempt)
+                elif delay > self.max_retry_after:
+                    raise exc_info[0], exc_info[1], exc_info[2]
+
+                if not self.budget.withdraw():
+                    log.warning("retry budget exhausted: %s %s" % (method, path))
+                    raise exc_info[0], exc_info[1], exc_info[2]
+
+                log.info("retrying %s %s in %.2fs: %r" % \
+                        (method, path, delay, error))
+                del exc_info
+                time.sleep(delay)
+                rewind()
+                attempt += 1
@@ -9,13 +9,15 @@ from trpycore.chunk.basic import BasicChunker
 from trpycore.chunk.hash import HashChunker
 
 from trrackspace.errors import to_error
+from trrackspace.services.cloudfiles.compress import GzipStream, gunzip, \
+        gunzip_chunks, is_compressible, is_gzip_encoded
 from trrackspace.services.cloudfiles.errors import NoSuchObject
 
 class StorageObject(object):
     """Cloudfiles storage object"""
     def __init__(self, container, name, exists=False,
             content_type=None, metadata=None, cors=None,
-            delete_at_timestamp=None):
+            delete_at_timestamp=None, compress=False):
         """StorageObject constructor
 
             Args:
@@ -33,6 +35,9 @@ class StorageObject(object):
                     Access-Control-Request-Method, Origin
                 delete_at_timestamp: unix timestamp at which object
                     should be deleted.
+                compress: boolean indicating that written data should
+                    be gzip compressed with a gzip Content-Encoding if
+                    content_type is compressible.
             Raises:
                 NoSuchObject if exists=True and object does not exist
                 ResponseError, RackspaceError
@@ -56,8 +61,11 @@ class StorageObject(object):
         ]
         self.cors = self._validate_cors(cors)
         self.delete_at_timestamp = delete_at_timestamp
+        self.compress = compress
 
         self.manifest = None
+        self.static_large_object = False
+        self.content_encoding = None
         self.content_length = 0
         self.last_modified = None
         self.etag = None
@@ -171,12 +179,16 @@ class StorageObject(object):
                 for header in response.getheaders():
                     key = header[0].lower()
                     value = header[1]
-                    if key == 'x-object-manifeset':
+                    if key == 'x-object-manifest':
                         self.manifest = value
+                    elif key == 'x-static-large-object':
+                        self.static_large_object = value.lower() == 'true'
                     elif key == 'content-type':
                         self.content_type = value
                     elif key == 'content-length':
                         self.content_length = int(value)
+                    elif key == 'content-encoding':
+                        self.content_encoding = value
                     elif key == 'last-modified':
                         self.last_modified = value
                     elif key == 'etag':
@@ -229,9 +241,14 @@ class StorageObject(object):
         return "%s?%s" % (self.uri, urllib.urlencode(urlparams))
 
     @to_error
-    def read(self, size=None, offset=0, output=None, output_chunk_size=65535):
+    def read(self, size=None, offset=0, output=None, output_chunk_size=65535,
+            hedge=True, decompress=True):
         """Read storage object data
 
+            gzip encoded objects are transparently decompressed unless
+            size or offset are given, in which case the requested range
+            of encoded data is returned as is.
+
             Args:
                 size: number of bytes to read
                 offset: offset in bytes to read from
@@ -239,6 +256,10 @@ class StorageObject(object):
                     data to. If not given, read data will be returned.
                 output_chunk_size: chunk size to use when writing data
                     to output.
+                hedge: boolean indicating the request may be hedged if
+                    the client has a hedge_policy.
+                decompress: boolean indicating if gzip encoded data
+                    should be decompressed.
             Returns:
                 Read data or output object if given.
             Raises:
@@ -253,32 +274,53 @@ class StorageObject(object):
         elif offset < 0:
             headers["Range"] = "bytes=%d" % (offset)
 
-        response_context = cloudfiles.send_request("GET", self.path, None, headers)
+        if hedge:
+            response_context = cloudfiles.send_hedged_request(
+                    "GET", self.path, None, headers)
+        else:
+            response_context = cloudfiles.send_request(
+                    "GET", self.path, None, headers)
         with response_context as response:
+            gzipped = decompress and "Range" not in headers and \
+                    is_gzip_encoded(response.getheaders())
             if output:
                 chunker = BasicChunker(response)
-                for chunk in chunker.chunks(output_chunk_size):
+                chunks = chunker.chunks(output_chunk_size)
+                if gzipped:
+                    chunks = gunzip_chunks(chunks)
+                for chunk in chunks:
                     output.write(chunk)
                 result = output
             else:
                 result = response.read()
+                if gzipped:
+                    result = gunzip(result)
 
         return result
 
     @to_error
-    def chunks(self, chunk_size=65535, size=None, offset=0):
+    def chunks(self, chunk_size=65535, size=None, offset=0, hedge=True,
+            decompress=True):
         """Return generator yielding chunk_size buffers of read data.
             
             Note that a single HTTP "GET" request will be used for this operation 
             with chunk_size response reads. This means that the API request
             will NOT be terminated until all generated chunks are consumed,
-            and additional requests using the same client will not be 
-            possible.
+            and its pooled connection will not be available to other
+            requests until then.
+
+            gzip encoded objects are transparently decompressed, yielding
+            buffers of varying size, unless size or offset are given,
+            in which case the requested range of encoded data is yielded.
 
             Args:
                 chunk_size: chunk size in bytes of data to yield
                 size: total number of bytes to read
                 offset: offset in bytes to read from
+                hedge: boolean indicating the request may be hedged if
+                    the client has a hedge_policy.
+                decompress: boolean indicating if gzip encoded data
+                    should be decompressed.
             Returns:
                 Generator yielding chunk_size buffers of data
         """
@@ -291,14 +333,24 @@ class StorageObject(object):
         elif offset < 0:
             headers["Range"] = "bytes=%d" % (offset)
 
-        response_context = cloudfiles.send_request("GET", self.path, None, headers)
+        if hedge:
+            response_context = cloudfiles.send_hedged_request(
+                    "GET", self.path, None, headers)
+        else:
+            response_context = cloudfiles.send_request(
+                    "GET", self.path, None, headers)
         with response_context as response:
             chunker = BasicChunker(response)
-            for chunk in chunker.chunks(chunk_size):
+            chunks = chunker.chunks(chunk_size)
+            if decompress and "Range" not in headers and \
+                    is_gzip_encoded(response.getheaders()):
+                chunks = gunzip_chunks(chunks)
+            for chunk in chunks:
                 yield chunk
 
     @to_error
-    def write(self, data, data_size=None, verify=True, chunk_size=65535):
+    def write(self, data, data_size=None, verify=True, chunk_size=65535,
+            compress=None):
         """Write data to storage object.
 
         Args:
@@ -309,6 +361,9 @@ class StorageObject(object):
             verify: boolean indicating if etag containing checksum
                 should be validated
             chunk_size: chunk size to use in HTTP data xfer
+            compress: optional boolean overriding the object's compress
+                setting. Compressed data is always sent using HTTP
+                chunked encoding, and data_size is ignored.
         Raises:
             ResponseError, RackspaceError
         """
@@ -325,7 +380,14 @@ class StorageObject(object):
         
         #add delete at header
         if self.delete_at_timestamp:
-            header["x-delete-at"] = str(int(self.delete_at_timestamp))
+            headers["x-delete-at"] = str(int(self.delete_at_timestamp))
+
+        if compress is None:
+            compress = self.compress
+        if compress and is_compressible(self.content_type):
+            headers["Content-Encoding"] = "gzip"
+            data = GzipStream(data, chunk_size=chunk_size)
+            data_size = None
         
         if verify:
             data = HashChunker(data)
@@ -345,6 +407,7 @@ class StorageObject(object):
                     self.etag = value
 
             self.content_length = data.last_size
+            self.content_encoding = headers.get("Content-Encoding")
 
     @to_error
     def update_metadata(self, metadata):
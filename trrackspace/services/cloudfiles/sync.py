@@ -0,0 +1,219 @@
+import hashlib
+import logging
+import os
+
+from trrackspace.threadpool import ThreadPool
+from trrackspace.services.cloudfiles.archive import directory_entries
+from trrackspace.services.cloudfiles.errors import NoSuchObject
+from trrackspace.services.cloudfiles.storage_object import StorageObject
+
+log = logging.getLogger(__name__)
+
+def format_mtime(mtime):
+    """Returns x-object-meta-mtime metadata value for mtime."""
+    return "%.6f" % mtime
+
+def file_md5(path, chunk_size=65535):
+    """Returns 16 byte binary md5 hash of file."""
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(chunk_size), ""):
+            md5.update(data)
+    return md5.digest()
+
+
+class SyncResult(object):
+    """Directory sync result."""
+
+    def __init__(self):
+        self.uploaded = []
+        self.unchanged = 0
+        self.errors = []
+        self.orphans = []
+        self.delete_result = None
+
+    def __repr__(self):
+        return "%s(uploaded=%d, unchanged=%d, orphans=%d, errors=%d)" % \
+                (self.__class__, len(self.uploaded), self.unchanged,
+                 len(self.orphans), len(self.errors))
+
+    @property
+    def succeeded(self):
+        """Returns True if all uploads and deletes succeeded."""
+        return not self.errors and \
+                (self.delete_result is None or self.delete_result.succeeded)
+
+
+class DirectorySync(object):
+    """Differential sync of a local directory to a container.
+
+    The directory is compared against the container listing, and only
+    new or changed files are uploaded, by up to threads concurrent
+    workers. Uploaded objects record their file's mtime in their
+    x-object-meta-mtime metadata. A file is unchanged if its size
+    matches the listing, and either, with use_mtime, its mtime equals
+    the object's recorded mtime, or its md5 matches the listing hash.
+    Unchanged files are never uploaded, and with use_mtime are only
+    read if their object has no recorded mtime, at the cost of a HEAD
+    request per file whose size matches.
+
+    prefix is a directory, so a trailing '/' is added if missing.
+    Objects below prefix without a local file are orphans, which are
+    bulk deleted if delete is set.
+
+    Note that objects written with gzip compression, or large object
+    manifests, never match their local md5, so they are always uploaded.
+
+    Example usage:
+        result = DirectorySync(container, "build/site", prefix="site/",
+                delete=True, use_mtime=True).sync()
+    """
+
+    def __init__(self, container, path, prefix=None, delete=False,
+            use_mtime=False, threads=8, batch_size=10000):
+        """DirectorySync constructor
+
+        Args:
+            container: Container object
+            path: local directory path
+            prefix: optional storage object name prefix which local
+                relative paths are appended to, i.e. 'site/'.
+            delete: boolean indicating if orphaned objects below
+                prefix should be deleted.
+            use_mtime: boolean indicating that files whose size matches
+                and whose mtime equals their object's recorded mtime
+                should be considered unchanged without computing their
+                md5.
+            threads: number of concurrent uploads and comparisons
+            batch_size: number of objects to list with each request
+        """
+        self.container = container
+        self.path = path
+        self.prefix = prefix.rstrip("/") + "/" if prefix else ""
+        self.delete = delete
+        self.use_mtime = use_mtime
+        self.threads = threads
+        self.batch_size = batch_size
+
+    def _local_files(self):
+        """Returns dict of object name to local file path."""
+        files = {}
+        for name, file_path in directory_entries(self.path):
+            if isinstance(name, str):
+                name = name.decode("utf-8")
+            files[self.prefix + name] = file_path
+        return files
+
+    def _remote_objects(self):
+        """Returns dict of object name to ObjectInfo."""
+        objects = {}
+        for info in self.container.list_all_objects(
+                prefix=self.prefix or None,
+                batch_size=self.batch_size,
+                prefetch=1,
+                compact=True):
+            objects[info.name] = info
+        return objects
+
+    def _recorded_mtime(self, name):
+        """Returns object's recorded mtime metadata, or None."""
+        storage_object = StorageObject(self.container, name)
+        try:
+            storage_object.load()
+        except NoSuchObject:
+            return None
+        return storage_object.metadata.get("x-object-meta-mtime")
+
+    def is_unchanged(self, file_path, info):
+        """Check if local file matches storage object listing info.
+
+        Args:
+            file_path: local file path
+            info: ObjectInfo
+        Returns:
+            True if the file does not need to be uploaded.
+        """
+        stat = os.stat(file_path)
+        if stat.st_size != info.bytes:
+            return False
+        if self.use_mtime:
+            mtime = self._recorded_mtime(info.name)
+            if mtime is not None:
+                return mtime == format_mtime(stat.st_mtime)
+        return file_md5(file_path) == info.hash
+
+    def plan(self):
+        """Compare the directory against the container.
+
+        Returns:
+            (uploads, unchanged, orphans) tuple, where uploads is a list
+            of (name, file path) tuples to upload, unchanged the number
+            of unchanged files, and orphans a list of object names
+            without a local file.
+        Raises:
+            ResponseError, RackspaceError
+        """
+        files = self._local_files()
+        objects = self._remote_objects()
+
+        def compare(name):
+            info = objects.get(name)
+            return info is not None and self.is_unchanged(files[name], info)
+
+        uploads, unchanged = [], 0
+        names = sorted(files)
+        thread_pool = ThreadPool(self.threads, name="DirectorySync")
+        try:
+            for name, is_unchanged in zip(names,
+                    thread_pool.map(compare, names)):
+                if is_unchanged:
+                    unchanged += 1
+                else:
+                    uploads.append((name, files[name]))
+        finally:
+            thread_pool.shutdown(wait=False)
+
+        orphans = sorted(name for name in objects if name not in files)
+        return uploads, unchanged, orphans
+
+    def upload(self, entry):
+        """Upload a single (name, file path) entry."""
+        name, file_path = entry
+        with open(file_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            storage_object = self.container.create_object(name, metadata={
+                "x-object-meta-mtime": format_mtime(stat.st_mtime)})
+            storage_object.write(f, data_size=stat.st_size)
+
+    def sync(self):
+        """Sync the directory to the container.
+
+        Failed uploads are recorded in the result's errors, as
+        (name, exception) tuples, rather than aborting the sync.
+
+        Returns:
+            SyncResult
+        Raises:
+            ResponseError, RackspaceError if the container could not
+            be listed.
+        """
+        result = SyncResult()
+        uploads, result.unchanged, result.orphans = self.plan()
+
+        thread_pool = ThreadPool(self.threads, name="DirectorySync")
+        try:
+            for entry, future in thread_pool.imap_unordered(
+                    self.upload, uploads):
+                error = future.exception()
+                if error is not None:
+                    log.warning("upload of %s failed: %s" % (entry[0], error))
+                    result.errors.append((entry[0], error))
+                else:
+                    result.uploaded.append(entry[0])
+        finally:
+            thread_pool.shutdown(wait=False)
+
+        if self.delete and result.orphans:
+            result.delete_result = self.container.delete_objects(
+                    result.orphans)
+        return result
@@ -0,0 +1,128 @@
+import errno
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+
+from trrackspace.services.identity.token import Token
+
+class TokenCache(object):
+    """Persistent token and service catalog cache.
+
+    TokenCache stores the access data (token, user, and service catalog)
+    returned from identity service authentication on disk, so that
+    short-lived processes can reuse a still valid token instead of
+    re-authenticating.
+
+    Entries are stored as json files, one per username / identity endpoint
+    pair. Writers serialize through an exclusive flock on a lock file
+    and replace entries atomically with rename(), so concurrent readers
+    never observe a partially written entry and do not need to lock.
+
+    Example usage:
+        cache = TokenCache("/var/tmp/trrackspace")
+        client = IdentityServiceClient(username="user", api_key="...",
+                token_cache=cache)
+    """
+
+    def __init__(self, directory=None, margin=60):
+        """TokenCache constructor
+
+        Args:
+            directory: optional directory in which to store cache entries.
+                If not provided, a trrackspace directory within the
+                system temp directory will be used.
+            margin: number of seconds prior to token expiration at which
+                cached entries will no longer be used.
+        """
+        if directory is None:
+            directory = os.path.join(tempfile.gettempdir(), "trrackspace")
+        self.directory = directory
+        self.margin = margin
+
+    def _ensure_directory(self):
+        try:
+            os.makedirs(self.directory, 0700)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    def _key(self, username, endpoint):
+        key = "%s\n%s" % (username, endpoint)
+        if isinstance(key, unicode):
+            key = key.encode("utf-8")
+        return hashlib.sha1(key).hexdigest()
+
+    def path(self, username, endpoint):
+        """Returns path of cache entry for username / endpoint"""
+        return os.path.join(self.directory,
+                "%s.json" % self._key(username, endpoint))
+
+    def get(self, username, endpoint):
+        """Get cached access data.
+
+        Args:
+            username: identity service username
+            endpoint: identity service endpoint
+        Returns:
+            access dict containing 'token', 'user', and 'serviceCatalog'
+            as returned by the identity service, or None if there is no
+            valid (unexpired) cache entry.
+        """
+        try:
+            with open(self.path(username, endpoint), "r") as f:
+                access = json.load(f)
+        except (IOError, ValueError):
+            return None
+
+        if not isinstance(access, dict):
+            return None
+
+        token = Token.from_json(access.get("token") or {})
+        if not token.id or token.is_expired(self.margin):
+            return None
+
+        return access
+
+    def put(self, username, endpoint, access):
+        """Store access data.
+
+        Args:
+            username: identity service username
+            endpoint: identity service endpoint
+            access: access dict containing 'token', 'user', and
+                'serviceCatalog' as returned by the identity service.
+        """
+        self._ensure_directory()
+        path = self.path(username, endpoint)
+
+        with open("%s.lock" % path, "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                fd, temp_path = tempfile.mkstemp(
+                        dir=self.directory, suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "w") as f:
+                        json.dump(access, f)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.rename(temp_path, path)
+                except:
+                    os.unlink(temp_path)
+                    raise
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def delete(self, username, endpoint):
+        """Remove cache entry.
+
+        Args:
+            username: identity service username
+            endpoint: identity service endpoint
+        """
+        try:
+            os.unlink(self.path(username, endpoint))
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
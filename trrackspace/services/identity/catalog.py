@@ -1,16 +1,35 @@
 import json
+import os
+import tempfile
 
 from trrackspace.encode import Encoder
 
 class ServiceCatalog(object):
     @classmethod
     def from_json(cls, json):
+        #accept both the identity service list format and
+        #the dict format produced by to_json().
+        if isinstance(json, dict):
+            json = json.values()
+
         services = []
         for service in json:
             services.append(Service.from_json(service))
         catalog = ServiceCatalog(services)
         return catalog
 
+    @classmethod
+    def from_file(cls, path):
+        """Load ServiceCatalog snapshot saved with to_file().
+
+        Args:
+            path: filesystem path of snapshot
+        Returns:
+            ServiceCatalog object
+        """
+        with open(path, "r") as f:
+            return cls.from_json(json.load(f))
+
     def __init__(self, services=None):
         self.services = {}
         for service in services or []:
@@ -25,6 +44,25 @@ class ServiceCatalog(object):
     def to_json(self):
         return self.services
 
+    def to_file(self, path):
+        """Save ServiceCatalog snapshot.
+
+        The snapshot is written to a temporary file which is then
+        renamed to path, so readers never observe a partial snapshot.
+
+        Args:
+            path: filesystem path of snapshot
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(str(self))
+            os.rename(temp_path, path)
+        except:
+            os.unlink(temp_path)
+            raise
+
     def get_service(self, name):
         return self.services.get(name)
 
@@ -89,6 +127,11 @@ class Service(object):
 class ServiceEndpoints(object):
     @classmethod
     def from_json(cls, json):
+        #accept both the identity service list format and
+        #the dict format produced by to_json().
+        if isinstance(json, dict):
+            json = json.values()
+
         endpoints = []
         for endpoint in json:
             endpoints.append(ServiceEndpoint.from_json(endpoint))
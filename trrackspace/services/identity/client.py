@@ -1,4 +1,8 @@
 import json
+import logging
+import threading
+import time
+import weakref
 
 from trhttp.rest.client import RestClient
 from trhttp.rest.auth import RestAuthenticator
@@ -9,6 +13,8 @@ from trrackspace.services.identity.catalog import ServiceCatalog
 from trrackspace.services.identity.token import Token
 from trrackspace.services.identity.user import User
 
+log = logging.getLogger(__name__)
+
 class IdentityServiceClient(RestAuthenticator):
     """Rackspace identity service client."""
 
@@ -22,6 +28,11 @@ class IdentityServiceClient(RestAuthenticator):
             keepalive=True,
             proxy=None,
             rest_client_class=RestClient,
+            token_cache=None,
+            token_refresh_margin=None,
+            token_refresh_retry_interval=30,
+            catalog=None,
+            token=None,
             debug_level=0):
         """IdentityServiceClient constructor
 
@@ -44,6 +55,23 @@ class IdentityServiceClient(RestAuthenticator):
             proxy: (host, port) tuple specifying proxy for connection
             rest_client_class: optional RestClient class. If not 
                 specified sensible default will be used.
+            token_cache: optional TokenCache object. If provided,
+                authentication will reuse cached, unexpired tokens
+                before issuing identity service requests, and will
+                store newly issued tokens in the cache.
+            token_refresh_margin: optional number of seconds prior to
+                token expiration at which the token should be renewed
+                in a background thread. If not provided, tokens are
+                only renewed when a request fails authentication.
+            token_refresh_retry_interval: number of seconds to wait
+                before retrying a failed background token renewal, and
+                min number of seconds between background renewals.
+            catalog: optional ServiceCatalog, i.e. loaded from a
+                snapshot with ServiceCatalog.from_file(). If provided
+                along with token, no identity request will be made until
+                the token is expired or rejected.
+            token: optional Token object or token id to use until it
+                expires or is rejected.
             debug_level: httplib debug level. Setting this to 1 will log
                 http requests and responses which is very useful for 
                 debugging.
@@ -53,9 +81,12 @@ class IdentityServiceClient(RestAuthenticator):
         self.api_key = api_key
         self.password = password
 
+        if isinstance(token, basestring):
+            token = Token(id=token)
+
         #default objects which will be replaced following authentication
-        self.catalog = ServiceCatalog()
-        self.token = Token()
+        self.catalog = catalog or ServiceCatalog()
+        self.token = token or Token()
         self.user = User(self)
 
         if endpoint is None:
@@ -66,7 +97,18 @@ class IdentityServiceClient(RestAuthenticator):
         self.retries = retries
         self.keepalive = keepalive
         self.debug_level = debug_level
+        self.token_cache = token_cache
+        self.token_refresh_margin = token_refresh_margin
+        self.token_refresh_retry_interval = token_refresh_retry_interval
         self.rest_client = None
+        self.rest_clients = weakref.WeakSet()
+
+        self._auth_lock = threading.RLock()
+        self._access_generation = 0
+        self._refresh_lock = threading.Lock()
+        self._refresh_wakeup = threading.Event()
+        self._refresh_running = False
+        self._refresh_thread = None
         
         self.rest_client = rest_client_class(
                 endpoint=endpoint,
@@ -87,24 +129,42 @@ class IdentityServiceClient(RestAuthenticator):
         #so assign it now since we need it to authenticate.
         if not self.rest_client:
             self.rest_client = rest_client
+        
+        #track rest clients so that refreshed tokens can be
+        #pushed to them without waiting for an auth failure.
+        self.rest_clients.add(rest_client)
 
-        if not self.token.id or force:
-            if self.api_key is not None:
-                result = self.authenticate_api_key(
-                        username=self.username,
-                        api_key=self.api_key)
-            elif self.password is not None:
-                result = self.authenticate_password(
-                        username=self.username,
-                        password=self.password)
-            else:
-                raise ValueError()
-            
-            access = result.get("access")
-            if access:
-                self.catalog = ServiceCatalog.from_json(access.get("serviceCatalog"))
-                self.user = User.from_json(self, access.get("user"))
-                self.token = Token.from_json(access.get("token"))
+        #token the caller is replacing. If forced, this is the token the
+        #rest client failed with, which may already have been replaced.
+        generation = self._access_generation
+        stale_token_id = self.token.id
+        if force:
+            headers = getattr(rest_client, "auth_headers", None) or {}
+            stale_token_id = headers.get("X-Auth-Token", stale_token_id)
+
+        if self._requires_authentication(
+                stale_token_id, generation, force):
+            #single-flight: only one thread authenticates at a time, and
+            #threads which waited reuse the token it obtained.
+            with self._auth_lock:
+                if self._requires_authentication(
+                        stale_token_id, generation, force):
+                    access = None
+                    if self.token_cache is not None:
+                        access = self.token_cache.get(
+                                self.username, self.endpoint)
+                        #if forced, only accept a cached token which
+                        #differs from the stale one, i.e. another process
+                        #already replaced it.
+                        if access and force and \
+                                access["token"].get("id") == stale_token_id:
+                            access = None
+
+                    if access is None:
+                        access = self._request_access()
+
+                    if access:
+                        self._update_access(access)
 
         auth_headers = {
             "X-Auth-Token": self.token.id
@@ -112,6 +172,170 @@ class IdentityServiceClient(RestAuthenticator):
         
         return auth_headers
 
+    def _requires_authentication(self, stale_token_id, generation, force):
+        """Check if an identity request is required.
+
+        Args:
+            stale_token_id: token id the caller would like replaced
+            generation: access generation observed by the caller
+            force: boolean indicating if the caller requires a new token
+        Returns:
+            True if there is no valid token, or if force is True and
+            the stale token has not been replaced since the caller
+            observed generation.
+        """
+        if not self.token.id or self.token.is_expired():
+            return True
+        elif force:
+            return self.token.id == stale_token_id and \
+                    self._access_generation == generation
+        else:
+            return False
+
+    def _request_access(self):
+        """Authenticate with the identity service.
+
+        Returns:
+            access dict containing 'token', 'user', and 'serviceCatalog'.
+        """
+        if self.api_key is not None:
+            result = self.authenticate_api_key(
+                    username=self.username,
+                    api_key=self.api_key)
+        elif self.password is not None:
+            result = self.authenticate_password(
+                    username=self.username,
+                    password=self.password)
+        else:
+            raise ValueError()
+        
+        access = result.get("access")
+        if access and self.token_cache is not None:
+            self.token_cache.put(self.username, self.endpoint, access)
+        return access
+
+    def _update_access(self, access):
+        """Replace catalog, user, and token with authenticated access data.
+
+        All objects are fully constructed before being swapped in, and
+        each tracked rest client receives a new auth headers dict in a
+        single assignment, so concurrent requests will always see either
+        the previous or the new token, never a missing one.
+
+        Args:
+            access: access dict containing 'token', 'user',
+                and 'serviceCatalog'.
+        """
+        catalog = ServiceCatalog.from_json(access.get("serviceCatalog"))
+        user = User.from_json(self, access.get("user"))
+        token = Token.from_json(access.get("token"))
+        
+        self.catalog = catalog
+        self.user = user
+        self.token = token
+        self._access_generation += 1
+
+        for rest_client in list(self.rest_clients):
+            rest_client.auth_headers = {
+                "X-Auth-Token": token.id
+            }
+
+        if self.token_refresh_margin is not None:
+            self._start_refresh()
+        self._refresh_wakeup.set()
+
+    def _start_refresh(self):
+        """Start background token refresh thread if not running."""
+        with self._refresh_lock:
+            if self._refresh_thread is None:
+                self._refresh_running = True
+                self._refresh_thread = threading.Thread(
+                        target=self._refresh_loop,
+                        name="IdentityServiceClient-refresh")
+                self._refresh_thread.daemon = True
+                self._refresh_thread.start()
+
+    def stop_refresh(self):
+        """Stop background token refresh thread."""
+        with self._refresh_lock:
+            thread = self._refresh_thread
+            self._refresh_running = False
+            self._refresh_thread = None
+            self._refresh_wakeup.set()
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _refresh_loop(self):
+        """Background token refresh thread.
+
+        Sleeps until token_refresh_margin seconds prior to token
+        expiration and then renews the token. Failed renewals are
+        retried every token_refresh_retry_interval seconds until
+        the token is renewed. Successful renewals are also at least
+        token_refresh_retry_interval seconds apart, so that a margin
+        which is not smaller than the token lifetime does not renew
+        the token in a tight loop.
+        """
+        last_refresh = None
+        while self._refresh_running:
+            self._refresh_wakeup.clear()
+
+            expires = self.token.expires_timestamp
+            if expires is None:
+                #nothing to do until a token with an expiration arrives
+                self._refresh_wakeup.wait()
+                continue
+
+            delay = expires - self.token_refresh_margin - time.time()
+            if delay > 0:
+                self._refresh_wakeup.wait(delay)
+                continue
+
+            if last_refresh is not None:
+                delay = last_refresh + self.token_refresh_retry_interval - \
+                        time.time()
+                if delay > 0:
+                    log.warning("token_refresh_margin (%ss) is not smaller "
+                            "than the token lifetime" % \
+                            self.token_refresh_margin)
+                    self._refresh_wakeup.wait(delay)
+                    continue
+
+            try:
+                self.refresh()
+                last_refresh = time.time()
+            except Exception:
+                log.exception("token refresh failed")
+                self._refresh_wakeup.wait(self.token_refresh_retry_interval)
+
+    @to_error
+    def refresh(self):
+        """Renew token prior to expiration.
+
+        If a token cache is in use, and another process has already
+        stored a token which expires later than the current one, the
+        cached token is used instead of issuing an identity request.
+
+        Raises:
+            ResponseError, RackspaceError
+        """
+        with self._auth_lock:
+            access = None
+            if self.token_cache is not None:
+                access = self.token_cache.get(self.username, self.endpoint)
+                if access:
+                    token = Token.from_json(access["token"])
+                    if token.id == self.token.id or \
+                            token.expires_timestamp <= self.token.expires_timestamp:
+                        access = None
+            
+            if access is None:
+                access = self._request_access()
+
+            if access:
+                self._update_access(access)
+
     @to_error
     def authenticate_api_key(self, username, api_key):
         data = json.dumps({
@@ -16,6 +16,10 @@ class IdentityServiceClientFactory(Factory):
             keepalive=True,
             proxy=None,
             rest_client_class=RestClient,
+            token_cache=None,
+            token_refresh_margin=None,
+            catalog=None,
+            token=None,
             debug_level=0):
         """IdentityServiceClientFactory constructor
 
@@ -42,6 +46,20 @@ class IdentityServiceClientFactory(Factory):
             proxy: (host, port) tuple specifying proxy for connection
             rest_client_class: optional RestClient class. If not 
                 specified sensible default will be used.
+            token_cache: optional TokenCache object. If provided,
+                authentication will reuse cached, unexpired tokens
+                before issuing identity service requests, and will
+                store newly issued tokens in the cache.
+            token_refresh_margin: optional number of seconds prior to
+                token expiration at which the token should be renewed
+                in a background thread. If not provided, tokens are
+                only renewed when a request fails authentication.
+            catalog: optional ServiceCatalog, i.e. loaded from a
+                snapshot with ServiceCatalog.from_file(). If provided
+                along with token, no identity request will be made until
+                the token is expired or rejected.
+            token: optional Token object or token id to use until it
+                expires or is rejected.
             debug_level: httplib debug level. Setting this to 1 will log
                 http requests and responses which is very useful for 
                 debugging.
@@ -55,6 +73,10 @@ class IdentityServiceClientFactory(Factory):
         self.keepalive = keepalive
         self.proxy = proxy
         self.rest_client_class = rest_client_class
+        self.token_cache = token_cache
+        self.token_refresh_margin = token_refresh_margin
+        self.catalog = catalog
+        self.token = token
         self.debug_level = debug_level
         self.username = username
 
@@ -70,4 +92,8 @@ class IdentityServiceClientFactory(Factory):
                 keepalive=self.keepalive,
                 proxy=self.proxy,
                 rest_client_class=self.rest_client_class,
+                token_cache=self.token_cache,
+                token_refresh_margin=self.token_refresh_margin,
+                catalog=self.catalog,
+                token=self.token,
                 debug_level=self.debug_level)
@@ -1,6 +1,15 @@
+import calendar
 import json
+import re
+import time
 
 class Token(object):
+    #matches identity service expiration timestamps, i.e.
+    #2013-08-28T14:38:10.000-05:00 or 2013-08-28T19:38:10Z
+    EXPIRES_REGEX = re.compile(
+            r"^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.\d+)?"
+            r"(Z|[+-]\d{2}:?\d{2})?$")
+
     @classmethod
     def from_json(cls, json):
         token = Token(
@@ -24,3 +33,44 @@ class Token(object):
             "id": self.id,
             "expires": self.expires
         }
+
+    @property
+    def expires_timestamp(self):
+        """Returns token expiration as a unix timestamp.
+
+        Returns:
+            unix timestamp at which the token expires, or None if
+            the token has no (or an unparseable) expiration.
+        """
+        match = self.EXPIRES_REGEX.match(self.expires or "")
+        if match is None:
+            return None
+
+        year, month, day, hour, minute, second, zone = match.groups()
+        result = calendar.timegm((int(year), int(month), int(day),
+            int(hour), int(minute), int(second), 0, 0, 0))
+
+        if zone and zone != "Z":
+            zone = zone.replace(":", "")
+            offset = int(zone[1:3]) * 3600 + int(zone[3:5]) * 60
+            if zone[0] == "+":
+                result -= offset
+            else:
+                result += offset
+        return result
+
+    def is_expired(self, margin=0):
+        """Check if token is expired.
+
+        Args:
+            margin: number of seconds prior to the actual expiration
+                at which the token should be considered expired.
+        Returns:
+            True if the token is expired (or will be within margin
+            seconds), False otherwise. Tokens without an expiration
+            are never considered expired.
+        """
+        expires = self.expires_timestamp
+        if expires is None:
+            return False
+        return time.time() + margin >= expires
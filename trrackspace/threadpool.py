@@ -0,0 +1,394 @@
+import collections
+import Queue
+import sys
+import threading
+
+class TimeoutError(Exception):
+    """Future result not available within timeout."""
+    pass
+
+class CancelledError(Exception):
+    """Future was cancelled before it started running."""
+    pass
+
+class Future(object):
+    """Result of an asynchronous computation."""
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    CANCELLED = "CANCELLED"
+    FINISHED = "FINISHED"
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._state = self.PENDING
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def __repr__(self):
+        return "%s(state=%s)" % (self.__class__, self._state)
+
+    def done(self):
+        """Returns True if the future is finished or cancelled."""
+        return self._state in [self.FINISHED, self.CANCELLED]
+
+    def cancelled(self):
+        """Returns True if the future was cancelled."""
+        return self._state == self.CANCELLED
+
+    def cancel(self):
+        """Cancel the future if it has not started running.
+
+        Returns:
+            True if the future is cancelled, False otherwise.
+        """
+        with self._condition:
+            if self._state == self.PENDING:
+                self._state = self.CANCELLED
+                self._condition.notify_all()
+            elif self._state != self.CANCELLED:
+                return False
+        self._invoke_callbacks()
+        return True
+
+    def set_running(self):
+        """Mark the future as running.
+
+        Returns:
+            False if the future was cancelled and should not be run,
+            True otherwise.
+        """
+        with self._condition:
+            if self._state == self.CANCELLED:
+                return False
+            self._state = self.RUNNING
+            return True
+
+    def set_result(self, result):
+        with self._condition:
+            self._result = result
+            self._state = self.FINISHED
+            self._condition.notify_all()
+        self._invoke_callbacks()
+
+    def set_exception(self, exc_info):
+        """Set exception result.
+
+        Args:
+            exc_info: (type, value, traceback) tuple as returned
+                from sys.exc_info()
+        """
+        with self._condition:
+            self._exc_info = exc_info
+            self._state = self.FINISHED
+            self._condition.notify_all()
+        self._invoke_callbacks()
+
+    def _wait(self, timeout):
+        with self._condition:
+            if not self.done():
+                self._condition.wait(timeout)
+            if self._state == self.CANCELLED:
+                raise CancelledError()
+            elif self._state != self.FINISHED:
+                raise TimeoutError()
+
+    def result(self, timeout=None):
+        """Return the result, waiting for it if necessary.
+
+        If the computation raised an exception, it will be re-raised
+        with its original traceback.
+
+        Args:
+            timeout: optional max number of seconds to wait
+        Returns:
+            computation result
+        Raises:
+            TimeoutError, CancelledError
+        """
+        self._wait(timeout)
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def exception(self, timeout=None):
+        """Return the exception raised by the computation, if any.
+
+        Args:
+            timeout: optional max number of seconds to wait
+        Returns:
+            exception or None
+        Raises:
+            TimeoutError, CancelledError
+        """
+        self._wait(timeout)
+        if self._exc_info is not None:
+            return self._exc_info[1]
+        return None
+
+    def add_done_callback(self, callback):
+        """Invoke callback(future) once the future is done.
+
+        If the future is already done, callback will be invoked
+        immediately in the calling thread, otherwise it will be invoked
+        in the thread which completes the future.
+        """
+        with self._condition:
+            if not self.done():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _invoke_callbacks(self):
+        with self._condition:
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+
+class Prefetcher(object):
+    """Iterator over items produced by a worker thread.
+
+    Prefetcher objects should be created with ThreadPool.prefetch().
+    """
+
+    def __init__(self, thread_pool, iterable, depth=1):
+        """Prefetcher constructor
+
+        Args:
+            thread_pool: ThreadPool to produce items in
+            iterable: iterable of items
+            depth: max number of items to produce ahead of the consumer,
+                or 0 for no limit.
+        """
+        self._buffer = Queue.Queue(maxsize=depth)
+        self._stopped = threading.Event()
+        self._finished = False
+
+        #the producer must not reference self, so that an abandoned
+        #Prefetcher is collected and stops its producer.
+        buffer, stopped = self._buffer, self._stopped
+
+        def put(entry):
+            while not stopped.is_set():
+                try:
+                    buffer.put(entry, timeout=0.1)
+                    return True
+                except Queue.Full:
+                    pass
+            return False
+
+        def produce():
+            try:
+                for item in iterable:
+                    if not put((True, item)):
+                        return
+            except:
+                put((False, sys.exc_info()))
+            else:
+                put((False, None))
+
+        thread_pool.submit(produce)
+
+    def __del__(self):
+        self._stopped.set()
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        if self._finished:
+            raise StopIteration()
+
+        is_item, value = self._buffer.get()
+        if is_item:
+            return value
+
+        self.close()
+        if value is not None:
+            raise value[0], value[1], value[2]
+        raise StopIteration()
+
+    def close(self):
+        """Stop producing items."""
+        self._finished = True
+        self._stopped.set()
+
+
+class ThreadPool(object):
+    """Fixed size pool of daemon worker threads.
+
+    Worker threads are started on demand as work is submitted,
+    up to num_threads.
+
+    Example usage:
+        with ThreadPool(8) as pool:
+            future = pool.submit(container.list_objects, prefix="tmp/")
+            objects = future.result()
+    """
+
+    def __init__(self, num_threads=8, name="ThreadPool"):
+        """ThreadPool constructor
+
+        Args:
+            num_threads: max number of worker threads
+            name: worker thread name prefix
+        """
+        if num_threads < 1:
+            raise ValueError("num_threads must be at least 1")
+
+        self.num_threads = num_threads
+        self.name = name
+        self._queue = Queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def _start_thread(self):
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("thread pool is shutdown")
+            if len(self._threads) < self.num_threads:
+                thread = threading.Thread(target=self._run,
+                        name="%s-%d" % (self.name, len(self._threads)))
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            work = self._queue.get()
+            if work is None:
+                break
+
+            future, func, args, kwargs = work
+            if not future.set_running():
+                continue
+
+            try:
+                result = func(*args, **kwargs)
+            except:
+                future.set_exception(sys.exc_info())
+            else:
+                future.set_result(result)
+            finally:
+                del work, future, func, args, kwargs
+
+    def submit(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) in a worker thread.
+
+        Returns:
+            Future
+        """
+        future = Future()
+        self._start_thread()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def imap_unordered(self, func, iterable, max_pending=None):
+        """Apply func to each item of iterable in worker threads.
+
+        Items are pulled from iterable as work completes, so at most
+        max_pending items are in flight (or buffered) at once, which
+        allows iterable to be an unbounded generator.
+
+        Args:
+            func: callable accepting a single item
+            iterable: iterable of items
+            max_pending: max number of submitted, but not yet yielded,
+                items. Defaults to twice num_threads.
+        Returns:
+            Generator yielding (item, future) tuples in completion order.
+        """
+        max_pending = max_pending or self.num_threads * 2
+        completed = Queue.Queue()
+        iterator = iter(iterable)
+        exhausted = False
+        pending = 0
+
+        while True:
+            while not exhausted and pending < max_pending:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                future = self.submit(func, item)
+                future.add_done_callback(
+                        lambda f, item=item: completed.put((item, f)))
+                pending += 1
+
+            if pending == 0:
+                break
+
+            item, future = completed.get()
+            pending -= 1
+            yield item, future
+
+    def map(self, func, iterable, max_pending=None):
+        """Apply func to each item of iterable in worker threads.
+
+        Args:
+            func: callable accepting a single item
+            iterable: iterable of items
+            max_pending: max number of submitted, but not yet yielded,
+                items. Defaults to twice num_threads.
+        Returns:
+            Generator yielding func results in iterable order.
+        Raises:
+            First exception raised by func, in iterable order.
+        """
+        max_pending = max_pending or self.num_threads * 2
+        futures = collections.deque()
+        for item in iterable:
+            futures.append(self.submit(func, item))
+            if len(futures) >= max_pending:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+    def prefetch(self, iterable, depth=1):
+        """Advance iterable in a worker thread ahead of the consumer.
+
+        Production starts immediately. While the consumer processes
+        item N, up to depth following items are produced in the
+        background and buffered, so memory use is bounded by depth.
+        Note that the worker thread is occupied until iterable is
+        exhausted or the returned Prefetcher is closed.
+
+        Args:
+            iterable: iterable of items, i.e. a generator performing I/O
+            depth: max number of items to produce ahead of the consumer,
+                or 0 to produce items without bound.
+        Returns:
+            Prefetcher iterator yielding items of iterable in order.
+        """
+        return Prefetcher(self, iterable, depth)
+
+    def shutdown(self, wait=True):
+        """Stop worker threads once submitted work is complete.
+
+        Args:
+            wait: boolean indicating if this call should block until
+                all worker threads have exited.
+        """
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = list(self._threads)
+
+        for thread in threads:
+            self._queue.put(None)
+
+        if wait:
+            for thread in threads:
+                if thread is not threading.current_thread():
+                    thread.join()